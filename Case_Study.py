@@ -1,17 +1,18 @@
 from UAVModelClass import UAVStrikeModel
-import pickle
 from f_visualisation import plot_time_space_network, NetworkMap, plot_locations
-from f_helper import create_time_dictionary
+from f_helper import create_time_tensor
 from coordinates import starting_locations, target_locations, center_location
 from gurobipy import *
 from f_sensitivity import plot_speed, plot_endurance, plot_heatmap_speed_endurance
+from f_cache import ResultCache
+from f_verify import print_verification_report
 
 # Define the speed of the drone in kilometers per hour
 drone_speed = 89  # in km/h
 endurance = 360# in seconds
 
 # Create the time dictionary using the starting and target locations with the given drone speed
-time_dictionary = create_time_dictionary(starting_locations, target_locations, drone_speed)
+time_dictionary = create_time_tensor(starting_locations, target_locations, drone_speed)
 
 # Create an instance of the UAVStrikeModel with the following parameters:
 # - Drone speed: 89 km/h
@@ -23,21 +24,35 @@ time_dictionary = create_time_dictionary(starting_locations, target_locations, d
 # - Objective type: obj=3 (custom parameter as per the model's definition)
 model = UAVStrikeModel(3, 6, endurance, 1, time_dictionary, obj=2)
 
-# Optimize the model to find the best solution
-model.optimize()
+# Mixed fleet: one speed (km/h) and endurance (minutes) per UAV, e.g. Albatross, Stiraria E, CGT50 and Yangda drones.
+# Identical UAVs (same start, speed and endurance) can be ordered with symmetry=True.
+# fleet_speed = [64.8, 80, 89, 90, 89, 64.8]
+# fleet_endurance = [300, 300, 360, 210, 360, 300]
+# model = UAVStrikeModel(3, 6, fleet_endurance, 1, create_time_tensor(starting_locations, target_locations, fleet_speed), obj=2)
+
+# Solved instances are kept in Results/cache, re-running the case study only solves what changed
+cache = ResultCache()
+
+# Optimize the model to find the best solution, unless this instance was solved before
+result = cache.solve(model)
 
 # Print the time elapsed during optimization
-print(f'TIME ELAPSED: {model.elapsed_time} s')
+print(f'TIME ELAPSED: {result["elapsed_time"]} s')
+
+if result['cached']:
+    print('Solution taken from the result cache')
+else:
+    # Print the solution details found by the optimizer
+    model.print_solution()
 
-# Print the solution details found by the optimizer
-model.print_solution()
+    # Audit the solution against every constraint of the model
+    print_verification_report(model.verify())
 
-# Save the model's results to a file named 'Phillipines' for later use
-model.save('Phillipines')
+    # Save the model's results as a run named 'Phillipines' in the results store (Results/store) for later use
+    model.save('Phillipines')
 
-# Load the optimization results from the saved file
-with open('Results/Phillipines', 'rb') as f:
-    optimization_results = pickle.load(f)
+# The cached result holds the same dictionary as the saved file
+optimization_results = result['solution']
 
 # Extract the decision variables x1 and x2 from the optimization results
 x1 = optimization_results.get('x1', {})
@@ -49,17 +64,18 @@ plot_locations(starting_locations, target_locations, x1, x2, center_location)
 
 # Plot the time-space network based on the optimization results
 plot_time_space_network(optimization_results)
+# or from the results store (f_results.ResultStore): plot_time_space_network(ResultStore(), 'Phillipines')
 
 # Create a network map visualization for the given model
 #NetworkMap(model)
 
 
 # Plot contour maps for different speeds and endurance levels
-#plot_heatmap_speed_endurance(60, 150, 200, 400, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1)
+#plot_heatmap_speed_endurance(60, 150, 200, 400, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1, cache=cache)
 
 # Perform sensitivity analysis for different speeds (120 km/h to 180 km/h)
-#plot_speed(80, 110, starting_locations, target_locations, endurance=endurance)
+#plot_speed(80, 110, starting_locations, target_locations, endurance=endurance, cache=cache)
 
 
 # Perform sensitivity analysis for different endurance levels (300 km to 650 km)
-plot_endurance(240, 600, starting_locations, target_locations, drone_speed=drone_speed)
\ No newline at end of file
+plot_endurance(240, 600, starting_locations, target_locations, drone_speed=drone_speed, cache=cache)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from f_sensitivity import plot_heatmap, generate_heatmap_data
+from f_sensitivity import plot_heatmap, generate_heatmap_data, compare_formulations, compare_lns, compare_solvers
 import pickle
 
 if __name__ == "__main__":
@@ -10,6 +10,15 @@ if __name__ == "__main__":
     delay = 1
 
     heatmap_data = generate_heatmap_data(min_targets, max_targets, min_uavs, max_uavs, endurance, delay)
+    # Bound long runs: stop every point after 10 minutes or at a 1% gap, and the whole grid after 10 hours
+    # heatmap_data = generate_heatmap_data(min_targets, max_targets, min_uavs, max_uavs, endurance, delay, time_limit=600, mip_gap=0.01, budget=36000)
+
+    # Benchmark the tight formulation (formulation='tight') against the standard one on the same grid
+    # comparison = compare_formulations(min_targets, max_targets, min_uavs, max_uavs, endurance, delay, time_limit=60)
+    # Benchmark the LNS (f_lns) against the full MILP with the same time limit per point
+    # comparison = compare_lns(min_targets, max_targets, min_uavs, max_uavs, endurance, delay, time_limit=60)
+    # Benchmark the HiGHS backend (solver='highs') against Gurobi, throughput per core with one thread per point
+    # comparison = compare_solvers(min_targets, max_targets, min_uavs, max_uavs, endurance, delay, threads=1, time_limit=60)
     with open('contour.pickle', 'wb') as handle:
         pickle.dump(heatmap_data, handle, protocol=pickle.HIGHEST_PROTOCOL)
 
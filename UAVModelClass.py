@@ -1,43 +1,229 @@
 from gurobipy import *
+import numpy as np
+import scipy.sparse as sp
 import random as rd
 import time as tm
 import pickle
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+from f_verify import verify_solution
+from f_profile import SolveProfiler, save_profile
+from f_heuristic import greedy_solution
+from f_results import ResultStore
+from f_solution import SolutionSnapshot
+from f_solver import SOLVERS, gurobi_result, solve_highs
+from f_instances import generate_instance
+
+# Version of the formulation built by UAVStrikeModel. Bump it whenever variables, constraints or objectives
+# change, so results cached for the old formulation (see f_cache.py) are no longer used.
+FORMULATION_VERSION = 1
+
+class ModelConfig:
+    """
+    Everything needed to build a UAVStrikeModel, without building it: sizes, endurance, delay, time data,
+    objective and build options, with the same arguments as UAVStrikeModel. A config is cheap to create and to
+    pickle, so sweeps can send configs to worker processes, which build the models themselves with model().
+    """
+    def __init__(self, n_targets, n_uavs, endurance, delay=1, timedict=None, obj=2, builder='loop', symmetry=False,
+                 formulation='standard', solver='gurobi', seed=None):
+        self.n_targets = n_targets
+        self.n_uavs = n_uavs
+        self.endurance = endurance
+        self.delay = delay
+        self.timedict = timedict  # None draws random time data when the model is created
+        self.seed = seed  # Seed of that random time data, None draws one from the random module
+        self.obj = obj
+        self.builder = builder
+        self.symmetry = symmetry
+        self.formulation = formulation
+        self.solver = solver
+
+    def model(self):
+        # UAVStrikeModel for this config; like every UAVStrikeModel it is only built on first use
+        return UAVStrikeModel(**vars(self))
 
 class UAVStrikeModel:
-    def __init__(self, n_targets, n_uavs, endurance, delay=1, timedict=None, obj=2):
+    """
+    MILP of the UAV strike problem. The instance data (sizes, endurance, delay and time data) is set up when the
+    model is created, the Gurobi model only on first use: by build(), by optimize() or by accessing anything that
+    needs it (m, x1, ...). Until then the set_* methods, set_active_targets and freeze only change the data the
+    model will be built from. `timings` holds the seconds spent in every phase (data, variables, constraints,
+    objective, tight, symmetry, build and the last solve).
+    """
+    def __init__(self, n_targets, n_uavs, endurance, delay=1, timedict=None, obj=2, builder='loop', symmetry=False,
+                 formulation='standard', solver='gurobi', seed=None):
+        self.built = False  # Set before anything else, see __getattr__
         self.n = n_targets  # Number of targets
         self.w = n_uavs  # Number of UAVs
         self.obj = obj
+        self.builder = builder  # 'loop' (expression based) or 'matrix' (sparse block based)
+        if self.builder not in ('loop', 'matrix'):
+            raise ValueError(f"Unknown builder '{builder}', expected 'loop' or 'matrix'")
+        self.formulation = formulation  # 'standard' (big-M of w * T) or 'tight' (bounds and per-row big-M, see setup_tight)
+        if self.formulation not in ('standard', 'tight'):
+            raise ValueError(f"Unknown formulation '{formulation}', expected 'standard' or 'tight'")
+        self.solver = solver  # Backend solving the model: 'gurobi' or 'highs' (see f_solver)
+        if self.solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
         self.filename = f'Results/{self.n}_{self.w}'  # Filename for saving results
-        self.T = endurance  # UAV endurance
         self.delay = delay  # Delay parameter
         self.lst_i = range(1, self.n + self.w + 1)  # All nodes (targets + UAVs)
         self.lst_j = range(1, self.n + 1)  # Target nodes
         self.lst_v = range(1, self.w + 1)  # UAV nodes
         self.lst_k = range(1, 4)  # Task types (1, 2, 3)
-        self.time = {}  # Dictionary for time data
+        self.T = endurance  # UAV endurance, one value for the fleet or one per UAV
+        self.T_v = self.endurance_per_uav(endurance)  # Endurance of every UAV
+        self.symmetry = symmetry or formulation == 'tight'  # Add symmetry-breaking constraints for interchangeable UAVs
+        self.elapsed_time = None  # To store optimization elapsed time
+        self.result = None  # SolverResult of the last solve, whichever backend ran it
+        self.export_time = None  # Time spent writing the model in the last export
+        self.export_thread = None  # Background export in progress, see export
+        self.profiler = None  # SolveProfiler attached to every solve once profiling is on, see optimize
+        self.profile = None  # Profile of the last profiled solve
+        self.active = set(self.lst_j)  # Targets whose tasks have to be done, see set_active_targets
+        self.frozen = None  # Part of the mission fixed by freeze
+        self.params = {}  # Gurobi parameters set with set_param, applied when the model is built
+        self.timings = {}  # Seconds per phase
+        start_time = tm.time()
+        self.time = timedict  # Optional time dictionary input, also sets seed to None (see time)
+        if self.time is None:
+            self.setup_data(seed)  # Generate random time data if none provided
+        self.timings['data'] = tm.time() - start_time
+
+    @property
+    def time(self):
+        # Time dictionary of the instance
+        return self._time
+
+    @time.setter
+    def time(self, timedict):
+        # Any time data assigned from outside is not the data generated from seed, config() has to pass it on as it is
+        self._time = timedict
+        self.seed = None  # Seed the time data was generated from, None for given time data
+
+    def __getattr__(self, name):
+        # Only called for attributes that do not exist: the parts of the Gurobi model before it is built
+        if name.startswith('__') or self.__dict__.get('built', True):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self.build()
+        return getattr(self, name)
+
+    def config(self):
+        # ModelConfig of the current instance, including any set_* changes. Generated time data is passed on as
+        # its seed, the worker building the model regenerates it; other time data is passed on as it is.
+        timedict = None if self.seed is not None else self.time
+        return ModelConfig(self.n, self.w, self.T, self.delay, timedict, self.obj, self.builder, self.symmetry,
+                           self.formulation, self.solver, self.seed)
+
+    def set_param(self, name, value):
+        # Set a Gurobi parameter, also before the model is built
+        self.params[name] = value
+        if self.built:
+            self.m.setParam(name, value)
+
+    def build(self):
+        # Build the Gurobi model from the current data, once; returns the model
+        if self.built:
+            return self
+        self.built = True
+        build_start = tm.time()
         self.m = Model('UAVstrike')  # Gurobi model
+        for name, value in self.params.items():
+            self.m.setParam(name, value)
         self.x1 = {}  # Decision variables for task assignments
         self.x2 = {}  # Decision variables for UAVs returning to sink
         self.t1 = {}  # Time variables for tasks at targets
         self.t2 = {}  # Time variables for UAVs
         self.t = None  # Final time variable
-        self.elapsed_time = None  # To store optimization elapsed time
-        self.time = timedict  # Optional time dictionary input
-        if self.time is None:
-            self.time = {}
-            self.setup_data()  # Generate random time data if none provided
-        self.setup_variables()  # Setup decision variables
-        self.setup_constraints()  # Setup constraints
-        self.setup_objective()  # Setup objective function
-
-    def setup_data(self):
-        # Randomly generate time data
-        for i in self.lst_i:
-            for j in self.lst_j:
-                for v in self.lst_v:
-                    for k in self.lst_k:
-                        self.time[i, j, v, k] = rd.randint(1, 30)
+        self.families = {}  # Constraints of every named family, in build order, see family
+        self.family_seconds = {}  # Build time of every family
+        self.snapshot_columns = None  # See columns
+        if self.builder == 'matrix':
+            phases = [('variables', self.setup_variables_matrix),  # Setup decision variables as MVars
+                      ('constraints', self.setup_constraints_matrix),  # Setup constraints as sparse blocks
+                      ('objective', self.setup_objective_matrix)]  # Setup objective function
+        else:
+            phases = [('variables', self.setup_variables),  # Setup decision variables
+                      ('constraints', self.setup_constraints),  # Setup constraints
+                      ('objective', self.setup_objective)]  # Setup objective function
+        for phase, setup in phases:
+            start_time = tm.time()
+            setup()
+            self.timings[phase] = tm.time() - start_time
+        # Completion rows per task, in build order (classification, verification, attack), see set_active_targets
+        self.c_completion = dict(zip([(j, k) for k in [1, 3, 2] for j in self.lst_j], self.families['completion']))
+        if len(self.active) < self.n:
+            self.m.setAttr('RHS', list(self.c_completion.values()), [float(j in self.active) for j, _ in self.c_completion])
+        start_time = tm.time()
+        if self.formulation == 'tight':
+            self.setup_tight()  # Bounds on the times and per-row big-M
+        elif self.frozen is not None:
+            self._apply_freeze()  # The tight formulation applies it with its bounds
+        self.timings['tight'] = tm.time() - start_time
+        start_time = tm.time()
+        self.c_symmetry = []
+        self.uav_groups = []  # Interchangeable UAVs ordered by the symmetry-breaking constraints
+        if self.symmetry:
+            self.setup_symmetry()  # Order interchangeable UAVs
+        self.m.update()
+        self.timings['symmetry'] = tm.time() - start_time
+        self.timings['build'] = tm.time() - build_start
+        return self
+
+    def endurance_per_uav(self, endurance):
+        # Endurance of every UAV, from a single value for the whole fleet or a sequence with one value per UAV
+        if np.ndim(endurance) == 0:
+            return {v: endurance for v in self.lst_v}
+        if len(endurance) != self.w:
+            raise ValueError(f"Expected {self.w} endurance values, got {len(endurance)}")
+        return dict(zip(self.lst_v, endurance))
+
+    @contextmanager
+    def family(self, name):
+        # Record the constraints added in the block as a family, with its build time, and name them name[0], name[1], ...
+        self.m.update()
+        first = self.m.NumConstrs
+        start_time = tm.time()
+        yield
+        self.m.update()
+        self.family_seconds[name] = tm.time() - start_time
+        constrs = self.m.getConstrs()[first:]
+        self.m.setAttr('ConstrName', constrs, [f'{name}[{row}]' for row in range(len(constrs))])
+        self.families[name] = constrs
+
+    def build_report(self):
+        """
+        Size and build time of every constraint family, in build order: a dictionary mapping the family
+        name to its number of rows, number of nonzeros and build seconds.
+        """
+        self.m.update()
+        row_nnz = np.diff(self.m.getA().tocsr().indptr)
+        return {name: {'rows': len(constrs), 'nnz': int(row_nnz[[constr.index for constr in constrs]].sum()),
+                       'seconds': self.family_seconds[name]}
+                for name, constrs in self.families.items()}
+
+    def print_build_report(self):
+        report = self.build_report()
+        print(f"{'family':<16}{'rows':>8}{'nnz':>10}{'seconds':>10}")
+        for name, family in report.items():
+            print(f"{name:<16}{family['rows']:>8}{family['nnz']:>10}{family['seconds']:>10.3f}")
+        print(f"{'total':<16}{sum(f['rows'] for f in report.values()):>8}{sum(f['nnz'] for f in report.values()):>10}"
+              f"{sum(f['seconds'] for f in report.values()):>10.3f}")
+
+    def setup_data(self, seed=None):
+        # Randomly generate integer time data in [1, 30] for every key, from the given seed or one drawn from the
+        # random module (so rd.seed still makes the data reproducible), see f_instances
+        seed = seed if seed is not None else rd.getrandbits(64)
+        self.time = generate_instance(self.n, self.w, seed)
+        self.seed = seed
+
+    def time_array(self, keys):
+        # Times of the given (i, j, v, k) keys as an array; TimeTensor views (f_helper) are indexed in one go
+        if hasattr(self.time, 'values_at'):
+            return self.time.values_at(keys).astype(float)
+        return np.array([self.time[key] for key in keys], dtype=float)
 
     def setup_variables(self):
         # Initialize decision variables
@@ -69,205 +255,757 @@ class UAVStrikeModel:
                 self.t1[j, k] = self.m.addVar(vtype=GRB.CONTINUOUS)
 
         self.t = self.m.addVar(vtype=GRB.CONTINUOUS)
+        self.setup_index()
+
+    def setup_index(self):
+        # Adjacency indexes of the existing x1/x2 keys, so constraints and checks don't probe every (i, j, v, k)
+        self.arcs_in = {(j, v, k): [] for j in self.lst_j for v in self.lst_v for k in self.lst_k}  # Arcs into target j
+        self.arcs_out = {(i, v): [] for i in self.lst_i for v in self.lst_v}  # Arcs out of node i
+        self.arcs_loop = {}  # Attack self-loops (j, j, v, 2)
+        self.arcs_sink = {v: [] for v in self.lst_v}  # Arcs from any node to the sink
+        for (i, j, v, k) in self.x1:
+            if i == j:
+                self.arcs_loop[j, v] = (i, j, v, k)
+            else:
+                self.arcs_in[j, v, k].append((i, j, v, k))
+                self.arcs_out[i, v].append((i, j, v, k))
+        for (i, s, v) in self.x2:
+            self.arcs_sink[v].append((i, s, v))
+
+    def interchangeable_uavs(self):
+        """
+        Groups of UAVs that can be swapped in any solution: they have the same endurance, the same times from
+        their own start node (same start location and speed) and the same times between targets.
+        Returns a list of groups with two or more UAVs, each sorted by UAV number.
+        """
+        groups = {}
+        for v in self.lst_v:
+            signature = (self.T_v[v],
+                         tuple(self.time[a] for a in self.arcs_out[self.n + v, v]),
+                         tuple(self.time[a] for i in self.lst_j for a in self.arcs_out[i, v]),
+                         tuple(self.time[self.arcs_loop[j, v]] for j in self.lst_j))
+            groups.setdefault(signature, []).append(v)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def setup_symmetry(self):
+        """
+        Symmetry-breaking constraints for interchangeable UAVs: within a group, a UAV only leaves its start node
+        for a target if the previous UAV of the group does. Any solution can be renumbered to satisfy them, so the
+        optimum is unchanged. Called again after in-place updates, since new time data or endurances can change the groups.
+        """
+        self.m.remove(self.c_symmetry)
+
+        def used(v):
+            # Arcs from the UAV's start node to a target
+            return quicksum(self.x1[a] for a in self.arcs_out[self.n + v, v])
+
+        self.uav_groups = self.interchangeable_uavs()
+        with self.family('symmetry'):
+            for group in self.uav_groups:
+                for u, v in zip(group, group[1:]):
+                    self.m.addLConstr(used(v), GRB.LESS_EQUAL, used(u))
+        self.c_symmetry = self.families['symmetry']
 
     def setup_objective(self):
         # Objective function to minimize
         if self.obj == 1:
-            self.m.setObjective(quicksum(self.time[i, j, v, k] * self.x1[i, j, v, k] for i in self.lst_i for j in self.lst_j for v in self.lst_v for k in self.lst_k if (i, j, v, k) in self.x1), GRB.MINIMIZE)
+            self.m.setObjective(quicksum(self.time[a] * self.x1[a] for a in self.x1), GRB.MINIMIZE)
         elif self.obj == 2:
             #self.m.setObjective(0.1 * quicksum(self.t1[j, k] for j in self.lst_j for k in self.lst_k) + self.t, GRB.MINIMIZE)
             self.m.setObjective(self.t, GRB.MINIMIZE)
         elif self.obj == 3:
-            self.m.setObjective(quicksum(self.x2[i, self.n + self.w + 1, v] for i in self.lst_i for v in self.lst_v if (i, self.n + self.w + 1, v) in self.x2), GRB.MAXIMIZE)
+            self.m.setObjective(quicksum(self.x2.values()), GRB.MAXIMIZE)
         self.m.update()
 
     def setup_constraints(self):
         # Add constraints
+        sink = self.n + self.w + 1
+        x1, x2 = self.x1, self.x2
+
+        def incoming(j, v, tasks):
+            # Sum of the arcs into target j by UAV v for the given tasks, self-loops excluded
+            return quicksum(x1[a] for k in tasks for a in self.arcs_in[j, v, k])
+
+        def outgoing(i, v):
+            # Sum of the arcs out of target i towards the other targets by UAV v
+            return quicksum(x1[a] for a in self.arcs_out[i, v])
+
         # Mission completion constraints
-        for k in [1, 3]:
+        with self.family('completion'):
+            for k in [1, 3]:
+                for j in self.lst_j:
+                    # Each task must be performed exactly once on each target
+                    self.m.addLConstr(quicksum(incoming(j, v, [k]) for v in self.lst_v), GRB.EQUAL, 1)
             for j in self.lst_j:
-                # Each task must be performed exactly once on each target
-                self.m.addLConstr(quicksum(
-                    self.x1[i, j, v, k] for i in self.lst_i if i != j for v in self.lst_v if (i, j, v, k) in self.x1),
+                self.m.addLConstr(quicksum(incoming(j, v, [2]) + x1[self.arcs_loop[j, v]] for v in self.lst_v),
                                   GRB.EQUAL, 1)
-        for k in [2]:
-            for j in self.lst_j:
-                self.m.addLConstr(
-                    quicksum(self.x1[i, j, v, k] for i in self.lst_i for v in self.lst_v if (i, j, v, k) in self.x1),
-                    GRB.EQUAL, 1)
 
         # UAV assignment constraints
-        for k in [1, 3]:
+        with self.family('assignment'):
+            for k in [1, 3]:
+                for j in self.lst_j:
+                    self.m.addLConstr(quicksum(incoming(j, v, [k]) for v in self.lst_v), GRB.LESS_EQUAL, 1)
             for j in self.lst_j:
-                self.m.addLConstr(quicksum(
-                    self.x1[i, j, v, k] for v in self.lst_v for i in self.lst_i if i != j and (i, j, v, k) in self.x1),
+                self.m.addLConstr(quicksum(incoming(j, v, [2]) + x1[self.arcs_loop[j, v]] for v in self.lst_v),
                                   GRB.LESS_EQUAL, 1)
-        for j in self.lst_j:
-            self.m.addLConstr(
-                quicksum(self.x1[i, j, v, 2] for v in self.lst_v for i in self.lst_i if (i, j, v, 2) in self.x1),
-                GRB.LESS_EQUAL, 1)
 
         # UAV visit constraints
-        for v in self.lst_v:
-            for j in self.lst_j:
-                self.m.addLConstr(quicksum(
-                    self.x1[i, j, v, k] for k in self.lst_k for i in self.lst_i if i != j and (i, j, v, k) in self.x1),
+        with self.family('visit'):
+            for v in self.lst_v:
+                for j in self.lst_j:
+                    self.m.addLConstr(incoming(j, v, self.lst_k), GRB.LESS_EQUAL, 1)
+            for v in self.lst_v:
+                self.m.addLConstr(quicksum(x2[a] for a in self.arcs_sink[v]), GRB.LESS_EQUAL, 1)
+
+            for v in self.lst_v:
+                for j in self.lst_j:
+                    self.m.addLConstr(quicksum(x1[a] for k in self.lst_k for a in self.arcs_in[j, v, k] if a[0] in self.lst_j)
+                                      + x2[j, sink, v], GRB.LESS_EQUAL, 1)
+
+            for v in self.lst_v:
+                self.m.addLConstr(quicksum(incoming(j, v, [2]) + x1[self.arcs_loop[j, v]] for j in self.lst_j),
                                   GRB.LESS_EQUAL, 1)
-        for v in self.lst_v:
-            self.m.addLConstr(quicksum(
-                self.x2[i, self.n + self.w + 1, v] for i in self.lst_i if (i, self.n + self.w + 1, v) in self.x2),
-                              GRB.LESS_EQUAL, 1)
 
-        for v in self.lst_v:
-            for j in self.lst_j:
-                self.m.addLConstr(quicksum(self.x1[i, j, v, k] for i in self.lst_j if i != j for k in self.lst_k if (i, j, v, k) in self.x1 and (j, self.n + self.w + 1, v) in self.x2) + self.x2[j, self.n + self.w + 1, v], GRB.LESS_EQUAL, 1)
+            for v in self.lst_v:
+                for j in self.lst_j:
+                    self.m.addLConstr(incoming(j, v, [2]), GRB.LESS_EQUAL, 1 - incoming(j, v, [3]))
 
-        for v in self.lst_v:
-            self.m.addLConstr(
-                quicksum(self.x1[i, j, v, 2] for j in self.lst_j for i in self.lst_i if (i, j, v, 2) in self.x1),
-                GRB.LESS_EQUAL, 1)
+        # Continuity constraints
+        with self.family('continuity'):
+            for j in self.lst_j:
+                for v in self.lst_v:
+                    self.m.addLConstr(incoming(j, v, [3]), GRB.LESS_EQUAL, outgoing(j, v) + x2[j, sink, v])
+                    self.m.addLConstr(incoming(j, v, [1]), GRB.LESS_EQUAL,
+                                      outgoing(j, v) + x1[self.arcs_loop[j, v]] + x2[j, sink, v])
 
-        for v in self.lst_v:
             for j in self.lst_j:
-                self.m.addLConstr(
-                    quicksum(self.x1[i, j, v, 2] for i in self.lst_i if i != j and (i, j, v, 2) in self.x1),
-                    GRB.LESS_EQUAL,
-                    1 - quicksum(self.x1[i, j, v, 3] for i in self.lst_i if i != j and (i, j, v, 3) in self.x1))
+                for v in self.lst_v:
+                    self.m.addLConstr(outgoing(j, v) + x2[j, sink, v], GRB.LESS_EQUAL,
+                                      1 - incoming(j, v, [2]) - x1[self.arcs_loop[j, v]])
+                    self.m.addLConstr(outgoing(j, v) + x2[j, sink, v], GRB.LESS_EQUAL, incoming(j, v, self.lst_k))
 
-        # Continuity constraints
-        for j in self.lst_j:
             for v in self.lst_v:
-                self.m.addLConstr(
-                    quicksum(self.x1[i, j, v, 3] for i in self.lst_i if i != j and (i, j, v, 3) in self.x1),
-                    GRB.LESS_EQUAL, quicksum(self.x1[j, i, v, k] for k in self.lst_k for i in self.lst_j if
-                                             i != j and (j, i, v, k) in self.x1 and (
-                                             j, self.n + self.w + 1, v) in self.x2) + self.x2[
-                        j, self.n + self.w + 1, v])
-                self.m.addLConstr(
-                    quicksum(self.x1[i, j, v, 1] for i in self.lst_i if i != j and (i, j, v, 1) in self.x1),
-                    GRB.LESS_EQUAL, quicksum(self.x1[j, i, v, k] for k in self.lst_k for i in self.lst_j if
-                                             i != j and (j, i, v, k) in self.x1 and (j, j, v, 2) in self.x1 and (
-                                             j, self.n + self.w + 1, v) in self.x2) + self.x1[j, j, v, 2] + self.x2[
-                        j, self.n + self.w + 1, v])
+                self.m.addLConstr(outgoing(self.n + v, v) + x2[self.n + v, sink, v], GRB.EQUAL, 1)
 
-        for j in self.lst_j:
-            for v in self.lst_v:
-                self.m.addLConstr(quicksum(self.x1[j, i, v, k] for i in self.lst_j if i != j for k in self.lst_k if
-                                           (j, i, v, k) in self.x1 and (j, self.n + self.w + 1, v) in self.x2) +
-                                  self.x2[j, self.n + self.w + 1, v], GRB.LESS_EQUAL,
-                                  1 - quicksum(self.x1[i, j, v, 2] for i in self.lst_i if (i, j, v, 2) in self.x1))
-                self.m.addLConstr(quicksum(self.x1[j, i, v, k] for i in self.lst_j if i != j for k in self.lst_k if
-                                           (j, i, v, k) in self.x1 and (j, self.n + self.w + 1, v) in self.x2) +
-                                  self.x2[j, self.n + self.w + 1, v], GRB.LESS_EQUAL, quicksum(
-                    self.x1[i, j, v, k] for i in self.lst_i if i != j for k in self.lst_k if (i, j, v, k) in self.x1))
+            for i in self.lst_j:
+                for v in self.lst_v:
+                    self.m.addLConstr(x1[self.arcs_loop[i, v]], GRB.LESS_EQUAL, incoming(i, v, [1]))
 
-        for v in self.lst_v:
-            self.m.addLConstr(quicksum(self.x1[self.n + v, j, v, k] for j in self.lst_j for k in self.lst_k if
-                                       (self.n + v, j, v, k) in self.x1 and (
-                                       self.n + v, self.n + self.w + 1, v) in self.x2) + self.x2[
-                                  self.n + v, self.n + self.w + 1, v], GRB.EQUAL, 1)
+        # Timing constraints
+        M = self.w * max(self.T_v.values())
+        self.c_timing = []  # (constraint, arc, predecessor arcs, sign, number of big-M terms) for in-place updates
 
-        for i in self.lst_j:
-            for v in self.lst_v:
-                self.m.addLConstr(self.x1[i, i, v, 2], GRB.LESS_EQUAL,
-                                  quicksum(self.x1[j, i, v, 1] for j in self.lst_i if (j, i, v, 1) in self.x1))
+        def timing(after, before, arc, preds, n_big):
+            # after == before + travel time whenever the arc and (if any) one of the predecessor arcs are used
+            relax = (n_big - x1[arc] - quicksum(x1[a] for a in preds)) * M
+            self.c_timing.append((self.m.addLConstr(after <= before + self.time[arc] + relax), arc, preds, 1, n_big))
+            self.c_timing.append((self.m.addLConstr(after >= before + self.time[arc] - relax), arc, preds, -1, n_big))
 
-        # Timing constraints
-        for i in self.lst_j:
-            for j in self.lst_j:
-                if i != j:
-                    for v in self.lst_v:
-                        for k in [1, 3]:
-                            self.m.addLConstr(self.t1[j, k] <= self.t1[i, 1] + self.time[i, j, v, k] + (
-                                        2 - self.x1[i, j, v, k] - quicksum(
-                                    self.x1[l, i, v, 1] for l in self.lst_i if l != i if
-                                    (l, i, v, 1) in self.x1 and (i, j, v, k) in self.x1)) * self.w * self.T)
-                            self.m.addLConstr(self.t1[j, k] >= self.t1[i, 1] + self.time[i, j, v, k] - (
-                                        2 - self.x1[i, j, v, k] - quicksum(
-                                    self.x1[l, i, v, 1] for l in self.lst_i if l != i if
-                                    (l, i, v, 1) in self.x1 and (i, j, v, k) in self.x1)) * self.w * self.T)
-                            self.m.addLConstr(self.t1[j, k] <= self.t1[i, 3] + self.time[i, j, v, k] + (
-                                        2 - self.x1[i, j, v, k] - quicksum(
-                                    self.x1[l, i, v, 3] for l in self.lst_i if l != i if
-                                    (l, i, v, 3) in self.x1 and (i, j, v, k) in self.x1)) * self.w * self.T)
-                            self.m.addLConstr(self.t1[j, k] >= self.t1[i, 3] + self.time[i, j, v, k] - (
-                                        2 - self.x1[i, j, v, k] - quicksum(
-                                    self.x1[l, i, v, 3] for l in self.lst_i if l != i if
-                                    (l, i, v, 3) in self.x1 and (i, j, v, k) in self.x1)) * self.w * self.T)
+        with self.family('timing_targets'):
+            for i in self.lst_j:
+                for j in self.lst_j:
+                    if i != j:
+                        for v in self.lst_v:
+                            for k in [1, 3]:
+                                timing(self.t1[j, k], self.t1[i, 1], (i, j, v, k), self.arcs_in[i, v, 1], 2)
+                                timing(self.t1[j, k], self.t1[i, 3], (i, j, v, k), self.arcs_in[i, v, 3], 2)
 
         # More timing constraints
-        for i in self.lst_j:
-            for j in self.lst_j:
-                if i != j:
-                    for v in self.lst_v:
-                        self.m.addLConstr(self.t1[j, 2] <= self.t1[i, 1] + self.time[i, j, v, 2] + (
-                                    2 - self.x1[i, j, v, 2] - quicksum(
-                                self.x1[l, i, v, 1] for l in self.lst_i if l != i if
-                                (l, i, v, 1) in self.x1 and (i, j, v, 2) in self.x1)) * self.w * self.T)
-                        self.m.addLConstr(self.t1[j, 2] >= self.t1[i, 1] + self.time[i, j, v, 2] - (
-                                    2 - self.x1[i, j, v, 2] - quicksum(
-                                self.x1[l, i, v, 1] for l in self.lst_i if l != i if
-                                (l, i, v, 1) in self.x1 and (i, j, v, 2) in self.x1)) * self.w * self.T)
-                        self.m.addLConstr(self.t1[j, 2] <= self.t1[i, 3] + self.time[i, j, v, 2] + (
-                                    2 - self.x1[i, j, v, 2] - quicksum(
-                                self.x1[l, i, v, 3] for l in self.lst_i if l != i if
-                                (l, i, v, 3) in self.x1 and (i, j, v, 2) in self.x1)) * self.w * self.T)
-                        self.m.addLConstr(self.t1[j, 2] >= self.t1[i, 3] + self.time[i, j, v, 2] - (
-                                    2 - self.x1[i, j, v, 2] - quicksum(
-                                self.x1[l, i, v, 3] for l in self.lst_i if l != i if
-                                (l, i, v, 3) in self.x1 and (i, j, v, 2) in self.x1)) * self.w * self.T)
+        with self.family('timing_attack'):
+            for i in self.lst_j:
+                for j in self.lst_j:
+                    if i != j:
+                        for v in self.lst_v:
+                            timing(self.t1[j, 2], self.t1[i, 1], (i, j, v, 2), self.arcs_in[i, v, 1], 2)
+                            timing(self.t1[j, 2], self.t1[i, 3], (i, j, v, 2), self.arcs_in[i, v, 3], 2)
 
         # More timing constraints
-        for j in self.lst_j:
+        with self.family('timing_start'):
+            for j in self.lst_j:
+                for v in self.lst_v:
+                    for k in self.lst_k:
+                        timing(self.t1[j, k], self.t2[v], (self.n + v, j, v, k), [], 1)
+
+        # Sequence of tasks
+        with self.family('sequence'):
+            self.c_sequence = {}
+            for j in self.lst_j:
+                self.c_sequence[j, 1] = self.m.addConstr(self.t1[j, 1] + self.delay <= self.t1[j, 2])
+                self.c_sequence[j, 2] = self.m.addConstr(self.t1[j, 2] + self.delay <= self.t1[j, 3])
+
+        # Vehicle's path cannot be longer than endurance
+        with self.family('endurance'):
+            self.c_endurance = {}
             for v in self.lst_v:
+                self.c_endurance[v] = self.m.addLConstr(
+                    quicksum(self.time[a] * x1[a] for i in self.lst_i for a in self.arcs_out[i, v]), GRB.LESS_EQUAL, self.T_v[v])
+
+        # Total time is the longest time
+        with self.family('makespan'):
+            for j in self.lst_j:
                 for k in self.lst_k:
-                    self.m.addConstr(self.t1[j, k] <= self.t2[v] + self.time[self.n + v, j, v, k] + (
-                                1 - self.x1[self.n + v, j, v, k]) * self.w * self.T)
-                    self.m.addConstr(self.t1[j, k] >= self.t2[v] + self.time[self.n + v, j, v, k] - (
-                                1 - self.x1[self.n + v, j, v, k]) * self.w * self.T)
+                    self.m.addLConstr(self.t >= self.t1[j, k])
+
+        self.m.update()
+
+    def setup_variables_matrix(self):
+        # Initialize decision variables as MVars, using the same column order as setup_variables
+        n, w = self.n, self.w
+        J, V = np.arange(n), np.arange(w)
+
+        # x1 exists between targets (every UAV and task), as attack self-loop on a target,
+        # and from a UAV start node to every target for that UAV only
+        exists1 = np.zeros((n + w, n, w, 3), dtype=bool)
+        exists1[:n] = True
+        exists1[J, J] = False
+        exists1[J, J, :, 1] = True
+        exists1[n + V, :, V, :] = True
+        exists2 = np.zeros((n + w, w), dtype=bool)
+        exists2[:n] = True
+        exists2[n + V, V] = True
+        n_x1, n_x2 = int(exists1.sum()), int(exists2.sum())
+
+        # Column index of every variable in the model, -1 where the variable does not exist
+        self.col_x1 = np.full(exists1.shape, -1)
+        self.col_x1[exists1] = np.arange(n_x1)
+        self.col_x2 = np.full(exists2.shape, -1)
+        self.col_x2[exists2] = n_x1 + np.arange(n_x2)
+        self.col_t2 = n_x1 + n_x2 + V
+        self.col_t1 = n_x1 + n_x2 + w + np.arange(3 * n).reshape(n, 3)
+        self.col_t = n_x1 + n_x2 + w + 3 * n
+        self.n_cols = self.col_t + 1
+
+        self.X1 = self.m.addMVar(n_x1, vtype=GRB.BINARY)
+        self.X2 = self.m.addMVar(n_x2, vtype=GRB.BINARY)
+        self.T2 = self.m.addMVar(w, vtype=GRB.CONTINUOUS)
+        self.T1 = self.m.addMVar(3 * n, vtype=GRB.CONTINUOUS)
+        self.t = self.m.addVar(vtype=GRB.CONTINUOUS)
+        self.m.update()
+        self.x_all = MVar.fromlist(self.m.getVars())
+
+        # Keep the dictionary interface of the loop builder for everything downstream
+        keys1 = [tuple(key) for key in (np.argwhere(exists1) + 1).tolist()]
+        keys2 = [(i, n + w + 1, v) for i, v in (np.argwhere(exists2) + 1).tolist()]
+        self.x1 = dict(zip(keys1, self.X1.tolist()))
+        self.x2 = dict(zip(keys2, self.X2.tolist()))
+        self.t2 = dict(zip(self.lst_v, self.T2.tolist()))
+        self.t1 = dict(zip([(j, k) for j in self.lst_j for k in self.lst_k], self.T1.tolist()))
+        self.time_x1 = self.time_array(keys1)  # Time of every x1 column
+        self.setup_index()
+
+    def _add_block(self, terms, sense, rhs):
+        # Assemble one constraint family from broadcastable (row, column, coefficient) arrays,
+        # skipping absent columns (-1), and add it to the model as a single sparse block
+        rows, cols, coefs = [], [], []
+        for row, col, coef in terms:
+            row, col, coef = np.broadcast_arrays(row, col, coef)
+            mask = col >= 0
+            rows.append(row[mask])
+            cols.append(col[mask])
+            coefs.append(coef[mask])
+        rhs = np.asarray(rhs, dtype=float).ravel()
+        if len(rhs) == 0:
+            return []
+        A = sp.csr_matrix((np.concatenate(coefs).astype(float), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(len(rhs), self.n_cols))
+        if not isinstance(sense, str):
+            sense = np.asarray(sense).ravel()
+        return self.m.addMConstr(A, self.x_all, sense, rhs).tolist()
+
+    def _timing_block(self, tasks, M):
+        # Big-M timing rows between targets i -> j for the given destination tasks, ordered as
+        # (i, j, v, k, predecessor task, <= / >=) like the loops in setup_constraints
+        n, w = self.n, self.w
+        X1 = self.col_x1
+        K, P = np.array(tasks) - 1, np.array([0, 2])
+        S = np.array([1.0, -1.0])  # +M for the <= row, -M for the >= row
+        pi, pj = np.nonzero(~np.eye(n, dtype=bool))
+        rows = np.arange(len(pi) * w * len(K) * 4).reshape(len(pi), w, len(K), 2, 2)
+        arcs = X1[pi, pj][:, :, K]  # (pair, v, k)
+        preds = X1[:, pi][..., P].transpose(1, 2, 3, 0)  # (pair, v, predecessor task, l)
+        terms = [
+            (rows, self.col_t1[pj][:, K][:, None, :, None, None], 1.0),
+            (rows, self.col_t1[pi][:, P][:, None, None, :, None], -1.0),
+            (rows, arcs[:, :, :, None, None], S * M),
+            (rows[..., None], preds[:, :, None, :, None, :], S[:, None] * M),
+        ]
+        rhs = self.time_x1[arcs][:, :, :, None, None] + 2 * M * S
+        sense = np.broadcast_to(np.array([GRB.LESS_EQUAL, GRB.GREATER_EQUAL]), rows.shape)
+        constrs = iter(self._add_block(terms, sense, np.broadcast_to(rhs, rows.shape)))
+        for i, j in zip(pi + 1, pj + 1):
+            for v in self.lst_v:
+                for k in tasks:
+                    for p in [1, 3]:
+                        for sign in [1, -1]:
+                            self.c_timing.append((next(constrs), (i, j, v, k), self.arcs_in[i, v, p], sign, 2))
+
+    def setup_constraints_matrix(self):
+        # Add the constraints of setup_constraints as sparse blocks, in the same row order
+        n, w = self.n, self.w
+        J, V = np.arange(n), np.arange(w)
+        M = self.w * max(self.T_v.values())
+        X1, X2 = self.col_x1, self.col_x2
+        X1_ne = X1.copy()  # x1 without the attack self-loops (i != j)
+        X1_ne[J, J] = -1
+        outgoing = X1_ne[:n].transpose(0, 2, 1, 3)  # (j, v, i, k): arcs from target j to other targets
+
+        # Mission completion constraints
+        with self.family('completion'):
+            rows = np.arange(2 * n).reshape(2, n, 1, 1)
+            self._add_block([(rows, X1[..., [0, 2]].transpose(3, 1, 0, 2), 1.0)], GRB.EQUAL, np.ones(2 * n))
+            rows = np.arange(n).reshape(n, 1, 1)
+            self._add_block([(rows, X1[..., 1].transpose(1, 0, 2), 1.0)], GRB.EQUAL, np.ones(n))
+
+        # UAV assignment constraints
+        with self.family('assignment'):
+            rows = np.arange(2 * n).reshape(2, n, 1, 1)
+            self._add_block([(rows, X1[..., [0, 2]].transpose(3, 1, 0, 2), 1.0)], GRB.LESS_EQUAL, np.ones(2 * n))
+            rows = np.arange(n).reshape(n, 1, 1)
+            self._add_block([(rows, X1[..., 1].transpose(1, 0, 2), 1.0)], GRB.LESS_EQUAL, np.ones(n))
+
+        # UAV visit constraints
+        with self.family('visit'):
+            rows = np.arange(w * n).reshape(w, n)
+            self._add_block([(rows[..., None, None], X1_ne.transpose(2, 1, 3, 0), 1.0)], GRB.LESS_EQUAL, np.ones(w * n))
+            self._add_block([(V[:, None], X2.T, 1.0)], GRB.LESS_EQUAL, np.ones(w))
+            self._add_block([(rows[..., None, None], X1_ne[:n].transpose(2, 1, 0, 3), 1.0),
+                             (rows, X2[:n].T, 1.0)], GRB.LESS_EQUAL, np.ones(w * n))
+            self._add_block([(V[:, None, None], X1[..., 1].transpose(2, 0, 1), 1.0)], GRB.LESS_EQUAL, np.ones(w))
+            self._add_block([(rows[..., None, None], X1_ne[..., 1:].transpose(2, 1, 0, 3), 1.0)],
+                            GRB.LESS_EQUAL, np.ones(w * n))
+
+        # Continuity constraints
+        with self.family('continuity'):
+            rows = np.arange(n * w * 2).reshape(n, w, 2)
+            self._add_block([(rows[:, :, 0, None], X1_ne[..., 2].transpose(1, 2, 0), 1.0),
+                             (rows[:, :, 0, None, None], outgoing, -1.0),
+                             (rows[:, :, 0], X2[:n], -1.0),
+                             (rows[:, :, 1, None], X1_ne[..., 0].transpose(1, 2, 0), 1.0),
+                             (rows[:, :, 1, None, None], outgoing, -1.0),
+                             (rows[:, :, 1], X1[J, J, :, 1], -1.0),
+                             (rows[:, :, 1], X2[:n], -1.0)], GRB.LESS_EQUAL, np.zeros(n * w * 2))
+            self._add_block([(rows[:, :, 0, None, None], outgoing, 1.0),
+                             (rows[:, :, 0], X2[:n], 1.0),
+                             (rows[:, :, 0, None], X1[..., 1].transpose(1, 2, 0), 1.0),
+                             (rows[:, :, 1, None, None], outgoing, 1.0),
+                             (rows[:, :, 1], X2[:n], 1.0),
+                             (rows[:, :, 1, None, None], X1_ne.transpose(1, 2, 0, 3), -1.0)],
+                            GRB.LESS_EQUAL, np.tile([1.0, 0.0], n * w))
+            self._add_block([(V[:, None, None], X1[n + V, :, V, :], 1.0),
+                             (V, X2[n + V, V], 1.0)], GRB.EQUAL, np.ones(w))
+            rows = np.arange(n * w).reshape(n, w)
+            self._add_block([(rows, X1[J, J, :, 1], 1.0),
+                             (rows[..., None], X1[..., 0].transpose(1, 2, 0), -1.0)], GRB.LESS_EQUAL, np.zeros(n * w))
+
+        # Timing constraints
+        self.c_timing = []
+        with self.family('timing_targets'):
+            self._timing_block([1, 3], M)
+        with self.family('timing_attack'):
+            self._timing_block([2], M)
+        with self.family('timing_start'):
+            S = np.array([1.0, -1.0])
+            rows = np.arange(n * w * 3 * 2).reshape(n, w, 3, 2)
+            starts = X1[n + V, :, V, :].transpose(1, 0, 2)  # (j, v, k): arcs from the UAV's own start node
+            sense = np.broadcast_to(np.array([GRB.LESS_EQUAL, GRB.GREATER_EQUAL]), rows.shape)
+            constrs = iter(self._add_block([(rows, self.col_t1[:, None, :, None], 1.0),
+                                            (rows, self.col_t2[None, :, None, None], -1.0),
+                                            (rows, starts[..., None], S * M)],
+                                           sense, self.time_x1[starts][..., None] + M * S))
+            for j in self.lst_j:
+                for v in self.lst_v:
+                    for k in self.lst_k:
+                        for sign in [1, -1]:
+                            self.c_timing.append((next(constrs), (self.n + v, j, v, k), [], sign, 1))
 
         # Sequence of tasks
-        for j in self.lst_j:
-            self.m.addConstr(self.t1[j, 1] + self.delay <= self.t1[j, 2])
-            self.m.addConstr(self.t1[j, 2] + self.delay <= self.t1[j, 3])
+        with self.family('sequence'):
+            rows = np.arange(2 * n).reshape(n, 2)
+            constrs = self._add_block([(rows, self.col_t1[:, :2], 1.0),
+                                       (rows, self.col_t1[:, 1:], -1.0)], GRB.LESS_EQUAL, np.full(2 * n, -self.delay))
+            self.c_sequence = dict(zip([(j, k) for j in self.lst_j for k in [1, 2]], constrs))
 
         # Vehicle's path cannot be longer than endurance
-        for v in self.lst_v:
-            self.m.addLConstr(quicksum(
-                self.time[i, j, v, k] * self.x1[i, j, v, k] for k in self.lst_k for i in self.lst_i for j in self.lst_j
-                if j != i and (i, j, v, k) in self.x1), GRB.LESS_EQUAL, self.T)
+        with self.family('endurance'):
+            cols = X1_ne.transpose(2, 0, 1, 3)
+            constrs = self._add_block([(V[:, None, None, None], cols, np.where(cols >= 0, self.time_x1[cols], 0.0))],
+                                      GRB.LESS_EQUAL, np.array([self.T_v[v] for v in self.lst_v]))
+            self.c_endurance = dict(zip(self.lst_v, constrs))
 
         # Total time is the longest time
+        with self.family('makespan'):
+            rows = np.arange(3 * n).reshape(n, 3)
+            self._add_block([(rows, self.col_t, 1.0),
+                             (rows, self.col_t1, -1.0)], GRB.GREATER_EQUAL, np.zeros(3 * n))
+
+        self.m.update()
+
+    def setup_objective_matrix(self):
+        # Objective function to minimize, as matrix expressions over the MVars
+        if self.obj == 1:
+            self.m.setObjective(self.time_x1 @ self.X1, GRB.MINIMIZE)
+        elif self.obj == 2:
+            self.m.setObjective(self.t, GRB.MINIMIZE)
+        elif self.obj == 3:
+            self.m.setObjective(self.X2.sum(), GRB.MAXIMIZE)
+        self.m.update()
+
+    def set_endurance(self, endurance):
+        # Change the endurance (one value or one per UAV) in place: the endurance rows and the big-M (w * T) of the timing rows
+        self.T = endurance
+        self.T_v = self.endurance_per_uav(endurance)
+        if not self.built:
+            return
+        self.m.setAttr('RHS', list(self.c_endurance.values()), [self.T_v[v] for v in self.lst_v])
+        self._update_timing(coefficients=True)
+        if self.symmetry:
+            self.setup_symmetry()
+        self.m.update()
+
+    def set_delay(self, delay):
+        # Change the delay between consecutive tasks on a target in place
+        self.delay = delay
+        if not self.built:
+            return
+        self.m.setAttr('RHS', list(self.c_sequence.values()), [-self.delay] * len(self.c_sequence))
+        if self.formulation == 'tight':
+            self._update_timing(coefficients=True)  # The earliest times, and so the big-M, depend on the delay
+        self.m.update()
+
+    def set_time_matrix(self, timedict):
+        # Change the time data in place: endurance coefficients, timing right-hand sides and the objective
+        self.time = timedict
+        if not self.built:
+            return
+        if self.builder == 'matrix':
+            self.time_x1 = self.time_array(self.x1)
+        for v in self.lst_v:
+            for i in self.lst_i:
+                for a in self.arcs_out[i, v]:
+                    self.m.chgCoeff(self.c_endurance[v], self.x1[a], self.time[a])
+        if self.obj == 1:
+            self.m.setAttr('Obj', list(self.x1.values()), [self.time[a] for a in self.x1])
+        self._update_timing(coefficients=False)
+        if self.symmetry:
+            self.setup_symmetry()
+        self.m.update()
+
+    def _update_timing(self, coefficients):
+        # Recompute the right-hand sides of the timing rows, and their big-M coefficients if requested.
+        # The tight formulation's big-M depends on the time data, delay and endurance, so it always updates both.
+        if self.formulation == 'tight':
+            self._set_time_bounds()
+            big_m = self.tight_big_m()
+            coefficients = True
+        else:
+            big_m = [self.w * max(self.T_v.values())] * len(self.c_timing)
+        self.m.setAttr('RHS', [constr for constr, _, _, _, _ in self.c_timing],
+                       [self.time[arc] + sign * n_big * M for (_, arc, _, sign, n_big), M in zip(self.c_timing, big_m)])
+        if coefficients:
+            for (constr, arc, preds, sign, n_big), M in zip(self.c_timing, big_m):
+                self.m.chgCoeff(constr, self.x1[arc], sign * M)
+                for a in preds:
+                    self.m.chgCoeff(constr, self.x1[a], sign * M)
+
+    def earliest_times(self):
+        """
+        Lower bounds on the task times: a target is classified at the earliest after the shortest arc into it,
+        attacked at least delay later, and verified at least delay after the attack and after the shortest
+        verification arc into it (all times start at 0). Targets that are switched off get 0.
+        """
+        earliest = {}
         for j in self.lst_j:
-            for k in self.lst_k:
-                self.m.addLConstr(self.t >= self.t1[j, k])
+            if j not in self.active:
+                earliest.update({(j, k): 0 for k in self.lst_k})  # Switched off, its times are free
+                continue
+            arrival = {k: min(self.time[a] for v in self.lst_v for a in self.arcs_in[j, v, k]) for k in [1, 3]}
+            earliest[j, 1] = arrival[1]
+            earliest[j, 2] = earliest[j, 1] + self.delay
+            earliest[j, 3] = max(earliest[j, 2] + self.delay, arrival[3])
+        return earliest
+
+    def setup_tight(self):
+        """
+        Tight formulation: bound every time variable to [earliest time, horizon] with the horizon w * T that
+        the standard formulation uses as big-M, bound the makespan t from below by the latest earliest
+        verification, and replace the common big-M of the timing rows by the smallest value for which each
+        row is redundant within these bounds (see tight_big_m). Interchangeable UAVs are ordered as well.
+        """
+        self._update_timing(coefficients=True)
+        self.m.update()
+
+    def _set_time_bounds(self):
+        # Bounds of the tight formulation, refreshed whenever time data, delay or endurance change
+        earliest = self.earliest_times()
+        horizon = self.w * max(self.T_v.values())
+        times = list(self.t1.values()) + list(self.t2.values()) + [self.t]
+        self.m.setAttr('UB', times, [horizon] * len(times))
+        self.m.setAttr('LB', [self.t1[key] for key in earliest], list(earliest.values()))
+        self.t.LB = max(earliest.values())
+        if self.frozen is not None:
+            self._apply_freeze()  # The fixed part of the mission overrides these bounds
+
+    def tight_big_m(self):
+        # Big-M of every timing row: with after in [L_after, H] and before in [L_before, H], the row
+        # after - before - time <= M needs M = H - L_before - time, and the row >= -M needs M = H - L_after + time.
+        # Neither is larger than the standard big-M H = w * T.
+        earliest = self.earliest_times()
+        horizon = self.w * max(self.T_v.values())
+        big_m = []
+        for _, (i, j, v, k), preds, sign, _ in self.c_timing:
+            before = earliest[i, preds[0][3]] if preds else 0  # Rows without predecessors start from t2
+            if sign == 1:
+                big_m.append(min(horizon, max(0, horizon - before - self.time[i, j, v, k])))
+            else:
+                big_m.append(min(horizon, max(0, horizon - earliest[j, k] + self.time[i, j, v, k])))
+        return big_m
 
+    def set_active_targets(self, targets):
+        """
+        Only the given targets have to be classified, attacked and verified. The others are switched off in place by
+        setting the right-hand sides of their completion rows to 0, which keeps every arc into and out of them unused.
+        A model built with spare targets can so take on targets that appear during the mission, see replan.
+        """
+        self.active = set(targets)
+        if not self.built:
+            return
+        self.m.setAttr('RHS', list(self.c_completion.values()), [float(j in self.active) for j, _ in self.c_completion])
+        if self.formulation == 'tight':
+            self._update_timing(coefficients=True)  # Switched off targets have no earliest times
         self.m.update()
 
-    def optimize(self):
-        # Optimize the model
+    def freeze(self, elapsed, solution=None):
+        """
+        Fix the part of a solution (default: the current one) that has happened by mission time `elapsed`. Every
+        arc a UAV has set out on stays used: the arc from its start node once t2 <= elapsed, and, since UAVs fly on
+        as soon as a task is done, the arc after every task completed by then, including attack self-loops and
+        flights to the sink. The times of the tasks on these arcs and the start times of these UAVs are fixed, so a
+        UAV in flight continues from the end of its frozen route. UAVs that have not left yet (or were not used) start
+        at elapsed at the earliest, and all tasks that are not frozen take place after it. unfreeze releases it all.
+        Returns the number of frozen arcs.
+        """
+        if solution is None:
+            solution = self.solution()
+        x1 = [key for key, value in solution['x1'].items() if value > 0.5]
+        entered = {(j, v): k for i, j, v, k in x1 if i != j}  # Task every UAV did at every target it visited
+
+        def departure(i, v):
+            # Time a UAV leaves node i: its start time at its start node, the end of its task at a target
+            return solution['t2'][v] if i > self.n else solution['t1'][i, entered[i, v]]
+
+        frozen = {'elapsed': elapsed, 'x1': [], 'x2': [], 't1': {}, 't2': {}}
+        for i, j, v, k in x1:
+            if (solution['t1'][j, k] if i == j else departure(i, v)) <= elapsed:
+                frozen['x1'].append((i, j, v, k))
+                frozen['t1'][j, k] = solution['t1'][j, k]
+                frozen['t2'][v] = solution['t2'][v]
+        for i, sink, v in [key for key, value in solution['x2'].items() if value > 0.5]:
+            if i <= self.n and departure(i, v) <= elapsed:  # UAVs flying to the sink from their start node were not used
+                frozen['x2'].append((i, sink, v))
+        self.frozen = frozen
+        if self.built:
+            self._apply_freeze()
+            self.m.update()
+        return len(frozen['x1']) + len(frozen['x2'])
+
+    def _apply_freeze(self):
+        # Bounds of the frozen part of the mission, see freeze
+        frozen, elapsed = self.frozen, self.frozen['elapsed']
+        arcs = [self.x1[key] for key in frozen['x1']] + [self.x2[key] for key in frozen['x2']]
+        self.m.setAttr('LB', arcs, [1.0] * len(arcs))
+        for times, variables in [(frozen['t1'], self.t1), (frozen['t2'], self.t2)]:
+            for key, variable in variables.items():
+                if key in times:
+                    variable.LB = variable.UB = times[key]
+                elif variables is self.t2 or key[0] in self.active:
+                    variable.LB = max(variable.LB, elapsed)
+
+    def unfreeze(self):
+        # Release the part of the mission fixed by freeze
+        if self.frozen is None or not self.built:
+            self.frozen = None
+            return
+        arcs = [self.x1[key] for key in self.frozen['x1']] + [self.x2[key] for key in self.frozen['x2']]
+        self.m.setAttr('LB', arcs, [0.0] * len(arcs))
+        times = list(self.t1.values()) + list(self.t2.values())
+        self.m.setAttr('LB', times, [0.0] * len(times))
+        self.m.setAttr('UB', times, [GRB.INFINITY] * len(times))
+        self.frozen = None
+        if self.formulation == 'tight':
+            self._set_time_bounds()
+        self.m.update()
+
+    def replan(self, elapsed, targets=None, timedict=None, solution=None):
+        """
+        Rolling-horizon re-optimization when targets appear during the mission, without rebuilding the model.
+        The model needs a slot for every target that can appear: build it with all of them and switch the unknown
+        ones off with set_active_targets. At mission time `elapsed` the part of the current plan (or `solution`) that
+        has happened is frozen (see freeze), the new targets are switched on (targets: all active targets) after
+        loading their time data (timedict, the full time dictionary, if the slots only held placeholders), and the
+        model is solved again with the previous plan as variable hints.
+        """
+        if solution is None:
+            solution = self.solution()
+        if timedict is not None:
+            self.set_time_matrix(timedict)
+        self.freeze(elapsed, solution)
+        if targets is not None:
+            self.set_active_targets(targets)
+        self.set_start(solution, hints=True)
+        self.optimize()
+
+    def optimize(self, export=None, profile=False, heuristic=False):
+        """
+        Optimize the model; pass a format (e.g. 'lp' or 'mps.gz') as export to also write the model, see export.
+        With profile (True or a SolveProfiler) this and all later solves of the model run with the profiler
+        callback and the progress of the solve is stored in self.profile, see f_profile.
+        With heuristic the greedy plan (see greedy_solution) is loaded as MIP start, so the search starts with an incumbent.
+        The outcome of the solve, with either solver, is stored in self.result (see f_solver.SolverResult).
+        """
+        self.build()
+        if heuristic:
+            self.set_start(self.greedy_solution())
+        if profile:
+            self.profiler = profile if isinstance(profile, SolveProfiler) else SolveProfiler()
         start_time = tm.time()  # Start timer
-        self.m.optimize()  # Run optimization
+        if self.solver == 'highs':
+            if self.profiler is not None:
+                raise ValueError("Profiling needs Gurobi callbacks, it is not available with solver='highs'")
+            self.result = solve_highs(self.m)  # Same constraint matrix, solved by HiGHS
+        elif self.profiler is not None:
+            self.profiler.reset()
+            self.m.optimize(self.profiler)  # Run optimization, recording incumbent and bound
+            self.profile = self.profiler.result(self.m)
+            self.result = gurobi_result(self.m)
+        else:
+            self.m.optimize()  # Run optimization
+            self.result = gurobi_result(self.m)
         end_time = tm.time()  # End timer
         self.elapsed_time = round(end_time - start_time, 2)  # Calculate elapsed time
-        self.m.write('test.lp')  # Write model to file
-
-    def save(self, filename):
-        # Save results
-        dict_dv = {'x1': {}, 'x2': {}, 't1': {}, 't2': {}, 'Model': {}}  # Initialize dictionary
-        for x1, value1 in self.x1.items():
-            dict_dv['x1'][x1] = value1.X  # Save x1 variables
-        for x2, value2 in self.x2.items():
-            dict_dv['x2'][x2] = value2.X  # Save x2 variables
-        for t1, value3 in self.t1.items():
-            dict_dv['t1'][t1] = value3.X  # Save t1 variables
-        for t2, value4 in self.t2.items():
-                dict_dv['t2'][t2] = value4.X  # Save t2 variables
-        dict_dv['Model'] = {'n': self.n, 'w': self.w, 'T': self.T, 'delay': self.delay, 'finaltime': self.t.X, 'time': self.time}  # Save model parameters
-        print('finaltime', self.t.X)  # Print final time
-        filename = f'Results/{filename}'
-        with open(filename, 'wb') as f:
-            pickle.dump(dict_dv, f)  # Save to file
+        self.timings['solve'] = end_time - start_time
+        if export is not None:
+            self.export(fmt=export)
+
+    def save_profile(self, filename=None, directory='Results/profiles'):
+        # Save the profile of the last profiled solve as directory/filename.pkl (default instance_name()), returns the path
+        return save_profile(self.profile, f'{filename or self.instance_name()}.pkl', directory)
+
+    def greedy_solution(self, restarts=20, seed=0):
+        # Feasible plan for the current instance in milliseconds, without solving the MILP (see f_heuristic), or None
+        return greedy_solution(self.n, self.w, self.T, self.delay, self.time, self.obj, restarts, seed, targets=self.active)
+
+    def instance_name(self):
+        # File name identifying the instance: sizes, endurance, delay, objective and a hash of the time data
+        digest = hashlib.sha1(repr(sorted(self.time.items())).encode()).hexdigest()[:8]
+        endurance = '-'.join(str(self.T_v[v]) for v in self.lst_v) if np.ndim(self.T) else self.T
+        return f'{self.n}_{self.w}_T{endurance}_d{self.delay}_obj{self.obj}_{digest}'
+
+    def export(self, filename=None, fmt='mps.gz', directory='Results/models', background=False):
+        """
+        Write the model to directory/filename.fmt, where fmt is any Gurobi model format ('lp', 'mps', 'lp.gz',
+        'mps.bz2', ...) and filename defaults to instance_name(). With background the model is copied and the
+        copy is written by a separate thread, so the caller can continue with the next solve; wait_export()
+        waits for it. The writing time is stored in export_time, separately from elapsed_time.
+        Returns the path of the file.
+        """
+        self.wait_export()  # One export at a time per model
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{filename or self.instance_name()}.{fmt}')
+        if not background:
+            start_time = tm.time()
+            self.m.write(path)
+            self.export_time = round(tm.time() - start_time, 2)
+            return path
+
+        model = self.m.copy()  # The thread must not use the model while it is changed or solved
+
+        def write():
+            start_time = tm.time()
+            model.write(path)
+            self.export_time = round(tm.time() - start_time, 2)
+            model.dispose()
+
+        self.export_time = None
+        self.export_thread = threading.Thread(target=write)
+        self.export_thread.start()
+        return path
+
+    def wait_export(self):
+        # Wait for a background export to finish
+        if self.export_thread is not None:
+            self.export_thread.join()
+            self.export_thread = None
+
+    def snapshot(self):
+        # Values of all variables of the current solution, read at once (see f_solution.SolutionSnapshot), or None
+        if self.result is None or self.result.sol_count == 0:
+            return None
+        return SolutionSnapshot(self)
+
+    def columns(self):
+        # Column of every variable in the order of a snapshot (x1, x2, t1, t2, t); the columns never change after the build
+        if self.snapshot_columns is None:
+            variables = [var for name in ['x1', 'x2', 't1', 't2'] for var in getattr(self, name).values()] + [self.t]
+            self.snapshot_columns = np.array([var.index for var in variables])
+        return self.snapshot_columns
+
+    def solution(self, snapshot=None):
+        # Current solution (or that of a snapshot) in the format written by save, or None if the model has no solution
+        snapshot = snapshot or self.snapshot()
+        if snapshot is None:
+            return None
+        dict_dv = {name: snapshot.as_dict(name) for name in ['x1', 'x2', 't1', 't2']}  # Decision variables
+        dict_dv['Model'] = {'n': self.n, 'w': self.w, 'T': self.T, 'delay': self.delay, 'finaltime': snapshot.finaltime, 'time': self.time}  # Save model parameters
+        return dict_dv
+
+    def constraint_families(self):
+        # Constraints of every named family (see family), used to group the rows in verification reports
+        return self.families
+
+    def verify(self, tol=1e-6):
+        # Audit the current solution against all constraints, bounds and integrality (see f_verify.verify_solution)
+        return verify_solution(self.m, x=None if self.result is None else self.result.x, families=self.constraint_families(), tol=tol)
+
+    def save(self, filename, store=None):
+        # Save results as a run named filename in the results store (a ResultStore, default Results/store), returns its id
+        snapshot = self.snapshot()
+        if snapshot is None:
+            print('No solution to save.')
+            return None
+        print('finaltime', snapshot.finaltime)  # Print final time
+        store = store or ResultStore()
+        return store.append(self, name=filename)[0]
+
+    def set_start(self, solution, hints=False):
+        # Load a previous solution as MIP start (or as variable hints with hints=True). The solution can be a
+        # solved UAVStrikeModel, a dictionary as returned by solution() or the name of a saved run (the latest run of
+        # that name in Results/store, or an older pickle in Results/).
+        # Only the routing (x1, x2) is loaded; Gurobi completes the times, which keeps the start usable when
+        # the time data or endurance changed. Returns the number of variables that received a value.
+        if isinstance(solution, UAVStrikeModel):
+            solution = solution.solution()
+        elif isinstance(solution, str):
+            store = ResultStore()
+            run_id = store.latest(solution)
+            if run_id is not None:
+                solution = store.load(run_id)
+            else:
+                with open(f'Results/{solution}', 'rb') as f:
+                    solution = pickle.load(f)
+        if solution is None:
+            return 0
+        if (solution['Model']['n'], solution['Model']['w']) != (self.n, self.w):
+            raise ValueError(f"Solution for {solution['Model']['n']} targets and {solution['Model']['w']} UAVs "
+                             f"does not fit a model with {self.n} targets and {self.w} UAVs")
+        variables, values = [], []
+        for name, own in [('x1', self.x1), ('x2', self.x2)]:
+            for key, value in solution[name].items():
+                if key in own:
+                    variables.append(own[key])
+                    values.append(round(value))
+        self.m.setAttr('VarHintVal' if hints else 'Start', variables, values)
+        self.m.update()
+        return len(variables)
 
     def sensitivity_analysis(self):
         try:
@@ -311,22 +1049,16 @@ class UAVStrikeModel:
 
     def print_solution(self):
         # Print solution
-        if self.m.status == GRB.OPTIMAL:  # Check if optimal solution found
+        if self.result is not None and self.result.status == GRB.OPTIMAL:  # Check if optimal solution found
+            snapshot = self.snapshot()
             print("Optimal solution found:")
-            for i in self.lst_i:
-                for j in self.lst_j:
-                    for v in self.lst_v:
-                        for k in self.lst_k:
-                            if (i, j, v, k) in self.x1 and self.x1[i, j, v, k].X > 0.5:
-                                print(f"UAV {v} assigned from {i} to {j} for task {k}")  # Print assignments
-            for i in self.lst_i:
-                for v in self.lst_v:
-                    if (i, self.n + self.w + 1, v) in self.x2 and self.x2[i, self.n + self.w + 1, v].X > 0.5:
-                        print(f'UAV {v} flew to sinknode from node {i}')  # Print returns to sink
+            for i, j, v, k in snapshot.active('x1'):
+                print(f"UAV {v} assigned from {i} to {j} for task {k}")  # Print assignments
+            for i, sink, v in snapshot.active('x2'):
+                print(f'UAV {v} flew to sinknode from node {i}')  # Print returns to sink
 
-            for j in self.lst_j:
-                for k in self.lst_k:
-                    print(f"Task {k} on target {j} completed at time {self.t1[j, k].X}")  # Print task completion times
+            for (j, k), value in zip(snapshot.keys['t1'], snapshot.values['t1'].tolist()):
+                print(f"Task {k} on target {j} completed at time {value}")  # Print task completion times
         else:
             print("No optimal solution found.")  # Print if no solution found
 
@@ -1,8 +1,25 @@
 import unittest
+import os
+import tempfile
 import gurobipy as gp
 from collections import defaultdict
 import random as rd
-from UAVModelClass import UAVStrikeModel
+import pickle
+from UAVModelClass import UAVStrikeModel, ModelConfig
+from f_sweep import run_sweep, split_threads
+from f_sensitivity import solve_size_point, load_sweep_profiles, adaptive_endurance_rows, solve_speed_row, warm_start_stats, add_warm_start_stats, solve_warm
+from f_adaptive import bisect_grid, refine_grid
+from f_reuse import SolutionReuse, endurance_usage
+from f_profile import load_profile
+from f_heuristic import greedy_solution
+from f_lns import lns_solve
+from f_cache import ResultCache, model_fingerprint
+from f_results import ResultStore
+from f_benchmark import CATALOG, run_benchmarks, save_baseline, compare_to_baseline
+from f_verify import verify_solution
+from f_helper import create_time_dictionary, create_time_tensor
+from f_instances import generate_instances, generate_instance, random_locations
+from coordinates import starting_locations, target_locations
 
 class TestGurobiModel(unittest.TestCase):
     @classmethod
@@ -15,100 +32,100 @@ class TestGurobiModel(unittest.TestCase):
         if cls.model.m.status != gp.GRB.OPTIMAL:
             raise Exception(f"Model not solved to optimality. Status: {cls.model.m.status}")
 
+        # Read all solution values at once
+        cls.snapshot = cls.model.snapshot()
+        cls.x1, cls.x2, cls.t1 = (cls.snapshot.as_dict(name) for name in ['x1', 'x2', 't1'])
+
     def test_constraints(self):
-        # Loop through all the constraints in the model
-        for constr in self.model.m.getConstrs():
-            # Calculate the left-hand side of the constraint
-            lhs = sum(var.x * self.model.m.getCoeff(constr, var) for var in self.model.m.getVars())
-            sense = constr.Sense  # Sense of the constraint
-            rhs = constr.RHS  # Right-hand side of the constraint
-
-            if sense == gp.GRB.LESS_EQUAL:
-                self.assertLessEqual(lhs, rhs, f"Constraint {constr.ConstrName} not satisfied: {lhs} <= {rhs}")
-            elif sense == gp.GRB.GREATER_EQUAL:
-                self.assertGreaterEqual(lhs, rhs, f"Constraint {constr.ConstrName} not satisfied: {lhs} >= {rhs}")
-            elif sense == gp.GRB.EQUAL:
-                self.assertAlmostEqual(lhs, rhs, places=5, msg=f"Constraint {constr.ConstrName} not satisfied: {lhs} == {rhs}")
+        # Check every constraint, bound and integrality requirement at once on the sparse constraint matrix
+        report = self.model.verify()
+        self.assertTrue(report['feasible'], f"Constraints not satisfied: {report['violations']}")
 
     def test_solution_status(self):
         self.assertEqual(self.model.m.status, gp.GRB.OPTIMAL, "Model did not reach an optimal solution")
 
     def test_variable_bounds(self):
         # Verify that all variable bounds are respected
-        for var in self.model.m.getVars():
-            self.assertGreaterEqual(var.x, var.lb, f"Variable {var.VarName} lower bound not respected: {var.x} >= {var.lb}")
-            self.assertLessEqual(var.x, var.ub, f"Variable {var.VarName} upper bound not respected: {var.x} <= {var.ub}")
+        m = self.model.m
+        variables = m.getVars()
+        for name, x, lb, ub in zip(*(m.getAttr(attr, variables) for attr in ['VarName', 'X', 'LB', 'UB'])):
+            self.assertGreaterEqual(x, lb, f"Variable {name} lower bound not respected: {x} >= {lb}")
+            self.assertLessEqual(x, ub, f"Variable {name} upper bound not respected: {x} <= {ub}")
 
     def test_constraint_types(self):
         constraint_types = defaultdict(list)
+        m = self.model.m
+        A = m.getA().tocsr()
+        constrs = m.getConstrs()
+        names = m.getAttr('VarName', m.getVars())
+        senses = m.getAttr('Sense', constrs)
+        rhss = m.getAttr('RHS', constrs)
+
+        def terms(row):
+            # (coefficient, variable name) of the nonzeros of one row
+            start, end = A.indptr[row], A.indptr[row + 1]
+            return sorted(zip(A.data[start:end].tolist(), [names[col] for col in A.indices[start:end]]))
 
         # Group constraints by their format
-        for constr in self.model.m.getConstrs():
-            lhs_terms = sorted([(self.model.m.getCoeff(constr, var), var.VarName) for var in self.model.m.getVars() if self.model.m.getCoeff(constr, var) != 0])
-            constraint_format = (len(lhs_terms), constr.Sense, constr.RHS)
-            constraint_types[constraint_format].append(constr)
+        for row in range(A.shape[0]):
+            constraint_format = (A.indptr[row + 1] - A.indptr[row], senses[row], rhss[row])
+            constraint_types[constraint_format].append(row)
+
+        # Satisfaction of all rows, by the sparse verifier
+        report = self.model.verify()
+        violated = {row for rows in report['violations'].values() for row, _, _ in rows}
 
         # Print information about each type of constraint
-        for constr_format, constr_list in constraint_types.items():
+        for constr_format, rows in constraint_types.items():
             num_terms, sense, rhs = constr_format
             sense_str = {gp.GRB.LESS_EQUAL: "<=", gp.GRB.GREATER_EQUAL: ">=", gp.GRB.EQUAL: "=="}[sense]
 
             # Print the general format of the constraint
-            lhs_terms = sorted([(self.model.m.getCoeff(constr_list[0], var), var.VarName) for var in self.model.m.getVars() if self.model.m.getCoeff(constr_list[0], var) != 0])
-            constraint_expression = " + ".join([f"{coeff}*{var}" for coeff, var in lhs_terms])
+            constraint_expression = " + ".join([f"{coeff}*{var}" for coeff, var in terms(rows[0])])
             constraint_example = f"{constraint_expression} {sense_str} {rhs}"
             print(f"General format of constraint: {constraint_example}")
-            print(f"Number of this type of constraint: {len(constr_list)}")
+            print(f"Number of this type of constraint: {len(rows)}")
 
             # Check if at least one example constraint is satisfied
-            example_constr = constr_list[0]
-            lhs = sum(var.x * self.model.m.getCoeff(example_constr, var) for var in self.model.m.getVars())
-            if sense == gp.GRB.LESS_EQUAL:
-                satisfied = lhs <= rhs
-            elif sense == gp.GRB.GREATER_EQUAL:
-                satisfied = lhs >= rhs
-            elif sense == gp.GRB.EQUAL:
-                satisfied = abs(lhs - rhs) < 1e-5
-
-            print(f"Example constraint: {example_constr.ConstrName} is {'satisfied' if satisfied else 'not satisfied'}", '\n')
+            satisfied = rows[0] not in violated
+            print(f"Example constraint: {constrs[rows[0]].ConstrName} is {'satisfied' if satisfied else 'not satisfied'}", '\n')
 
     def test_redundant_constraints(self):
         # Test Symmetry in Task Assignment
         for i in self.model.lst_i:
-            for j in self.model.lst_i:
-                if i != j:
-                    for v in self.model.lst_v:
-                        for k in self.model.lst_k:
-                            if (i, j, v, k) in self.model.x1 and (j, i, v, k) in self.model.x1:
-                                lhs = self.model.x1[i, j, v, k].X + self.model.x1[j, i, v, k].X
-                                self.assertLessEqual(lhs, 1, f"Redundant constraint (symmetry in task assignment) violated for {i}->{j} and {j}->{i} for UAV {v} and task {k}")
+            for v in self.model.lst_v:
+                for (i, j, v, k) in self.model.arcs_out[i, v]:
+                    if (j, i, v, k) in self.model.x1:
+                        lhs = self.x1[i, j, v, k] + self.x1[j, i, v, k]
+                        self.assertLessEqual(lhs, 1, f"Redundant constraint (symmetry in task assignment) violated for {i}->{j} and {j}->{i} for UAV {v} and task {k}")
 
         # Test Task Completion Ordering
         for i in self.model.lst_j:
             if (i, 1) in self.model.t1 and (i, 3) in self.model.t1:
-                self.assertLessEqual(self.model.t1[i, 1].X, self.model.t1[i, 3].X, f"Redundant constraint (task completion ordering) violated for node {i}")
+                self.assertLessEqual(self.t1[i, 1], self.t1[i, 3], f"Redundant constraint (task completion ordering) violated for node {i}")
 
         # Test Number of Drones to Sink Node
-        num_drones_to_sink = sum(self.model.x2[i, self.model.n + self.model.w + 1, v].X for i in self.model.lst_i for v in self.model.lst_v if (i, self.model.n + self.model.w + 1, v) in self.model.x2)
+        num_drones_to_sink = sum(self.x2[a] for v in self.model.lst_v for a in self.model.arcs_sink[v])
         expected_drones_to_sink = self.model.w - self.model.n
         self.assertEqual(num_drones_to_sink, expected_drones_to_sink, f"Redundant constraint (number of drones to sink node) violated: {num_drones_to_sink} != {expected_drones_to_sink}")
 
         # Test Drone Capacity
         max_capacity = self.model.n + 1
         for v in self.model.lst_v:
-            total_tasks = sum(self.model.x1[i, j, v, k].X for i in self.model.lst_i for j in self.model.lst_j for k in self.model.lst_k if (i, j, v, k) in self.model.x1)
+            total_tasks = sum(self.x1[a] for i in self.model.lst_i for a in self.model.arcs_out[i, v]) + sum(
+                self.x1[self.model.arcs_loop[j, v]] for j in self.model.lst_j)
             self.assertLessEqual(total_tasks, max_capacity, f"Redundant constraint (drone capacity) violated for UAV {v}: {total_tasks} > {max_capacity}")
 
     def test_task_completion(self):
         # For classification and verification tasks (tasks 1 and 3)
         for k in [1, 3]:
             for j in self.model.lst_j:
-                lhs = sum(self.model.x1[i, j, v, k].X for v in self.model.lst_v for i in self.model.lst_i if (i, j, v, k) in self.model.x1)
+                lhs = sum(self.x1[a] for v in self.model.lst_v for a in self.model.arcs_in[j, v, k])
                 self.assertAlmostEqual(lhs, 1, msg=f"Task completion constraint violated for target {j}, task {k}")
 
         # For attack tasks (task 2)
         for j in self.model.lst_j:
-            lhs = sum(self.model.x1[i, j, v, 2].X for v in self.model.lst_v for i in self.model.lst_i if (i, j, v, 2) in self.model.x1)
+            lhs = sum(self.x1[a] for v in self.model.lst_v for a in self.model.arcs_in[j, v, 2] + [self.model.arcs_loop[j, v]])
             self.assertAlmostEqual(lhs, 1, msg=f"Task completion constraint violated for target {j}, task 2")
 
     def test_unique_task_assignment(self):
@@ -116,99 +133,666 @@ class TestGurobiModel(unittest.TestCase):
         for k in [1, 3]:
             for v in self.model.lst_v:
                 for j in self.model.lst_j:
-                    lhs = sum(self.model.x1[i, j, v, k].X for i in self.model.lst_i if (i, j, v, k) in self.model.x1)
+                    lhs = sum(self.x1[a] for a in self.model.arcs_in[j, v, k])
                     self.assertLessEqual(lhs, 1, msg=f"Unique task assignment constraint violated for UAV {v}, target {j}, task {k}")
 
         # For attack tasks (task 2)
         for v in self.model.lst_v:
             for j in self.model.lst_j:
-                lhs = sum(self.model.x1[i, j, v, 2].X for i in self.model.lst_i if (i, j, v, 2) in self.model.x1)
+                lhs = sum(self.x1[a] for a in self.model.arcs_in[j, v, 2] + [self.model.arcs_loop[j, v]])
                 self.assertLessEqual(lhs, 1, msg=f"Unique task assignment constraint violated for UAV {v}, target {j}, task 2")
 
     def test_single_visit_to_target(self):
         for v in self.model.lst_v:
             for j in self.model.lst_j:
-                lhs = sum(self.model.x1[i, j, v, k].X for k in self.model.lst_k for i in self.model.lst_i if (i, j, v, k) in self.model.x1 and i !=j)
+                lhs = sum(self.x1[a] for k in self.model.lst_k for a in self.model.arcs_in[j, v, k])
                 self.assertLessEqual(lhs, 1, msg=f"Single visit to target constraint violated for UAV {v}, target {j}")
 
     def test_single_entry_to_sink(self):
         for v in self.model.lst_v:
-            lhs = sum(self.model.x2[i, self.model.n + self.model.w + 1, v].X for i in self.model.lst_i if (i, self.model.n + self.model.w + 1, v) in self.model.x2)
+            lhs = sum(self.x2[a] for a in self.model.arcs_sink[v])
             self.assertLessEqual(lhs, 1, msg=f"Single entry to sink constraint violated for UAV {v}")
 
     def test_single_attack_per_uav(self):
         for v in self.model.lst_v:
-            lhs = sum(self.model.x1[i, j, v, 2].X for j in self.model.lst_j for i in self.model.lst_i if (i, j, v, 2) in self.model.x1)
+            lhs = sum(self.x1[a] for j in self.model.lst_j for a in self.model.arcs_in[j, v, 2] + [self.model.arcs_loop[j, v]])
             self.assertLessEqual(lhs, 1, msg=f"Single attack per UAV constraint violated for UAV {v}")
 
     def test_attack_and_verification_exclusive(self):
         for v in self.model.lst_v:
             for j in self.model.lst_j:
-                lhs_attack = sum(self.model.x1[i, j, v, 2].X for i in self.model.lst_i if (i, j, v, 2) in self.model.x1)
-                lhs_verify = sum(self.model.x1[i, j, v, 3].X for i in self.model.lst_i if (i, j, v, 3) in self.model.x1)
+                lhs_attack = sum(self.x1[a] for a in self.model.arcs_in[j, v, 2] + [self.model.arcs_loop[j, v]])
+                lhs_verify = sum(self.x1[a] for a in self.model.arcs_in[j, v, 3])
                 self.assertLessEqual(lhs_attack + lhs_verify, 1, msg=f"Attack and verification exclusive constraint violated for UAV {v}, target {j}")
 
     def test_timing_constraints(self):
         for v in self.model.lst_v:
-            for i in self.model.lst_i:
+            for i in self.model.lst_j:
+                arrived_1 = sum(self.x1[a] for a in self.model.arcs_in[i, v, 1])  # UAV v reached i for classification
+                arrived_3 = sum(self.x1[a] for a in self.model.arcs_in[i, v, 3])  # UAV v reached i for verification
                 for j in self.model.lst_j:
                     if i != j:
                         for k in [1, 3]:
                             if (j, k) in self.model.t1 and (i, 1) in self.model.t1:
-                                lhs1 = self.model.t1[j, k].X
-                                rhs1 = self.model.t1[i, 1].X + self.model.time[i, j, v, k] + (2 - self.model.x1[i, j, v, k].X - sum(
-                                    self.model.x1[l, i, v, 1].X for l in self.model.lst_i if (l, i, v, 1) in self.model.x1)) * self.model.w * self.model.T
+                                lhs1 = self.t1[j, k]
+                                rhs1 = self.t1[i, 1] + self.model.time[i, j, v, k] + (2 - self.x1[i, j, v, k] - arrived_1) * self.model.w * self.model.T
                                 self.assertLessEqual(lhs1, rhs1,
                                                      msg=f"Timing constraint (classification and verification) violated for UAV {v}, nodes {i}->{j}, task {k}")
 
-                                lhs2 = self.model.t1[j, k].X
-                                rhs2 = self.model.t1[i, 1].X + self.model.time[i, j, v, k] - (2 - self.model.x1[i, j, v, k].X - sum(
-                                    self.model.x1[l, i, v, 1].X for l in self.model.lst_i if (l, i, v, 1) in self.model.x1)) * self.model.w * self.model.T
+                                lhs2 = self.t1[j, k]
+                                rhs2 = self.t1[i, 1] + self.model.time[i, j, v, k] - (2 - self.x1[i, j, v, k] - arrived_1) * self.model.w * self.model.T
                                 self.assertGreaterEqual(lhs2, rhs2,
                                                         msg=f"Timing constraint (classification and verification) violated for UAV {v}, nodes {i}->{j}, task {k}")
 
                         if (j, 2) in self.model.t1 and (i, 1) in self.model.t1:
-                            lhs3 = self.model.t1[j, 2].X
-                            rhs3 = self.model.t1[i, 1].X + self.model.time[i, j, v, 2] + (2 - self.model.x1[i, j, v, 2].X - sum(
-                                self.model.x1[l, i, v, 1].X for l in self.model.lst_i if (l, i, v, 1) in self.model.x1)) * self.model.w * self.model.T
+                            lhs3 = self.t1[j, 2]
+                            rhs3 = self.t1[i, 1] + self.model.time[i, j, v, 2] + (2 - self.x1[i, j, v, 2] - arrived_1) * self.model.w * self.model.T
                             self.assertLessEqual(lhs3, rhs3,
                                                  msg=f"Timing constraint (attack) violated for UAV {v}, nodes {i}->{j}")
 
-                            lhs4 = self.model.t1[j, 2].X
-                            rhs4 = self.model.t1[i, 1].X + self.model.time[i, j, v, 2] - (2 - self.model.x1[i, j, v, 2].X - sum(
-                                self.model.x1[l, i, v, 1].X for l in self.model.lst_i if (l, i, v, 1) in self.model.x1)) * self.model.w * self.model.T
+                            lhs4 = self.t1[j, 2]
+                            rhs4 = self.t1[i, 1] + self.model.time[i, j, v, 2] - (2 - self.x1[i, j, v, 2] - arrived_1) * self.model.w * self.model.T
                             self.assertGreaterEqual(lhs4, rhs4,
                                                     msg=f"Timing constraint (attack) violated for UAV {v}, nodes {i}->{j}")
 
                         if (j, 2) in self.model.t1 and (i, 3) in self.model.t1:
-                            lhs5 = self.model.t1[j, 2].X
-                            rhs5 = self.model.t1[i, 3].X + self.model.time[i, j, v, 2] + (2 - self.model.x1[i, j, v, 2].X - sum(
-                                self.model.x1[l, i, v, 3].X for l in self.model.lst_i if (l, i, v, 3) in self.model.x1)) * self.model.w * self.model.T
+                            lhs5 = self.t1[j, 2]
+                            rhs5 = self.t1[i, 3] + self.model.time[i, j, v, 2] + (2 - self.x1[i, j, v, 2] - arrived_3) * self.model.w * self.model.T
                             self.assertLessEqual(lhs5, rhs5,
                                                  msg=f"Timing constraint (verification) violated for UAV {v}, nodes {i}->{j}")
 
-                            lhs6 = self.model.t1[j, 2].X
-                            rhs6 = self.model.t1[i, 3].X + self.model.time[i, j, v, 2] - (2 - self.model.x1[i, j, v, 2].X - sum(
-                                self.model.x1[l, i, v, 3].X for l in self.model.lst_i if (l, i, v, 3) in self.model.x1)) * self.model.w * self.model.T
+                            lhs6 = self.t1[j, 2]
+                            rhs6 = self.t1[i, 3] + self.model.time[i, j, v, 2] - (2 - self.x1[i, j, v, 2] - arrived_3) * self.model.w * self.model.T
                             self.assertGreaterEqual(lhs6, rhs6,
                                                     msg=f"Timing constraint (verification) violated for UAV {v}, nodes {i}->{j}")
 
             for j in self.model.lst_j:
                 if (j, 1) in self.model.t1 and (j, 2) in self.model.t1:
-                    lhs7 = self.model.t1[j, 1].X
-                    rhs7 = self.model.t1[j, 2].X
+                    lhs7 = self.t1[j, 1]
+                    rhs7 = self.t1[j, 2]
                     self.assertLessEqual(lhs7, rhs7, msg=f"Timing constraint (task sequence) violated for node {j}")
 
                 if (j, 2) in self.model.t1 and (j, 3) in self.model.t1:
-                    lhs8 = self.model.t1[j, 2].X
-                    rhs8 = self.model.t1[j, 3].X
+                    lhs8 = self.t1[j, 2]
+                    rhs8 = self.t1[j, 3]
                     self.assertLessEqual(lhs8, rhs8, msg=f"Timing constraint (task sequence) violated for node {j}")
 
     def test_vehicle_endurance_constraint(self):
         for v in self.model.lst_v:
-            lhs = sum(
-                self.model.time[i, j, v, k] * self.model.x1[i, j, v, k].X for k in self.model.lst_k for i in self.model.lst_i for j in self.model.lst_j if (i, j, v, k) in self.model.x1)
+            lhs = sum(self.model.time[a] * self.x1[a] for i in self.model.lst_i for a in self.model.arcs_out[i, v]) + sum(
+                self.model.time[a] * self.x1[a] for a in [self.model.arcs_loop[j, v] for j in self.model.lst_j])
             self.assertLessEqual(lhs, self.model.T, msg=f"Vehicle endurance constraint violated for UAV {v}")
 
+class TestLazyModel(unittest.TestCase):
+    def test_build_on_first_use(self):
+        rd.seed(0)
+        model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100)
+        self.assertFalse(model.built)
+        self.assertEqual(len(model.time), 6 * 2 * 4 * 3, msg="Time data not set up before the build")
+        model.set_endurance(50)
+        model.set_delay(2)
+        model.set_param('OutputFlag', 0)
+        self.assertFalse(model.built, msg="In-place updates built the model")
+        model.optimize()
+        self.assertTrue(model.built)
+        self.assertEqual(model.m.Params.OutputFlag, 0)
+        self.assertTrue({'data', 'variables', 'constraints', 'objective', 'build', 'solve'} <= set(model.timings))
+        eager = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=50, delay=2, timedict=model.time).build()
+        eager.m.setParam('OutputFlag', 0)
+        eager.optimize()
+        self.assertAlmostEqual(model.m.objVal, eager.m.objVal)
+
+    def test_config_is_picklable(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100, builder='matrix')
+        config = pickle.loads(pickle.dumps(model.config()))
+        self.assertIsInstance(config, ModelConfig)
+        copy = config.model()
+        self.assertFalse(copy.built)
+        self.assertEqual(copy.time, model.time)
+        self.assertEqual((copy.n, copy.w, copy.T, copy.builder), (2, 3, 100, 'matrix'))
+        model.optimize()
+        copy.optimize()
+        self.assertAlmostEqual(model.m.objVal, copy.m.objVal)
+
+class TestHighsBackend(unittest.TestCase):
+    def test_same_optimum_as_gurobi(self):
+        for builder, obj in [('loop', 2), ('matrix', 1), ('loop', 3)]:
+            rd.seed(0)
+            model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, obj=obj, builder=builder)
+            model.set_param('OutputFlag', 0)
+            model.optimize()
+            highs = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, obj=obj, builder=builder, timedict=model.time, solver='highs')
+            highs.set_param('OutputFlag', 0)
+            highs.optimize()
+            self.assertEqual(highs.result.status, gp.GRB.OPTIMAL)
+            self.assertAlmostEqual(highs.result.objective, model.result.objective, places=5)
+            self.assertTrue(highs.verify()['feasible'], msg="HiGHS solution violates the model")
+            self.assertAlmostEqual(highs.solution()['Model']['finaltime'], highs.snapshot().finaltime)
+
+class TestMatrixBuilder(unittest.TestCase):
+    def test_identical_lp_files(self):
+        # The matrix builder must produce exactly the same model as the loop builder
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for n_targets, n_uavs in [(1, 3), (2, 2), (2, 5), (3, 4), (3, 2), (4, 3)]:
+                for obj in [1, 2, 3]:
+                    loop_model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_uavs, endurance=100, delay=2, obj=obj)
+                    matrix_model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_uavs, endurance=100, delay=2,
+                                                  timedict=loop_model.time, obj=obj, builder='matrix')
+                    loop_model.m.write(os.path.join(tmpdir, 'loop.lp'))
+                    matrix_model.m.write(os.path.join(tmpdir, 'matrix.lp'))
+                    with open(os.path.join(tmpdir, 'loop.lp')) as f_loop, open(os.path.join(tmpdir, 'matrix.lp')) as f_matrix:
+                        self.assertEqual(f_loop.read(), f_matrix.read(),
+                                         msg=f"LP files differ for {n_targets} targets, {n_uavs} UAVs, objective {obj}")
+
+class TestParameterUpdates(unittest.TestCase):
+    def test_updates_match_rebuild(self):
+        # Changing endurance, delay and time data in place must give the same model as building it again
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for builder in ['loop', 'matrix']:
+                for obj in [1, 2, 3]:
+                    model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, delay=1, obj=obj, builder=builder)
+                    timedict = {key: rd.randint(1, 30) for key in model.time}
+                    model.set_endurance(170)
+                    model.set_delay(4)
+                    model.set_time_matrix(timedict)
+                    rebuilt = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=170, delay=4, timedict=timedict, obj=obj,
+                                             builder=builder)
+                    model.m.write(os.path.join(tmpdir, 'updated.lp'))
+                    rebuilt.m.write(os.path.join(tmpdir, 'rebuilt.lp'))
+                    with open(os.path.join(tmpdir, 'updated.lp')) as f_updated, open(os.path.join(tmpdir, 'rebuilt.lp')) as f_rebuilt:
+                        self.assertEqual(f_updated.read(), f_rebuilt.read(),
+                                         msg=f"Updated model differs from rebuilt model ({builder} builder, objective {obj})")
+
+class TestWarmStart(unittest.TestCase):
+    def test_start_from_previous_solution(self):
+        # A solved model's routing is loaded as MIP start and the warm solve reaches the same optimum
+        model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100)
+        model.optimize()
+        warm = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, timedict=model.time)
+        loaded = warm.set_start(model)
+        self.assertEqual(loaded, len(warm.x1) + len(warm.x2))
+        snapshot = model.snapshot()
+        for key, var in warm.x1.items():
+            self.assertEqual(var.Start, round(snapshot.value('x1', key)), msg=f"Start value not loaded for {key}")
+        warm.optimize()
+        self.assertAlmostEqual(warm.m.objVal, model.m.objVal, places=5)
+
+    def test_start_size_mismatch(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100)
+        model.optimize()
+        other = UAVStrikeModel(n_targets=2, n_uavs=5, endurance=100)
+        with self.assertRaises(ValueError):
+            other.set_start(model)
+
+class TestExport(unittest.TestCase):
+    def test_export_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100)
+            cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                model.optimize()
+                self.assertEqual(os.listdir(tmpdir), [], msg="optimize() wrote a file without export")
+            finally:
+                os.chdir(cwd)
+            self.assertIsNone(model.export_time)
+
+    def test_export_formats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100)
+            path = model.export(fmt='lp.gz', directory=tmpdir)
+            self.assertEqual(os.path.basename(path), f'{model.instance_name()}.lp.gz')
+            self.assertTrue(os.path.exists(path))
+            self.assertIsNotNone(model.export_time)
+            path = model.export('named', fmt='mps', directory=tmpdir, background=True)
+            model.optimize()  # The model can be solved while the copy is written
+            model.wait_export()
+            self.assertTrue(os.path.exists(path))
+            self.assertIsNotNone(model.export_time)
+
+class TestTimeTensor(unittest.TestCase):
+    def test_matches_time_dictionary(self):
+        # The dictionary also holds entries towards UAV start nodes, which the model never uses
+        n = len(target_locations)
+        expected = {key: value for key, value in create_time_dictionary(starting_locations, target_locations, 89).items()
+                    if key[1] <= n}
+        tensor = create_time_tensor(starting_locations, target_locations, 89)
+        self.assertEqual(set(tensor), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(tensor[key], value, places=9)
+        dense = create_time_tensor(starting_locations, target_locations, 89, dense=True)
+        self.assertEqual(dense.shape, (n + len(starting_locations), n, len(starting_locations), 3))
+
+    def test_model_accepts_view(self):
+        tensor = create_time_tensor(starting_locations, target_locations, 89)
+        plain = dict(tensor)
+        for builder in ['loop', 'matrix']:
+            model = UAVStrikeModel(3, 6, 360, 1, tensor, obj=1, builder=builder)
+            reference = UAVStrikeModel(3, 6, 360, 1, plain, obj=1, builder=builder)
+            self.assertEqual(model.m.getAttr('Obj', model.m.getVars()), reference.m.getAttr('Obj', reference.m.getVars()))
+            self.assertEqual(model.m.getAttr('RHS', model.m.getConstrs()), reference.m.getAttr('RHS', reference.m.getConstrs()))
+
+class TestInstanceGenerator(unittest.TestCase):
+    def test_scenarios_regenerate_from_seed(self):
+        batch = generate_instances(3, 5, count=4, seed=11)
+        for index, tensor in enumerate(batch):
+            self.assertTrue((tensor.array == generate_instance(3, 5, seed=11, index=index).array).all())
+        values = batch[0].array
+        self.assertTrue(((values >= 1) & (values <= 30) & (values == values.round())).all())
+        self.assertEqual(len(batch[0]), 8 * 3 * 5 * 3)
+        self.assertFalse((batch[0].array == batch[1].array).all())
+
+    def test_geographic_matches_time_tensor(self):
+        locations = random_locations(2, 4, count=2, seed=5)[1]
+        expected = create_time_tensor({v: tuple(locations[2 + v - 1]) for v in range(1, 5)},
+                                      {j: tuple(locations[j - 1]) for j in range(1, 3)}, 89)
+        tensor = generate_instance(2, 4, seed=5, index=1, kind='geographic', drone_speed=89)
+        self.assertEqual(set(tensor), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(tensor[key], value, places=9)
+
+    def test_config_regenerates_seeded_data(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100, seed=4)
+        config = model.config()
+        self.assertIsNone(config.timedict)
+        self.assertEqual(dict(config.model().time), dict(model.time))
+        model.set_time_matrix(dict(model.time))
+        self.assertIsNotNone(model.config().timedict)
+        # Data assigned directly is passed on as it is as well
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100, seed=1)
+        model.time = generate_instance(2, 3, seed=2)
+        self.assertEqual(dict(model.config().model().time), dict(model.time))
+
+class TestHeterogeneousFleet(unittest.TestCase):
+    def setUp(self):
+        # Four UAVs starting from Manila and one from Cebu City
+        self.starts = {f'Manila {v}': starting_locations['Manila'] for v in range(1, 5)}
+        self.starts['Cebu City'] = starting_locations['Cebu City']
+
+    def test_per_uav_speed_and_endurance(self):
+        speeds = [200, 150, 200, 200, 200]
+        time = create_time_tensor(self.starts, target_locations, speeds)
+        self.assertAlmostEqual(time[4, 1, 2, 1] - 1, (time[4, 1, 1, 1] - 1) * 200 / 150, places=9)
+        model = UAVStrikeModel(3, 5, [360, 360, 300, 360, 360], 1, time)
+        self.assertEqual([c.RHS for c in model.c_endurance.values()], [360, 360, 300, 360, 360])
+        with self.assertRaises(ValueError):
+            UAVStrikeModel(3, 5, [360, 360], 1, time)
+
+    def test_symmetry_breaking(self):
+        time = create_time_tensor(self.starts, target_locations, 200)
+        model = UAVStrikeModel(3, 5, 360, 1, time, symmetry=True)
+        self.assertEqual(model.uav_groups, [[1, 2, 3, 4]])
+        model.set_endurance([360, 360, 300, 360, 360])
+        self.assertEqual(model.uav_groups, [[1, 2, 4]])
+        for obj in [1, 2]:
+            plain = UAVStrikeModel(3, 5, 360, 1, time, obj=obj)
+            ordered = UAVStrikeModel(3, 5, 360, 1, time, obj=obj, symmetry=True, builder='matrix')
+            plain.optimize()
+            ordered.optimize()
+            self.assertAlmostEqual(plain.m.objVal, ordered.m.objVal, places=5)
+
+class TestTightFormulation(unittest.TestCase):
+    def test_same_optimum(self):
+        for obj in [1, 2, 3]:
+            standard = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, obj=obj)
+            tight = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100, timedict=standard.time, obj=obj, formulation='tight')
+            standard.optimize()
+            tight.optimize()
+            self.assertAlmostEqual(standard.m.objVal, tight.m.objVal, places=5, msg=f"Objective {obj} differs")
+
+    def test_big_m_not_larger_than_standard(self):
+        model = UAVStrikeModel(n_targets=3, n_uavs=3, endurance=100, delay=2, formulation='tight')
+        big_m = model.tight_big_m()
+        self.assertTrue(all(0 <= M <= 3 * 100 for M in big_m))
+        earliest = model.earliest_times()
+        for j in model.lst_j:
+            self.assertGreaterEqual(earliest[j, 3], earliest[j, 1] + 2 * model.delay)
+            self.assertEqual(model.t1[j, 3].LB, earliest[j, 3])
+
+    def test_updates_match_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for builder in ['loop', 'matrix']:
+                model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100, builder=builder, formulation='tight')
+                timedict = {key: rd.randint(1, 30) for key in model.time}
+                model.set_endurance(150)
+                model.set_delay(3)
+                model.set_time_matrix(timedict)
+                rebuilt = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=150, delay=3, timedict=timedict, builder=builder,
+                                         formulation='tight')
+                model.m.write(os.path.join(tmpdir, 'updated.lp'))
+                rebuilt.m.write(os.path.join(tmpdir, 'rebuilt.lp'))
+                with open(os.path.join(tmpdir, 'updated.lp')) as f_updated, open(os.path.join(tmpdir, 'rebuilt.lp')) as f_rebuilt:
+                    self.assertEqual(f_updated.read(), f_rebuilt.read(), msg=f"Updated tight model differs ({builder} builder)")
+
+class TestVerifier(unittest.TestCase):
+    def test_reports_violations_by_family(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100)
+        model.optimize()
+        self.assertTrue(model.verify()['feasible'])
+        # Stretch every task time: the timing rows of the arcs used no longer hold
+        x = model.m.getAttr('X', model.m.getVars())
+        for var in model.t1.values():
+            x[var.index] += 5
+        report = verify_solution(model.m, x=x, families=model.constraint_families())
+        self.assertFalse(report['feasible'])
+        self.assertTrue(any(family.startswith('timing') for family in report['violations']), report['violations'].keys())
+        self.assertNotIn('endurance', report['violations'])
+        x[model.x1[next(iter(model.x1))].index] = 0.5
+        self.assertIn('integrality', verify_solution(model.m, x=x)['violations'])
+
+class TestBuildReport(unittest.TestCase):
+    def test_families_cover_all_rows(self):
+        for builder in ['loop', 'matrix']:
+            model = UAVStrikeModel(n_targets=3, n_uavs=4, endurance=100, builder=builder, symmetry=True)
+            report = model.build_report()
+            self.assertEqual(list(report)[:4], ['completion', 'assignment', 'visit', 'continuity'])
+            self.assertEqual(sum(family['rows'] for family in report.values()), model.m.NumConstrs)
+            self.assertEqual(sum(family['nnz'] for family in report.values()), model.m.NumNZs)
+            self.assertEqual(report['endurance']['rows'], 4)
+            self.assertEqual(report['timing_start']['rows'], 3 * 4 * 3 * 2)
+            self.assertEqual(model.m.getConstrs()[0].ConstrName, 'completion[0]')
+
+class TestSweep(unittest.TestCase):
+    def test_split_threads(self):
+        self.assertEqual(split_threads(1), 0)
+        self.assertEqual(split_threads(4, threads=8), 2)
+        self.assertEqual(split_threads(16, threads=8), 1)
+
+    def test_seeded_points_are_reproducible(self):
+        # Every point draws its random time data from its own seed, so a sweep can be repeated exactly
+        points = [{'n_targets': 1, 'n_uavs': n_uavs, 'endurance': 100} for n_uavs in [2, 3]]
+        first = run_sweep(solve_size_point, points, seed=7)
+        second = run_sweep(solve_size_point, points, seed=7)
+        self.assertEqual(list(first['n_drones']), [2, 3])
+        self.assertEqual(list(first['seed']), [7, 8])
+        self.assertEqual(list(first['objective_value']), list(second['objective_value']))
+
+class TestAdaptiveSweep(unittest.TestCase):
+    def test_grids_match_full_evaluation(self):
+        # Monotone step functions with a region without solutions (NaN)
+        line = [float('nan')] * 7 + [9.0] * 20 + [6.0] * 30 + [5.0] * 43
+        values, solved = bisect_grid(len(line), lambda index: line[index])
+        self.assertEqual([value if value == value else None for value in values], [value if value == value else None for value in line])
+        self.assertLess(solved.sum(), len(line) / 3)
+        grid = [[min(i // 5 + j // 8, 4) for j in range(40)] for i in range(30)]
+        values, solved = refine_grid((30, 40), lambda i, j: float(grid[i][j]))
+        self.assertEqual(values.tolist(), grid)
+        self.assertLess(solved.sum(), 30 * 40 / 2)
+
+    def test_endurance_bisection_matches_every_endurance(self):
+        endurances = range(10, 61)
+        rows = adaptive_endurance_rows(2, 3, endurances, num_matrices=1, seed=2)
+        self.assertLess(sum(row['solved'] for row in rows), len(endurances))
+        time = generate_instance(2, 3, seed=2, index=0)
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=10, timedict=time)
+        model.m.setParam('OutputFlag', 0)
+        for row in rows:
+            model.set_endurance(row['endurance'])
+            model.optimize()
+            expected = model.m.ObjVal if model.m.SolCount else 0.0
+            self.assertAlmostEqual(row['objective_value'], expected, places=4, msg=f"Endurance {row['endurance']}")
+
+class TestSolutionReuse(unittest.TestCase):
+    def test_lookup_proves_optimum_and_infeasibility(self):
+        reuse = SolutionReuse()
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=1000, seed=6)
+        model.m.setParam('OutputFlag', 0)
+        result = reuse.solve(model)
+        usage = endurance_usage(model, result['solution'])
+        self.assertAlmostEqual(usage.max(), max(model.c_endurance[v].getAttr('RHS') - model.c_endurance[v].Slack for v in model.lst_v), places=6)
+        # At the largest flight time of the plan it is still optimal (big-M stays far above the times), found without a solve
+        model.set_endurance(usage.max())
+        reused = reuse.lookup(model)
+        self.assertIsNotNone(reused)
+        self.assertEqual(reused['objective_value'], result['objective_value'])
+        model.set_endurance(usage.max() - 1)
+        self.assertIsNone(reuse.lookup(model))
+        model.set_endurance(1)
+        self.assertEqual(reuse.solve(model)['status'], gp.GRB.INFEASIBLE)
+        model.set_endurance(0.5)
+        self.assertEqual(reuse.lookup(model)['status'], gp.GRB.INFEASIBLE)
+        self.assertEqual((reuse.solves, reuse.reused), (2, 0))
+
+    def test_no_reuse_across_big_m_threshold(self):
+        # The plan found at endurance 200 fits the flight times down to 5, but the big-M of the timing rows shrinks
+        # with the endurance and cuts it off below 8: those endurances are infeasible
+        reuse = SolutionReuse()
+        model = UAVStrikeModel(2, 4, 200, 1, obj=1, seed=11)
+        model.set_param('OutputFlag', 0)
+        for endurance in [200, 50, 20, 10, 9, 8, 7, 6, 5]:
+            model.set_endurance(endurance)
+            result = reuse.solve(model)
+            fresh = UAVStrikeModel(2, 4, endurance, 1, model.time, obj=1)
+            fresh.set_param('OutputFlag', 0)
+            fresh.optimize()
+            self.assertEqual(result['status'], fresh.result.status, msg=f"Endurance {endurance}")
+            if fresh.result.sol_count:
+                self.assertAlmostEqual(result['objective_value'], fresh.result.objective, places=4)
+        self.assertGreater(reuse.reused, 0)
+
+    def test_sweep_skips_solves(self):
+        starts = dict(list(starting_locations.items())[:4])
+        targets = dict(list(target_locations.items())[:2])
+        endurances = list(range(100, 401, 20))
+        params = {'OutputFlag': 0}
+        full = solve_speed_row(89, endurances, starts, targets, 2, 4, params=params)
+        reused = solve_speed_row(89, endurances, starts, targets, 2, 4, params=params, reuse=True)
+        self.assertEqual([row['endurance'] for row in reused], endurances)
+        for row, expected in zip(reused, full):
+            for obj in [1, 2, 3]:
+                value, reference = row[f'objective_{obj}'], expected[f'objective_{obj}']
+                if reference != reference:
+                    self.assertNotEqual(value, value, msg=f"Endurance {row['endurance']}")
+                else:
+                    self.assertAlmostEqual(value, reference, places=4, msg=f"Endurance {row['endurance']}")
+        stats = warm_start_stats()
+        for row in reused:
+            add_warm_start_stats(stats, row['warm_start_stats'])
+        self.assertGreater(stats['reused'], 0)
+
+class TestProfiler(unittest.TestCase):
+    def test_profile_series(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100)
+        model.optimize(profile=True)
+        profile = model.profile
+        self.assertTrue(profile['series'], msg="No progress recorded")
+        time, incumbent, bound, gap, nodes = profile['series'][-1]
+        self.assertAlmostEqual(incumbent, model.m.objVal)
+        self.assertAlmostEqual(time, model.m.Runtime)
+        self.assertIsNotNone(profile['first_feasible'])
+        self.assertAlmostEqual(sum(profile['phases'].values()), profile['runtime'])
+        self.assertTrue(all(seconds >= 0 for seconds in profile['phases'].values()))
+
+    def test_sweep_profiles(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                points = [{'n_targets': 1, 'n_uavs': n_uavs, 'endurance': 100, 'profile': True} for n_uavs in [2, 3]]
+                results = run_sweep(solve_size_point, points)
+                self.assertTrue(all(os.path.exists(path) for path in results['profile']))
+                self.assertEqual(load_profile(results['profile'][0])['status'], gp.GRB.OPTIMAL)
+                series = load_sweep_profiles(results)
+                self.assertEqual(sorted(series['n_drones'].unique()), [2, 3])
+                self.assertIn('gap', series.columns)
+            finally:
+                os.chdir(cwd)
+
+class TestSweepLimits(unittest.TestCase):
+    def test_stopped_point_keeps_incumbent(self):
+        # A point stopped before optimality reports its best solution, bound and gap instead of nothing
+        points = [{'n_targets': 3, 'n_uavs': 4, 'endurance': 100}]
+        row = run_sweep(solve_size_point, points, params={'SolutionLimit': 1}, seed=1).iloc[0]
+        self.assertEqual(row['status'], gp.GRB.SOLUTION_LIMIT)
+        self.assertIsNotNone(row['objective_value'])
+        self.assertLessEqual(row['best_bound'], row['objective_value'])
+        self.assertGreater(row['gap'], 0)
+
+    def test_budget_stops_remaining_points(self):
+        points = [{'n_targets': 2, 'n_uavs': n_uavs, 'endurance': 100} for n_uavs in [3, 4]]
+        results = run_sweep(solve_size_point, points, budget=0)
+        self.assertTrue((results['status'] == gp.GRB.TIME_LIMIT).all())
+
+class TestGreedyHeuristic(unittest.TestCase):
+    def test_plans_are_feasible(self):
+        for seed in range(10):
+            rd.seed(seed)
+            model = UAVStrikeModel(n_targets=3, n_uavs=5, endurance=60, delay=2)
+            solution = greedy_solution(model.n, model.w, model.T, model.delay, model.time)
+            self.assertIsNotNone(solution, msg=f"No plan for seed {seed}")
+            x = [0.0] * model.m.NumVars
+            for name in ['x1', 'x2', 't1', 't2']:
+                for key, value in solution[name].items():
+                    x[getattr(model, name)[key].index] = value
+            x[model.t.index] = solution['Model']['finaltime']
+            report = verify_solution(model.m, x, model.constraint_families())
+            self.assertTrue(report['feasible'], msg=f"Plan for seed {seed} violates {report['violations']}")
+
+    def test_mip_start(self):
+        rd.seed(3)
+        model = UAVStrikeModel(n_targets=2, n_uavs=4, endurance=100)
+        plan = model.greedy_solution()
+        model.optimize(heuristic=True)
+        self.assertEqual(model.m.status, gp.GRB.OPTIMAL)
+        self.assertLessEqual(model.m.objVal, plan['Model']['finaltime'])
+        self.assertIsNone(greedy_solution(2, 2, 100, 1, model.time))  # Too few UAVs to verify the last attack
+
+class TestLNS(unittest.TestCase):
+    def test_lns_improves_and_restores_model(self):
+        rd.seed(0)
+        model = UAVStrikeModel(n_targets=3, n_uavs=5, endurance=100)
+        result = lns_solve(model, time_limit=5, sub_time_limit=1, max_iterations=15)
+        trace = result['trace']
+        self.assertEqual(len(trace), result['iterations'] + 1)
+        self.assertTrue((trace['objective'].diff().dropna() <= 1e-6).all(), msg="Incumbent got worse")
+        self.assertAlmostEqual(result['objective'], trace['objective'].iloc[-1])
+        self.assertTrue(all(var.LB == 0 and var.UB == 1 for var in model.x1.values()), msg="x1 bounds not restored")
+        model.optimize()
+        self.assertLessEqual(model.m.objVal, result['objective'] + 1e-6)
+
+    def test_lns_keeps_frozen_bounds_and_params(self):
+        rd.seed(0)
+        model = UAVStrikeModel(n_targets=3, n_uavs=5, endurance=100)
+        model.set_param('OutputFlag', 0)
+        model.optimize()
+        model.freeze(model.solution()['Model']['finaltime'] / 2)
+        frozen = [key for key in model.frozen['x1'] if key in model.x1]
+        self.assertGreater(len(frozen), 0)
+        lns_solve(model, time_limit=5, sub_time_limit=1, max_iterations=3)
+        self.assertTrue(all(model.x1[key].LB == 1 for key in frozen), msg="Frozen arcs released by LNS")
+        self.assertEqual(model.params, {'OutputFlag': 0})
+        self.assertGreaterEqual(model.m.Params.TimeLimit, gp.GRB.INFINITY)
+
+class TestReplanning(unittest.TestCase):
+    def test_replan_keeps_frozen_prefix(self):
+        for formulation in ['standard', 'tight']:
+            rd.seed(0)
+            model = UAVStrikeModel(n_targets=3, n_uavs=6, endurance=100, formulation=formulation)
+            model.m.setParam('OutputFlag', 0)
+            model.set_active_targets([1, 2])
+            model.optimize()
+            plan = model.solution()
+            self.assertFalse(any(plan['x1'][key] > 0.5 for key in model.x1 if key[1] == 3), msg="Inactive target visited")
+            elapsed = plan['Model']['finaltime'] / 2
+            model.replan(elapsed, targets=[1, 2, 3], solution=plan)
+            self.assertEqual(model.m.status, gp.GRB.OPTIMAL)
+            self.assertTrue(model.verify()['feasible'])
+            frozen, snapshot = model.frozen, model.snapshot()
+            self.assertGreater(len(frozen['x1']), 0)
+            self.assertTrue(set(frozen['x1']) <= set(snapshot.active('x1')), msg="Frozen arc not used")
+            for key, value in frozen['t1'].items():
+                self.assertAlmostEqual(snapshot.value('t1', key), value, msg="Frozen task time changed")
+            for k in [1, 2, 3]:
+                self.assertGreaterEqual(snapshot.value('t1', (3, k)), elapsed - 1e-6, msg="New target served before it appeared")
+
+            fresh = UAVStrikeModel(n_targets=3, n_uavs=6, endurance=100, timedict=model.time, formulation=formulation)
+            fresh.m.setParam('OutputFlag', 0)
+            fresh.freeze(elapsed, plan)
+            fresh.optimize()
+            self.assertAlmostEqual(model.m.objVal, fresh.m.objVal, msg="Replanning in place differs from a rebuild")
+
+            model.unfreeze()
+            self.assertIsNone(model.frozen)
+            model.optimize()
+            self.assertLessEqual(model.m.objVal, fresh.m.objVal + 1e-6)
+
+class TestResultStore(unittest.TestCase):
+    def test_append_query_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ResultStore(tmpdir)
+            models = []
+            for n, w in [(1, 3), (2, 3), (2, 5)]:
+                model = UAVStrikeModel(n_targets=n, n_uavs=w, endurance=100)
+                model.m.setParam('OutputFlag', 0)
+                model.optimize()
+                models.append(model)
+            first = models[0].save(f'{models[0].n}_{models[0].w}', store=store)
+            ids = [first] + store.append(models[1:], name='batch')
+            self.assertEqual(len(store.runs()), 3)
+            self.assertEqual(list(store.runs(n=2, w=(4, None))['run_id']), [ids[2]])
+            self.assertEqual(store.latest('batch'), ids[2])
+            store.compact()
+            for run_id, model in zip(ids, models):
+                solution, expected = store.load(run_id), model.solution()
+                for name in ['x1', 'x2', 't1', 't2']:
+                    self.assertEqual(solution[name].keys(), expected[name].keys())
+                    for key, value in expected[name].items():
+                        self.assertAlmostEqual(solution[name][key], value, msg=f"{name}{key} differs after loading")
+                self.assertAlmostEqual(solution['Model']['finaltime'], expected['Model']['finaltime'])
+                self.assertEqual(len(store.variables([run_id], var='x1')), sum(value != 0 for value in expected['x1'].values()))
+
+class TestBenchmark(unittest.TestCase):
+    def test_baseline_comparison(self):
+        catalog = [spec for spec in CATALOG if spec['name'] in ('random_2x5', 'geo_2x4')]
+        results = run_benchmarks(catalog, repeats=1, plots=False)
+        self.assertEqual(list(results['instance']), ['random_2x5', 'geo_2x4'])
+        self.assertTrue((results['status'] == gp.GRB.OPTIMAL).all())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'baseline.csv')
+            save_baseline(results, path)
+            self.assertEqual(len(compare_to_baseline(results, path)), 0)
+            slower = results.copy()
+            slower.loc[0, 'optimize'] += 1.0
+            slower.loc[1, 'num_constrs'] += 1
+            regressions = compare_to_baseline(slower, path)
+            self.assertEqual(set(zip(regressions['instance'], regressions['quantity'], regressions['kind'])),
+                             {('random_2x5', 'optimize', 'timing'), ('geo_2x4', 'num_constrs', 'model')})
+            # Plot times vary by tens of milliseconds between runs and are not reported for that
+            noisy = results.copy()
+            noisy.loc[0, 'plot'] = noisy.loc[0, 'plot'] * 1.3 + 0.05
+            self.assertNotIn('plot', set(compare_to_baseline(noisy, path)['quantity']))
+
+class TestResultCache(unittest.TestCase):
+    def test_fingerprint(self):
+        model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100)
+        same = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100.0, timedict=dict(model.time))
+        self.assertEqual(model_fingerprint(model), model_fingerprint(same))
+        same.set_delay(2)
+        self.assertNotEqual(model_fingerprint(model), model_fingerprint(same))
+
+    def test_hit_skips_solve(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(tmpdir)
+            model = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100)
+            first = cache.solve(model)
+            self.assertFalse(first['cached'])
+            again = UAVStrikeModel(n_targets=2, n_uavs=3, endurance=100, timedict=model.time)
+            second = solve_warm(again, start=first['solution'], cache=cache)
+            self.assertTrue(second['cached'])
+            self.assertFalse(again.built, msg="Cached instance was built for its warm start")
+            self.assertEqual(again.m.SolCount, 0, msg="Cached instance was solved again")
+            self.assertEqual(second['objective_value'], first['objective_value'])
+            self.assertEqual(second['solution']['x1'], first['solution']['x1'])
+
+    def test_eviction_and_stale_versions(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(tmpdir, max_bytes=1)
+            for key in ['a', 'b']:
+                cache.put(key, {'status': 2, 'objective_value': 1.0, 'elapsed_time': 0.0, 'solution': None})
+            self.assertEqual(os.listdir(cache.directory), [], msg="Entries above max_bytes were not evicted")
+            os.makedirs(os.path.join(tmpdir, 'v0'))
+            cache.clear_stale()
+            self.assertEqual(os.listdir(tmpdir), [os.path.basename(cache.directory)])
+
 if __name__ == '__main__':
     unittest.main()
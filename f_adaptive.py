@@ -0,0 +1,76 @@
+import numpy as np
+
+def same_value(a, b, rtol=1e-4):
+    # Two objective values are the same when both are NaN (no solution) or equal within rtol, by default the
+    # Gurobi MIPGap, within which two optimal solves of one instance can differ
+    if np.isnan(a) or np.isnan(b):
+        return bool(np.isnan(a) and np.isnan(b))
+    return bool(np.isclose(a, b, rtol=rtol, atol=0))
+
+def bisect_grid(size, evaluate, rtol=1e-4):
+    """
+    Values of evaluate(index) for index 0, ..., size - 1 of a grid along which they are monotone (either
+    direction), with NaN for points without a solution, which have to lie at one end. Between two points with
+    the same value every point has that value too, so the grid is bisected: only intervals whose end points differ
+    are split, and the points left out are filled in. This finds feasibility thresholds and objective breakpoints
+    with a few solves per breakpoint instead of one per point. Points are evaluated in ascending order within each
+    interval. Returns the array of values and a boolean array of the points that were evaluated.
+    """
+    values = np.full(size, np.nan)
+    solved = np.zeros(size, dtype=bool)
+
+    def value(index):
+        if not solved[index]:
+            values[index] = evaluate(index)
+            solved[index] = True
+        return values[index]
+
+    intervals = [(0, size - 1)] if size else []
+    while intervals:
+        low, high = intervals.pop()
+        first, last = value(low), value(high)
+        if high - low <= 1:
+            continue
+        if same_value(first, last, rtol):
+            values[low + 1:high] = first
+            continue
+        middle = (low + high) // 2
+        intervals += [(middle, high), (low, middle)]  # The lower half is taken first
+    return values, solved
+
+def refine_grid(shape, evaluate, rtol=1e-4):
+    """
+    Values of evaluate(i, j) on a 2D grid along whose both axes they are monotone in the same direction (e.g.
+    speed and endurance, more of either never makes the optimum worse), NaN for points without a solution. When
+    the lowest and highest corner of a rectangle have the same value, all points in it have that value, so the grid
+    is split into rectangles and only those whose corners differ are refined, down to single cells: points are
+    only evaluated where neighbouring cells differ. Returns the array of values and a boolean array of the
+    points that were evaluated.
+    """
+    values = np.full(shape, np.nan)
+    solved = np.zeros(shape, dtype=bool)
+
+    def value(i, j):
+        if not solved[i, j]:
+            values[i, j] = evaluate(i, j)
+            solved[i, j] = True
+        return values[i, j]
+
+    rectangles = [(0, shape[0] - 1, 0, shape[1] - 1)] if min(shape) else []
+    while rectangles:
+        i0, i1, j0, j1 = rectangles.pop()
+        lowest, highest = value(i0, j0), value(i1, j1)
+        if same_value(lowest, highest, rtol):
+            block = values[i0:i1 + 1, j0:j1 + 1]
+            block[~solved[i0:i1 + 1, j0:j1 + 1]] = lowest
+            continue
+        if i1 - i0 <= 1 and j1 - j0 <= 1:
+            value(i0, j1), value(i1, j0)  # A single cell, its other corners are evaluated too
+            continue
+        if i1 - i0 >= j1 - j0:  # Split the longer side
+            middle = (i0 + i1) // 2
+            rectangles += [(middle, i1, j0, j1), (i0, middle, j0, j1)]
+        else:
+            middle = (j0 + j1) // 2
+            rectangles += [(i0, i1, middle, j1), (i0, i1, j0, middle)]
+    return values, solved
@@ -0,0 +1,154 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+import time as tm
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from UAVModelClass import UAVStrikeModel
+from f_helper import create_time_dictionary
+from f_results import ResultStore
+from f_visualisation import plot_time_space_network, NetworkMap, plot_locations
+from coordinates import starting_locations, target_locations, center_location
+
+BASELINE = 'Results/benchmark_baseline.csv'
+PHASES = ['setup_data', 'setup_variables', 'setup_constraints', 'setup_objective', 'optimize', 'save', 'plot']
+# Seconds a phase has to slow down by before it is reported, on top of the relative tolerance. Saving and plotting
+# go through the file system and Matplotlib and vary by tens of milliseconds between runs, and so does the total.
+MIN_SECONDS = {'save': 0.05, 'plot': 0.1, 'total': 0.1}
+
+# Fixed catalog of benchmark instances. Random instances draw their time data with setup_data from their seed
+# (see f_instances), geographic ones use the first n targets and w starting locations of coordinates.py.
+CATALOG = [
+    {'name': 'random_2x5', 'kind': 'random', 'n': 2, 'w': 5, 'endurance': 100, 'seed': 0},
+    {'name': 'random_3x6', 'kind': 'random', 'n': 3, 'w': 6, 'endurance': 100, 'seed': 1},
+    {'name': 'random_3x8_matrix', 'kind': 'random', 'n': 3, 'w': 8, 'endurance': 100, 'seed': 2, 'builder': 'matrix'},
+    {'name': 'random_3x6_tight', 'kind': 'random', 'n': 3, 'w': 6, 'endurance': 100, 'seed': 3, 'formulation': 'tight'},
+    {'name': 'geo_2x4', 'kind': 'geographic', 'n': 2, 'w': 4, 'endurance': 360, 'speed': 89},
+    {'name': 'geo_3x6', 'kind': 'geographic', 'n': 3, 'w': 6, 'endurance': 360, 'speed': 89},
+    {'name': 'geo_3x6_fast', 'kind': 'geographic', 'n': 3, 'w': 6, 'endurance': 360, 'speed': 120, 'obj': 1},
+]
+
+def catalog_model(spec):
+    # UAVStrikeModel of a catalog entry, not built yet, with logging off and one thread
+    options = {'obj': spec.get('obj', 2), 'builder': spec.get('builder', 'loop'), 'formulation': spec.get('formulation', 'standard')}
+    if spec['kind'] == 'random':
+        model = UAVStrikeModel(spec['n'], spec['w'], spec['endurance'], spec.get('delay', 1), seed=spec['seed'], **options)
+    else:
+        starts = dict(list(starting_locations.items())[:spec['w']])
+        targets = dict(list(target_locations.items())[:spec['n']])
+        start_time = tm.time()
+        time = create_time_dictionary(starts, targets, spec['speed'])
+        data = tm.time() - start_time
+        model = UAVStrikeModel(spec['n'], spec['w'], spec['endurance'], spec.get('delay', 1), time, **options)
+        model.timings['data'] += data
+    model.set_param('OutputFlag', 0)
+    model.set_param('Threads', 1)  # Comparable timings on any machine
+    model.set_param('Seed', spec.get('seed', 0))
+    return model
+
+def benchmark_instance(spec, plots=True, trace_memory=False):
+    """
+    Run one catalog entry through every phase: setup_data, setup_variables, setup_constraints, setup_objective (the
+    phases of UAVStrikeModel.timings), optimize, save (to a temporary ResultStore) and plot (plot_time_space_network,
+    NetworkMap and, for geographic instances, plot_locations). Returns one row with the seconds per phase, the
+    peak memory allocated by Python during all phases (tracemalloc, MB), the model size and the objective.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        model = catalog_model(spec)
+        model.build()
+        model.optimize()
+        seconds = {f'setup_{phase}': model.timings[phase] for phase in ['data', 'variables', 'constraints', 'objective']}
+        seconds['optimize'] = model.timings['solve']
+        with tempfile.TemporaryDirectory() as directory:
+            start_time = tm.time()
+            model.save(spec['name'], store=ResultStore(directory))
+            seconds['save'] = tm.time() - start_time
+        start_time = tm.time()
+        solution = model.solution()
+        if plots and solution is not None:
+            plot_time_space_network(solution)
+            NetworkMap(model)
+            if spec['kind'] == 'geographic':
+                starts = dict(list(starting_locations.items())[:spec['w']])
+                targets = dict(list(target_locations.items())[:spec['n']])
+                plot_locations(starts, targets, solution['x1'], solution['x2'], center_location)
+            plt.close('all')
+        seconds['plot'] = tm.time() - start_time
+        peak = tracemalloc.get_traced_memory()[1] / 2**20 if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    m = model.m
+    return dict({'instance': spec['name']}, **seconds, total=sum(seconds.values()), peak_python_mb=peak,
+                num_vars=m.NumVars, num_constrs=m.NumConstrs, num_nonzeros=m.NumNZs,
+                status=model.result.status, objective=model.result.objective)
+
+def run_benchmarks(catalog=None, repeats=5, plots=True):
+    """
+    Benchmark every catalog entry (default CATALOG) `repeats` times and return one row per instance with the
+    fastest seconds of every phase (the run least disturbed by other work on the machine), plus one more run per
+    instance for the peak memory.
+    """
+    catalog = catalog or CATALOG
+    rows = [benchmark_instance(spec, plots) for spec in catalog for _ in range(repeats)]
+    df = pd.DataFrame(rows).drop(columns='peak_python_mb')
+    df['peak_python_mb'] = df['instance'].map({spec['name']: benchmark_instance(spec, plots, trace_memory=True)['peak_python_mb'] for spec in catalog})
+    aggregation = {column: 'min' for column in PHASES + ['total']}
+    aggregation['peak_python_mb'] = 'first'
+    aggregation.update({column: 'first' for column in ['num_vars', 'num_constrs', 'num_nonzeros', 'status', 'objective']})
+    return df.groupby('instance', sort=False).agg(aggregation).reset_index()
+
+def save_baseline(df, path=BASELINE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    df.to_csv(path, index=False)
+
+def compare_to_baseline(df, path=BASELINE, tolerance=0.25, min_seconds=0.01):
+    """
+    Compare a benchmark run with the stored baseline. A phase is slower when it takes more than (1 + tolerance)
+    times its baseline seconds and at least min_seconds (MIN_SECONDS for save and plot) longer, as shorter
+    differences are within timer noise; peak memory by the same factor. Timings depend on the machine the baseline
+    was taken on, so these changes are only advisory ('timing'); a different model size or objective is always
+    reported as a 'model' change. Returns one row per instance and quantity that changed beyond this, with its kind,
+    the baseline and current values and their ratio.
+    """
+    baseline = pd.read_csv(path).set_index('instance')
+    rows = []
+    for row in df.to_dict('records'):
+        if row['instance'] not in baseline.index:
+            continue
+        base = baseline.loc[row['instance']]
+        for column in PHASES + ['total', 'peak_python_mb']:
+            slack = max(min_seconds, MIN_SECONDS.get(column, 0.0)) if column in PHASES + ['total'] else 0.0
+            if row[column] > base[column] * (1 + tolerance) and row[column] - base[column] > slack:
+                rows.append({'instance': row['instance'], 'quantity': column, 'kind': 'timing', 'baseline': base[column],
+                             'current': row[column], 'ratio': row[column] / base[column] if base[column] else np.inf})
+        for column in ['num_vars', 'num_constrs', 'num_nonzeros', 'objective']:
+            if not np.isclose(row[column], base[column], equal_nan=True):
+                rows.append({'instance': row['instance'], 'quantity': column, 'kind': 'model', 'baseline': base[column],
+                             'current': row[column], 'ratio': row[column] / base[column] if base[column] else np.inf})
+    return pd.DataFrame(rows, columns=['instance', 'quantity', 'kind', 'baseline', 'current', 'ratio'])
+
+if __name__ == "__main__":
+    # python f_benchmark.py runs the suite and compares it with the baseline (exit code 1 when a model size or
+    # objective changed, slower phases are only printed); python f_benchmark.py --update stores the run as the new baseline
+    results = run_benchmarks()
+    print(results.to_string(index=False))
+    if '--update' in sys.argv or not os.path.exists(BASELINE):
+        save_baseline(results)
+        print(f'Baseline saved to {BASELINE}')
+    else:
+        changes = compare_to_baseline(results)
+        timing = changes[changes['kind'] == 'timing']
+        model = changes[changes['kind'] == 'model']
+        if len(timing):
+            print('Slower than the baseline (advisory, timings depend on the machine):')
+            print(timing.to_string(index=False))
+        if len(model):
+            print('Model size or objective changed against the baseline:')
+            print(model.to_string(index=False))
+            sys.exit(1)
+        print('No model changes against the baseline')
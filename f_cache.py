@@ -0,0 +1,141 @@
+import os
+import glob
+import shutil
+import hashlib
+import pickle
+import numpy as np
+from gurobipy import GRB
+from UAVModelClass import FORMULATION_VERSION
+
+# Only definitive outcomes are cached, a time limited or interrupted solve could do better next time
+CACHED_STATUSES = (GRB.OPTIMAL, GRB.INFEASIBLE)
+CACHED_GAP = 1e-4  # Gurobi's default MIPGap, optimal solves stopped at a looser gap target are not cached
+
+def fingerprint(n, w, T, delay, obj, time, version=FORMULATION_VERSION):
+    """
+    Content hash of an instance: sizes, endurance, delay, objective and the full time dictionary.
+    Numbers are hashed as floats, so 100 and 100.0 give the same fingerprint, and the endurance as one value
+    per UAV, so a single fleet endurance and the same value repeated for every UAV do as well.
+    """
+    endurance = tuple(float(value) for value in np.broadcast_to(np.asarray(T, dtype=float), (w,)))
+    h = hashlib.sha256()
+    h.update(repr((version, n, w, endurance, float(delay), obj)).encode())
+    for key in sorted(time):
+        h.update(repr((key, float(time[key]))).encode())
+    return h.hexdigest()
+
+def model_fingerprint(model, endurance=True):
+    # Fingerprint of the instance currently held by a UAVStrikeModel (after any set_* updates); without endurance
+    # the same for every endurance of the instance (see f_reuse)
+    key = fingerprint(model.n, model.w, model.T if endurance else 0, model.delay, model.obj, model.time)
+    if len(model.active) < model.n or model.frozen is not None:
+        # Switched off targets and a frozen part of the mission (see UAVStrikeModel.replan) change the instance as well
+        frozen = model.frozen and {name: sorted(value.items()) if isinstance(value, dict) else value for name, value in model.frozen.items()}
+        key = hashlib.sha256(repr((key, sorted(model.active), frozen)).encode()).hexdigest()
+    return key
+
+def model_result(model):
+    """
+    Outcome of the last optimize() call in the format stored by ResultCache. objective_value is the best
+    solution found, also when the solve stopped at a time limit or gap target, best_bound and gap tell how
+    far from optimal it may be (None if the solve ended without a solution).
+    """
+    result = model.result
+    solved = result.sol_count > 0
+    return {
+        'status': result.status,
+        'objective_value': result.objective if solved else None,
+        'best_bound': result.bound if solved else None,
+        'gap': result.gap if solved else None,
+        'elapsed_time': model.elapsed_time,
+        'solution': model.solution(),  # Same dictionary as written by UAVStrikeModel.save
+        'cached': False
+    }
+
+class ResultCache:
+    """
+    On-disk cache of solved instances, keyed by their fingerprint.
+
+    Every entry is a pickle under directory/v<FORMULATION_VERSION>/, so a formulation change starts
+    with an empty cache and clear_stale() deletes the entries of older versions. When the entries
+    take more than max_bytes, the least recently used ones are evicted.
+    """
+    def __init__(self, directory='Results/cache', max_bytes=100 * 2**20):
+        self.root = directory
+        self.directory = os.path.join(directory, f'v{FORMULATION_VERSION}')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def get(self, key):
+        # Cached result for key or None; a hit refreshes the entry's modification time for the LRU order
+        try:
+            with open(self.path(key), 'rb') as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        os.utime(self.path(key))
+        self.hits += 1
+        return dict(entry, cached=True)
+
+    def put(self, key, result):
+        # Write to a temporary file first, so parallel sweep workers never read a partial entry
+        entry = {name: value for name, value in result.items() if name != 'cached'}
+        tmp = f'{self.path(key)}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        # Delete least recently used entries until the cache fits in max_bytes
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.pkl')):
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:  # Evicted by another worker
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        # Delete all entries of the current formulation
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def clear_stale(self):
+        # Delete the entries cached for other formulation versions
+        for path in glob.glob(os.path.join(self.root, 'v*')):
+            if os.path.abspath(path) != os.path.abspath(self.directory):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def solve(self, model, start=None):
+        """
+        Result of the model's current instance: taken from the cache when it was solved before (the model is not
+        built then), otherwise the model is optimized, from the MIP start `start` if given (a solution dictionary,
+        see UAVStrikeModel.set_start), and an optimal or infeasible outcome is stored.
+        """
+        key = model_fingerprint(model)
+        result = self.get(key)
+        if result is not None:
+            return result
+        if start is not None:
+            model.set_start(start)
+        model.optimize()
+        result = model_result(model)
+        if result['status'] in CACHED_STATUSES and (result['gap'] is None or result['gap'] <= CACHED_GAP):
+            self.put(key, result)
+        return result
@@ -1,4 +1,6 @@
 import math
+from collections.abc import Mapping
+import numpy as np
 
 #Define a function to calculate the distance between two geographic coordinates
 def haversine(lat1, lon1, lat2, lon2):
@@ -14,6 +16,14 @@ def haversine(lat1, lon1, lat2, lon2):
 def compute_travel_time(distance, speed):
     return (distance / speed) * 60  # Travel time in minutes
 
+# Speed of every UAV, from a single speed for the whole fleet or a sequence with one speed per UAV
+def speed_per_uav(drone_speed, w):
+    if np.ndim(drone_speed) == 0:
+        return [drone_speed] * w
+    if len(drone_speed) != w:
+        raise ValueError(f"Expected {w} drone speeds, got {len(drone_speed)}")
+    return list(drone_speed)
+
 # Define a function to populate the time dictionary
 def create_time_dictionary(starting_locations, target_locations, drone_speed):
     # Combine target and starting locations into a list
@@ -24,6 +34,7 @@ def create_time_dictionary(starting_locations, target_locations, drone_speed):
     lst_j = range(1, n + w + 1)
     lst_v = range(1, w + 1)
     lst_k = range(1, 4)
+    speeds = speed_per_uav(drone_speed, w)  # drone_speed can also hold one speed per UAV (mixed fleet)
 
     # Task times in minutes
     task_times = {
@@ -44,7 +55,7 @@ def create_time_dictionary(starting_locations, target_locations, drone_speed):
                         loc_i = all_locations[i - 1]
                         loc_j = all_locations[j - 1]
                         distance = haversine(loc_i[0], loc_i[1], loc_j[0], loc_j[1])
-                        travel_time = compute_travel_time(distance, drone_speed)
+                        travel_time = compute_travel_time(distance, speeds[v - 1])
                         total_time = travel_time + task_times[k]
                     else:
                         continue  # Skip other tasks at the same location
@@ -52,4 +63,77 @@ def create_time_dictionary(starting_locations, target_locations, drone_speed):
                     time[i, j, v, k] = total_time
                     # print(f'Time from node {i} to target {j} by drone {v} for task {k}: {total_time:.2f} minutes')
 
-    return time
\ No newline at end of file
+    return time
+
+# Task times in minutes, indexed by task - 1 (classification, delivery, verification)
+TASK_TIMES = np.array([1, 2, 1], dtype=float)
+
+# Vectorized haversine: distance in km between every pair of rows of two (lat, lon) arrays. Leading dimensions
+# are batch dimensions, (..., a, 2) and (..., b, 2) arrays give an (..., a, b) array of distances.
+def haversine_matrix(origins, destinations):
+    R = 6371  # Radius of the Earth in km
+    lat1, lon1 = np.radians(origins[..., 0])[..., :, None], np.radians(origins[..., 1])[..., :, None]
+    lat2, lon2 = np.radians(destinations[..., 0])[..., None, :], np.radians(destinations[..., 1])[..., None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+class TimeTensor(Mapping):
+    """
+    Read-only dictionary view on a dense (nodes, targets, uavs, tasks) array of times.
+    Keys are the 1-based (i, j, v, k) tuples of the time dictionary, so the view can be passed to
+    UAVStrikeModel as timedict. Entries that do not exist (NaN, e.g. classifying a target from itself)
+    are not part of the mapping.
+    """
+    def __init__(self, array):
+        self.array = array
+        self._keys = None
+
+    def __getitem__(self, key):
+        i, j, v, k = key
+        if min(key) < 1:
+            raise KeyError(key)
+        try:
+            value = self.array[i - 1, j - 1, v - 1, k - 1]
+        except IndexError:
+            raise KeyError(key) from None
+        if np.isnan(value):
+            raise KeyError(key)
+        return float(value)
+
+    def keys_array(self):
+        # (entries, 4) array of the 1-based keys of all existing entries, in lexicographic order
+        if self._keys is None:
+            self._keys = np.argwhere(~np.isnan(self.array)) + 1
+        return self._keys
+
+    def __iter__(self):
+        return iter(map(tuple, self.keys_array().tolist()))
+
+    def __len__(self):
+        return len(self.keys_array())
+
+    def values_at(self, keys):
+        # Times of a sequence of (i, j, v, k) keys as one array, without a Python lookup per key
+        idx = np.asarray(list(keys), dtype=int).reshape(-1, 4) - 1
+        return self.array[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3]]
+
+# Vectorized version of create_time_dictionary: the distances between all locations are computed once.
+# drone_speed is a single speed or one speed per UAV, as in create_time_dictionary.
+# Returns the dense (nodes, targets, uavs, tasks) array with NaN for missing entries when dense is set,
+# otherwise a TimeTensor view on it that UAVStrikeModel accepts as time dictionary.
+def create_time_tensor(starting_locations, target_locations, drone_speed, dense=False):
+    targets = np.array(list(target_locations.values()), dtype=float).reshape(-1, 2)
+    all_locations = np.vstack([targets, np.array(list(starting_locations.values()), dtype=float).reshape(-1, 2)])
+    n = len(target_locations)
+    w = len(starting_locations)
+
+    speeds = np.array(speed_per_uav(drone_speed, w), dtype=float)
+    travel = compute_travel_time(haversine_matrix(all_locations, targets)[:, :, None], speeds)  # (nodes, targets, uavs)
+    time = travel[:, :, :, None] + TASK_TIMES
+    same = np.arange(n)
+    time[same, same, :, :] = np.nan  # Only the delivery task is done at the location of the target itself
+    time[same, same, :, 1] = TASK_TIMES[1]
+
+    if dense:
+        return time
+    return TimeTensor(time)
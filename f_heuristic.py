@@ -0,0 +1,155 @@
+import numpy as np
+
+def model_keys(n, w):
+    # Keys of the x1 and x2 variables of UAVStrikeModel, in the order of setup_variables
+    sink = n + w + 1
+    keys1, keys2 = [], []
+    for i in range(1, n + w + 1):
+        for j in range(1, n + 1):
+            if i == j:
+                keys1 += [(i, j, v, 2) for v in range(1, w + 1)]
+            elif i <= n:
+                keys1 += [(i, j, v, k) for v in range(1, w + 1) for k in range(1, 4)]
+            else:
+                keys1 += [(i, j, i - n, k) for k in range(1, 4)]
+    for i in range(1, n + w + 1):
+        keys2 += [(i, sink, v) for v in range(1, w + 1)] if i <= n else [(i, sink, i - n)]
+    return keys1, keys2
+
+def greedy_solution(n_targets, n_uavs, endurance, delay, time, obj=2, restarts=20, seed=0, targets=None):
+    """
+    Feasible plan for the UAV strike problem without the MILP, by list scheduling over the same time dictionary.
+
+    Every target needs a classification, an attack at least delay later and a verification at least delay after
+    the attack. In every step the open task that can be reached first (for obj=2, or most cheaply otherwise) is
+    given to a UAV: a UAV that has not flown yet can wait at its start node, one that has flies on and may only
+    delay its whole route as far as the tasks it already did allow. The rules of the model are kept: a UAV enters
+    every target at most once, does at most one attack, which ends its route (by a self-loop right after it
+    classified the target, or by flying to it), flies a second leg only if an attack is left for it, and stays
+    within its endurance. A purely greedy pass can paint itself into a corner, so after it `restarts` randomized
+    passes (seeded by seed) pick one of the best few moves in every step, and the best plan found is returned.
+    Only the tasks of `targets` (default: all) are planned, see UAVStrikeModel.set_active_targets.
+    Runs in milliseconds. Returns a solution dictionary in the format of UAVStrikeModel.solution(), usable as
+    MIP start (set_start), or None if no pass finds a plan.
+    """
+    rng = np.random.default_rng(seed)
+    best = None
+    for attempt in range(restarts + 1):
+        solution = greedy_pass(n_targets, n_uavs, endurance, delay, time, obj, rng if attempt else None, targets=targets)
+        if solution is not None and (best is None or plan_objective(solution, obj) * (1 if obj != 3 else -1)
+                                     < plan_objective(best, obj) * (1 if obj != 3 else -1)):
+            best = solution
+    return best
+
+def greedy_pass(n_targets, n_uavs, endurance, delay, time, obj=2, rng=None, choices=3, targets=None):
+    # One pass of greedy_solution; with a numpy Generator rng every move is drawn from the `choices` best ones
+    n, w = n_targets, n_uavs
+    lst_j, lst_v = range(1, n + 1), range(1, w + 1)
+    sink = n + w + 1
+    T_v = dict(zip(lst_v, np.broadcast_to(np.asarray(endurance, dtype=float), (w,)).tolist()))
+    targets = set(lst_j if targets is None else targets)
+    if len(targets) >= w:  # Every UAV attacks at most once, and the last attack needs a UAV that does not attack to verify it
+        return None
+
+    node = {v: n + v for v in lst_v}  # Current node of every UAV
+    route = {v: [] for v in lst_v}  # Tasks (j, k) done by every UAV, self-loops excluded
+    used = {v: 0.0 for v in lst_v}  # Flight time so far
+    ended = {v: False for v in lst_v}  # Attacked, the route is over
+    t1, t2 = {}, {v: 0.0 for v in lst_v}
+    stage = {j: 1 if j in targets else 4 for j in lst_j}  # Next task of every target, 4 when done or switched off
+    arcs = []
+
+    def slack(v):
+        # How far the route of v can be delayed without moving a classification too close to its attack
+        return min([t1[j, 2] - delay - t1[j, 1] for j, k in route[v] if k == 1 and stage[j] > 2], default=float('inf'))
+
+    def can_attack_later(v, at, visited, remaining):
+        # A UAV that flies a second leg has to end with an attack it can still reach, or attack where it classifies
+        return stage[at] == 1 or any(stage[j] <= 2 and j not in visited and time[at, j, v, 2] <= remaining for j in lst_j)
+
+    while any(s < 4 for s in stage.values()):
+        committed = sum(len(route[v]) >= 2 and not ended[v] for v in lst_v)
+        unassigned = sum(s <= 2 for s in stage.values())
+        unverified = sum(s <= 3 for s in stage.values())
+        fresh = sum(not route[v] for v in lst_v)
+        candidates = []
+        for j in lst_j:
+            k = stage[j]
+            if k == 4:
+                continue
+            earliest = 0 if k == 1 else t1[j, k - 1] + delay
+            for v in lst_v:
+                if ended[v]:
+                    continue
+                visited = {target for target, _ in route[v]}
+                if k == 2 and len(route[v]) < 2 and committed > unassigned - 1:
+                    continue  # Keep the remaining attacks for the UAVs that already committed to one
+                if k == 2 and unassigned == 1 and unverified > fresh - (not route[v]):
+                    continue  # After the last attack every open verification needs a UAV of its own that has not flown yet
+                if k == 2 and route[v] and route[v][-1] == (j, 1):
+                    # Attack right after the classification: self-loop, free and without timing of its own
+                    candidate = (earliest, 0.0, v, j, k, 0.0, True)
+                elif j not in visited:
+                    travel = time[node[v], j, v, k]
+                    if used[v] + travel > T_v[v]:
+                        continue
+                    if route[v]:
+                        arrival = t1[route[v][-1]] + travel
+                        shift = max(0.0, earliest - arrival)
+                        if shift > slack(v):
+                            continue
+                    else:
+                        arrival, shift = max(travel, earliest), 0.0
+                    if k != 2 and route[v]:
+                        # Second leg: there must be an attack left for the UAV, which it can still reach
+                        if committed + (len(route[v]) == 1) > unassigned or not can_attack_later(v, j, visited | {j}, T_v[v] - used[v] - travel):
+                            continue
+                    candidate = (arrival + shift, travel, v, j, k, shift, False)
+                else:
+                    continue
+                candidates.append(candidate)
+        if not candidates:
+            return None
+        candidates.sort(key=lambda candidate: candidate[:2] if obj == 2 else candidate[1::-1])
+        best = candidates[0] if rng is None else candidates[rng.integers(min(choices, len(candidates)))]
+
+        arrival, travel, v, j, k, shift, loop = best
+        if loop:
+            arcs.append((j, j, v, 2))
+        else:
+            for task in route[v]:  # Delay the route flown so far
+                t1[task] += shift
+            t2[v] += shift
+            if not route[v]:
+                t2[v] = arrival - travel
+            arcs.append((node[v], j, v, k))
+            used[v] += travel
+            route[v].append((j, k))
+            node[v] = j
+        t1[j, k] = arrival
+        stage[j] += 1
+        ended[v] = k == 2
+
+    if any(len(route[v]) >= 2 and not ended[v] for v in lst_v):
+        return None
+    horizon = w * max(T_v.values())  # Big-M of the timing rows, times beyond it are not valid in the model
+    if max(t1.values(), default=0.0) > horizon:
+        return None
+
+    keys1, keys2 = model_keys(n, w)
+    x1 = dict.fromkeys(keys1, 0.0)
+    x1.update(dict.fromkeys(arcs, 1.0))
+    x2 = dict.fromkeys(keys2, 0.0)
+    for v in lst_v:
+        if not ended[v]:
+            x2[node[v], sink, v] = 1.0  # Unused UAVs and UAVs that did a single task fly to the sink
+    return {'x1': x1, 'x2': x2, 't1': t1, 't2': t2,
+            'Model': {'n': n, 'w': w, 'T': endurance, 'delay': delay, 'finaltime': max(t1.values(), default=0.0), 'time': time}}
+
+def plan_objective(solution, obj=2):
+    # Objective value of a solution dictionary: total flight time (1), mission time (2) or UAVs flying to the sink (3)
+    if obj == 1:
+        return sum(solution['Model']['time'][key] for key, value in solution['x1'].items() if value > 0.5)
+    if obj == 2:
+        return solution['Model']['finaltime']
+    return sum(value > 0.5 for value in solution['x2'].values())
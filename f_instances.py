@@ -0,0 +1,72 @@
+import numpy as np
+from f_helper import haversine_matrix, compute_travel_time, speed_per_uav, TASK_TIMES, TimeTensor
+
+# Region geographic instances draw their locations from: (min, max) latitude and longitude, around the Philippines
+# like the locations of coordinates.py
+REGION = ((5.0, 19.0), (117.0, 127.0))
+
+def scenario_draws(size):
+    # Uniform draws reserved for one scenario: its size rounded up to the 4 doubles of one Philox block, so every
+    # scenario starts on a block boundary and can be reached with advance()
+    return -(-size // 4) * 4
+
+def scenario_uniforms(size, count=1, seed=0, start=0):
+    """
+    Uniform [0, 1) draws of scenarios start, ..., start + count - 1 of a seed, as a (count, size) array. All
+    scenarios of a seed form one Philox stream with scenario_draws(size) draws each: a batch is taken with one
+    random() call, and any single scenario is regenerated by skipping straight to its position in the stream,
+    so scenario i is the same whether it is drawn alone or as part of a batch.
+    """
+    stride = scenario_draws(size)
+    bit_generator = np.random.Philox(seed)
+    if start:
+        bit_generator = bit_generator.advance(start * stride // 4)
+    return np.random.Generator(bit_generator).random(count * stride).reshape(count, stride)[:, :size]
+
+def random_time_arrays(n_targets, n_uavs, count=1, seed=0, start=0, low=1, high=30):
+    """
+    Dense (count, nodes, targets, uavs, tasks) array of random integer times in [low, high], for every node,
+    target, UAV and task, like the time data drawn by UAVStrikeModel.setup_data.
+    """
+    shape = (n_targets + n_uavs, n_targets, n_uavs, 3)
+    uniforms = scenario_uniforms(int(np.prod(shape)), count, seed, start)
+    return (low + np.floor(uniforms * (high - low + 1))).reshape((count,) + shape)
+
+def random_locations(n_targets, n_uavs, count=1, seed=0, start=0, region=REGION):
+    # (count, targets + uavs, 2) array of (lat, lon) locations drawn uniformly in region, the targets first
+    (lat_min, lat_max), (lon_min, lon_max) = region
+    uniforms = scenario_uniforms(2 * (n_targets + n_uavs), count, seed, start).reshape(count, -1, 2)
+    return np.stack([lat_min + uniforms[..., 0] * (lat_max - lat_min), lon_min + uniforms[..., 1] * (lon_max - lon_min)], axis=-1)
+
+def geographic_time_arrays(n_targets, n_uavs, count=1, seed=0, start=0, drone_speed=89, region=REGION):
+    """
+    Dense (count, nodes, targets, uavs, tasks) array of the times between random locations (see random_locations),
+    with travel times from the haversine distances and the task times added as in create_time_tensor, NaN for
+    the entries that do not exist. drone_speed is one speed or one speed per UAV.
+    """
+    locations = random_locations(n_targets, n_uavs, count, seed, start, region)
+    speeds = np.array(speed_per_uav(drone_speed, n_uavs), dtype=float)
+    distance = haversine_matrix(locations, locations[:, :n_targets])  # (count, nodes, targets)
+    time = compute_travel_time(distance[..., None], speeds)[..., None] + TASK_TIMES
+    same = np.arange(n_targets)
+    time[:, same, same, :, :] = np.nan  # Only the delivery task is done at the location of the target itself
+    time[:, same, same, :, 1] = TASK_TIMES[1]
+    return time
+
+def generate_instances(n_targets, n_uavs, count=1, seed=0, start=0, kind='random', **options):
+    """
+    Time data of scenarios start, ..., start + count - 1 of a seed, as a list of TimeTensor views that
+    UAVStrikeModel accepts as timedict. kind is 'random' (options low, high, see random_time_arrays) or
+    'geographic' (options drone_speed, region, see geographic_time_arrays). The whole batch is drawn at once.
+    """
+    if kind == 'random':
+        arrays = random_time_arrays(n_targets, n_uavs, count, seed, start, **options)
+    elif kind == 'geographic':
+        arrays = geographic_time_arrays(n_targets, n_uavs, count, seed, start, **options)
+    else:
+        raise ValueError(f"Unknown kind '{kind}', expected 'random' or 'geographic'")
+    return [TimeTensor(array) for array in arrays]
+
+def generate_instance(n_targets, n_uavs, seed=0, index=0, kind='random', **options):
+    # Time data of scenario index of a seed alone, the same as in any batch that contains it
+    return generate_instances(n_targets, n_uavs, 1, seed, index, kind, **options)[0]
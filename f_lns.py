@@ -0,0 +1,119 @@
+import time as tm
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+from f_heuristic import plan_objective
+
+def destroy_uavs(model, solution, rng, size):
+    # Free the routes of `size` random UAVs
+    uavs = set(rng.choice(list(model.lst_v), size=min(size, model.w), replace=False).tolist())
+    return [key for key in model.x1 if key[2] in uavs]
+
+def destroy_targets(model, solution, rng, size):
+    # Free every arc into or out of `size` random targets, for all UAVs
+    targets = set(rng.choice(list(model.lst_j), size=min(size, model.n), replace=False).tolist())
+    return [key for key in model.x1 if key[0] in targets or key[1] in targets]
+
+def destroy_related(model, solution, rng, size):
+    # Free the UAVs that serve one random target, topped up with random UAVs, so its tasks can be exchanged
+    target = rng.choice(list(model.lst_j))
+    uavs = {key[2] for key, value in solution['x1'].items() if value > 0.5 and key[1] == target}
+    others = [v for v in model.lst_v if v not in uavs]
+    uavs |= set(rng.choice(others, size=min(max(0, size - len(uavs)), len(others)), replace=False).tolist())
+    return [key for key in model.x1 if key[2] in uavs]
+
+def destroy_latest(model, solution, rng, size):
+    # Free the UAV finishing last (it sets the mission time) and random other UAVs
+    finish = {v: 0.0 for v in model.lst_v}
+    for (i, j, v, k), value in solution['x1'].items():
+        if value > 0.5:
+            finish[v] = max(finish[v], solution['t1'][j, k])
+    latest = max(finish, key=finish.get)
+    others = [v for v in model.lst_v if v != latest]
+    uavs = {latest} | set(rng.choice(others, size=min(size - 1, len(others)), replace=False).tolist())
+    return [key for key in model.x1 if key[2] in uavs]
+
+TRACE_COLUMNS = ['time', 'iteration', 'operator', 'size', 'objective', 'improved']
+DESTROY_OPERATORS = {'uavs': destroy_uavs, 'targets': destroy_targets, 'related': destroy_related, 'latest': destroy_latest}
+
+def restore_params(model, saved):
+    # Set parameters back to their (value, was set with set_param) from before a search; parameters that were not
+    # set before are removed from the model's record again, so configs of the model do not pick them up
+    for name, (value, recorded) in saved.items():
+        model.set_param(name, value)
+        if not recorded:
+            model.params.pop(name, None)
+
+def lns_solve(model, time_limit=60, sub_time_limit=5, operators=None, size=2, patience=10, seed=0, max_iterations=None):
+    """
+    Large neighbourhood search on a UAVStrikeModel for instances the full MILP cannot solve in useful time.
+
+    Starting from the greedy plan (or, if the heuristic finds none, the first solution of the full model), every
+    iteration picks a destroy operator (see DESTROY_OPERATORS; drawn with weights that grow with its successes),
+    fixes all x1 assignments outside the part it frees to their incumbent values and re-optimizes the model for at
+    most sub_time_limit seconds, starting from the incumbent. Solutions that are not worse replace the incumbent.
+    Operators free `size` UAVs or targets; after `patience` iterations without improvement the neighbourhood grows
+    by one, and it falls back to `size` after an improvement. The model itself is reused, only the bounds of x1
+    change, and they are restored at the end. Stops after time_limit seconds, after max_iterations or once a
+    neighbourhood covering the whole model is solved to optimality. Returns the best objective and solution (as
+    solution()) and the trace, a DataFrame with the time, iteration, operator, neighbourhood size and incumbent
+    objective of every iteration.
+    """
+    start_time = tm.time()
+    rng = np.random.default_rng(seed)
+    operators = list(operators or DESTROY_OPERATORS)
+    weights = dict.fromkeys(operators, 1.0)
+    sense = 1 if model.obj != 3 else -1  # Objective 3 is maximized
+    keys = list(model.x1)
+    variables = [model.x1[key] for key in keys]
+    # Bounds before the search (frozen arcs have LB 1, see UAVStrikeModel.freeze), restored after every iteration
+    lower, upper = model.m.getAttr('LB', variables), model.m.getAttr('UB', variables)
+    saved = {name: (model.m.getParamInfo(name)[2], name in model.params) for name in ['TimeLimit', 'OutputFlag', 'SolutionLimit']}
+    model.set_param('OutputFlag', 0)
+
+    solution = model.greedy_solution(seed=seed)
+    if solution is None:
+        model.set_param('SolutionLimit', 1)
+        model.set_param('TimeLimit', time_limit)
+        model.optimize()
+        model.set_param('SolutionLimit', saved['SolutionLimit'][0])
+        solution = model.solution()
+    if solution is None:
+        restore_params(model, saved)
+        return {'objective': None, 'solution': None, 'iterations': 0, 'trace': pd.DataFrame(columns=TRACE_COLUMNS)}
+    objective = plan_objective(solution, model.obj)
+    trace = [(tm.time() - start_time, 0, 'start', size, objective, True)]
+
+    iteration = 0
+    current_size, stalled = size, 0
+    while tm.time() - start_time < time_limit and (max_iterations is None or iteration < max_iterations):
+        iteration += 1
+        name = rng.choice(operators, p=np.array([weights[op] for op in operators]) / sum(weights.values()))
+        free = set(DESTROY_OPERATORS[name](model, solution, rng, current_size))
+        fixed = [(variable, round(solution['x1'][key])) for key, variable in zip(keys, variables) if key not in free]
+        model.m.setAttr('LB', [variable for variable, _ in fixed], [value for _, value in fixed])
+        model.m.setAttr('UB', [variable for variable, _ in fixed], [value for _, value in fixed])
+        model.set_start(solution)
+        model.set_param('TimeLimit', max(0.0, min(sub_time_limit, time_limit - (tm.time() - start_time))))
+        model.optimize()
+        improved = False
+        result = model.result
+        if result.sol_count > 0 and sense * result.objective <= sense * objective + 1e-6:
+            improved = sense * result.objective < sense * objective - 1e-6
+            objective, solution = result.objective, model.solution()
+            weights[name] += improved
+        stalled = 0 if improved else stalled + 1
+        if stalled >= patience:
+            current_size, stalled = current_size + 1, 0
+        elif improved:
+            current_size = size
+        trace.append((tm.time() - start_time, iteration, str(name), current_size, objective, improved))
+        model.m.setAttr('LB', variables, lower)
+        model.m.setAttr('UB', variables, upper)
+        if not fixed and result.status == GRB.OPTIMAL:
+            break  # The neighbourhood grew to the whole model, the incumbent is optimal
+
+    restore_params(model, saved)
+    model.set_start(solution)
+    return {'objective': objective, 'solution': solution, 'iterations': iteration,
+            'trace': pd.DataFrame(trace, columns=TRACE_COLUMNS)}
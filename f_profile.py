@@ -0,0 +1,81 @@
+import os
+import pickle
+import pandas as pd
+from gurobipy import GRB
+
+class SolveProfiler:
+    """
+    Gurobi callback recording the progress of a solve: a time series of incumbent, best bound, gap and
+    explored nodes, the time of the first feasible solution and the time spent in presolve, in the root
+    relaxation and in branching. To keep the overhead low, a point is only recorded when the incumbent or
+    the bound changes, or at most every `interval` seconds otherwise.
+    """
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.reset()
+
+    def reset(self):
+        self.series = []  # (time, incumbent, bound, gap, nodes)
+        self.first_feasible = None  # Time of the first incumbent
+        self.presolve_end = None  # Time of the first callback after presolve
+        self.root_end = None  # Time the first node after the root was explored
+        self._last = None  # Last recorded (incumbent, bound)
+        self._last_time = -float('inf')
+
+    def record(self, time, incumbent, bound, nodes):
+        gap = abs(incumbent - bound) / abs(incumbent) if abs(incumbent) < GRB.INFINITY and incumbent != 0 else float('inf')
+        self.series.append((time, incumbent, bound, gap, nodes))
+        self._last = (incumbent, bound)
+        self._last_time = time
+
+    def __call__(self, model, where):
+        if where == GRB.Callback.PRESOLVE or where == GRB.Callback.POLLING:
+            return
+        time = model.cbGet(GRB.Callback.RUNTIME)
+        if self.presolve_end is None:
+            self.presolve_end = time
+        if where == GRB.Callback.MIPSOL and self.first_feasible is None:
+            self.first_feasible = time
+        elif where == GRB.Callback.MIP:
+            nodes = model.cbGet(GRB.Callback.MIP_NODCNT)
+            if nodes > 0 and self.root_end is None:
+                self.root_end = time
+            incumbent = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            if (incumbent, bound) != self._last or time - self._last_time >= self.interval:
+                self.record(time, incumbent, bound, nodes)
+
+    def result(self, model):
+        """
+        Profile of the finished solve as a dictionary: the series as a list of (time, incumbent, bound, gap,
+        nodes) tuples ending with the final state, the first feasible time and the seconds per phase.
+        """
+        runtime = model.Runtime
+        if model.IsMIP and model.SolCount > 0:
+            self.record(runtime, model.ObjVal, model.ObjBound, model.NodeCount)
+        presolve = self.presolve_end if self.presolve_end is not None else runtime
+        root = (self.root_end if self.root_end is not None else runtime) - presolve
+        return {
+            'series': self.series,
+            'first_feasible': self.first_feasible,
+            'phases': {'presolve': presolve, 'root': root, 'branching': runtime - presolve - root},
+            'runtime': runtime,
+            'nodes': model.NodeCount if model.IsMIP else 0,
+            'status': model.Status
+        }
+
+def profile_frame(profile):
+    # Time series of a profile as a DataFrame
+    return pd.DataFrame(profile['series'], columns=['time', 'incumbent', 'bound', 'gap', 'nodes'])
+
+def save_profile(profile, filename, directory='Results/profiles'):
+    # Save a profile next to the other results, returns the path
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(path, 'wb') as f:
+        pickle.dump(profile, f)
+    return path
+
+def load_profile(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,232 @@
+import os
+import glob
+import pickle
+import time as tm
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+from f_heuristic import model_keys
+
+RUN_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('name', pa.string()),
+    ('created', pa.timestamp('ms')),
+    ('n', pa.int32()),
+    ('w', pa.int32()),
+    ('T', pa.float64()),  # Fleet endurance, the largest one for mixed fleets
+    ('endurance', pa.list_(pa.float64())),  # Endurance of every UAV
+    ('delay', pa.float64()),
+    ('obj', pa.int32()),
+    ('objective', pa.float64()),
+    ('finaltime', pa.float64()),
+    ('status', pa.int32()),
+    ('runtime', pa.float64()),
+    ('formulation', pa.string()),
+])
+
+# One row per nonzero variable; indices that do not apply to a variable are 0 (nodes, UAVs and tasks start at 1)
+VARIABLE_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('var', pa.string()),  # x1, x2, t1, t2 or t
+    ('i', pa.int32()),
+    ('j', pa.int32()),
+    ('v', pa.int32()),
+    ('k', pa.int32()),
+    ('value', pa.float64()),
+])
+
+def variable_rows(run_id, solution, finaltime):
+    # Columns of the nonzero variables of a solution dictionary
+    columns = {name: [] for name in VARIABLE_SCHEMA.names}
+
+    def add(var, i, j, v, k, value):
+        if value != 0:
+            for name, item in zip(VARIABLE_SCHEMA.names, (run_id, var, i, j, v, k, float(value))):
+                columns[name].append(item)
+
+    for (i, j, v, k), value in solution['x1'].items():
+        add('x1', i, j, v, k, value)
+    for (i, j, v), value in solution['x2'].items():
+        add('x2', i, j, v, 0, value)
+    for (j, k), value in solution['t1'].items():
+        add('t1', 0, j, 0, k, value)
+    for v, value in solution['t2'].items():
+        add('t2', 0, 0, v, 0, value)
+    add('t', 0, 0, 0, 0, finaltime)
+    return columns
+
+def conditions_filter(conditions):
+    """
+    Dataset filter from keyword conditions on run columns: a value selects equal rows, a (low, high) tuple an
+    inclusive range (None for an open end) and a list any of its values. Returns None without conditions.
+    """
+    expression = None
+    for column, condition in conditions.items():
+        field = pc.field(column)
+        if isinstance(condition, tuple):
+            low, high = condition
+            parts = [part for part in [None if low is None else field >= low, None if high is None else field <= high] if part is not None]
+        elif isinstance(condition, (list, set, range)):
+            parts = [field.isin(list(condition))]
+        else:
+            parts = [field == condition]
+        for part in parts:
+            expression = part if expression is None else expression & part
+    return expression
+
+class ResultStore:
+    """
+    Columnar store of solved runs, replacing the per-run pickles in Results/.
+
+    Two Parquet datasets under directory: runs/ with one row of metadata per run (see RUN_SCHEMA) and variables/
+    with one row per nonzero decision variable (see VARIABLE_SCHEMA). Every append writes new files, so runs from
+    many processes can be added without rewriting earlier ones; compact() merges the files. Queries push their
+    conditions down to the Parquet row groups and read the files memory-mapped, so selecting a few runs out of
+    many only reads the parts of the files they are in.
+    """
+    def __init__(self, directory='Results/store'):
+        self.directory = directory
+        self.runs_directory = os.path.join(directory, 'runs')
+        self.variables_directory = os.path.join(directory, 'variables')
+        os.makedirs(self.runs_directory, exist_ok=True)
+        os.makedirs(self.variables_directory, exist_ok=True)
+
+    def append(self, runs, name=None):
+        """
+        Add one run or a list of runs, each a solved UAVStrikeModel or a solution dictionary (as returned by
+        solution() or loaded from an old pickle in Results/), under the given name. Runs without a solution are
+        skipped. All runs of one call go into one file per dataset. Returns the ids of the added runs.
+        """
+        if not isinstance(runs, (list, tuple)):
+            runs = [runs]
+        metadata = {column: [] for column in RUN_SCHEMA.names}
+        variables = {column: [] for column in VARIABLE_SCHEMA.names}
+        run_ids = []
+        created = pd.Timestamp.now()
+        for run in runs:
+            if isinstance(run, dict):
+                solution, info = run, {'obj': None, 'objective': None, 'status': None, 'runtime': None, 'formulation': None}
+            else:
+                solution = run.solution()
+                if solution is None:
+                    continue
+                info = {'obj': run.obj, 'objective': run.result.objective, 'status': run.result.status, 'runtime': run.elapsed_time,
+                        'formulation': run.formulation}
+            model = solution['Model']
+            finaltime = model.get('finaltime', max(solution['t1'].values(), default=0.0))  # Not saved by older versions
+            run_id = uuid.uuid4().hex
+            endurance = np.broadcast_to(np.asarray(model['T'], dtype=float), (model['w'],)).tolist()
+            row = dict(info, run_id=run_id, name=name, created=created, n=model['n'], w=model['w'], T=max(endurance),
+                       endurance=endurance, delay=model['delay'], finaltime=finaltime)
+            for column in RUN_SCHEMA.names:
+                metadata[column].append(row[column])
+            for column, values in variable_rows(run_id, solution, finaltime).items():
+                variables[column] += values
+            run_ids.append(run_id)
+        if run_ids:
+            part = f'part-{tm.time_ns()}-{os.getpid()}.parquet'
+            # Variables first, so a run is never listed before its variables can be read
+            self._write(pa.table(variables, schema=VARIABLE_SCHEMA), os.path.join(self.variables_directory, part))
+            self._write(pa.table(metadata, schema=RUN_SCHEMA), os.path.join(self.runs_directory, part))
+        return run_ids
+
+    def _write(self, table, path):
+        # Write to a temporary file first, readers never see a partial file
+        tmp = f'{path}.tmp'
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    def _read(self, directory, schema, columns=None, filter=None):
+        files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+        if not files:
+            return schema.empty_table().select(columns or schema.names).to_pandas()
+        dataset = ds.dataset(files, schema=schema, format=ds.ParquetFileFormat(
+            default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=False)),
+            filesystem=fs.LocalFileSystem(use_mmap=True))
+        return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+    def runs(self, columns=None, filter=None, **conditions):
+        """
+        Metadata of the stored runs as a DataFrame. Select runs with keyword conditions on any run column, e.g.
+        runs(n=3, w=(5, 8), T=[100, 200], objective=(None, 20)) (see conditions_filter), or a pyarrow filter.
+        """
+        expression = conditions_filter(conditions)
+        if filter is not None:
+            expression = filter if expression is None else expression & filter
+        return self._read(self.runs_directory, RUN_SCHEMA, columns, expression)
+
+    def variables(self, run_ids=None, var=None, filter=None):
+        # Variable rows of the given runs (default: all) as a DataFrame, optionally only of the variables named var
+        expression = conditions_filter({'run_id': list(run_ids)} if run_ids is not None else {})
+        if var is not None:
+            expression = pc.field('var').isin([var] if isinstance(var, str) else list(var)) if expression is None \
+                else expression & pc.field('var').isin([var] if isinstance(var, str) else list(var))
+        if filter is not None:
+            expression = filter if expression is None else expression & filter
+        return self._read(self.variables_directory, VARIABLE_SCHEMA, filter=expression)
+
+    def latest(self, name=None):
+        # Id of the most recently added run (with the given name), None if there is none
+        runs = self.runs(columns=['run_id', 'created'], **({} if name is None else {'name': name}))
+        return None if runs.empty else runs.sort_values('created', kind='stable')['run_id'].iloc[-1]
+
+    def load(self, run_id=None):
+        """
+        Solution dictionary of a run (default: the latest) in the format of UAVStrikeModel.solution(), with all
+        variables that are not stored set to 0. The time dictionary is not stored; 'time' is None.
+        """
+        run_id = run_id or self.latest()
+        meta = self.runs(run_id=run_id)
+        if meta.empty:
+            raise KeyError(f"No run '{run_id}' in {self.directory}")
+        meta = meta.iloc[0]
+        n, w = int(meta['n']), int(meta['w'])
+        keys1, keys2 = model_keys(n, w)
+        solution = {'x1': dict.fromkeys(keys1, 0.0), 'x2': dict.fromkeys(keys2, 0.0),
+                    't1': {(j, k): 0.0 for j in range(1, n + 1) for k in range(1, 4)},
+                    't2': dict.fromkeys(range(1, w + 1), 0.0)}
+        rows = self.variables([run_id])
+        for var, i, j, v, k, value in rows[['var', 'i', 'j', 'v', 'k', 'value']].itertuples(index=False):
+            if var == 'x1':
+                solution['x1'][i, j, v, k] = value
+            elif var == 'x2':
+                solution['x2'][i, j, v] = value
+            elif var == 't1':
+                solution['t1'][j, k] = value
+            elif var == 't2':
+                solution['t2'][v] = value
+        endurance = list(meta['endurance'])
+        solution['Model'] = {'n': n, 'w': w, 'T': endurance[0] if len(set(endurance)) == 1 else endurance,
+                             'delay': meta['delay'], 'finaltime': meta['finaltime'], 'time': None}
+        return solution
+
+    def compact(self):
+        # Merge all files of both datasets into one file each, with the runs in the order they were added
+        for directory, schema in [(self.variables_directory, VARIABLE_SCHEMA), (self.runs_directory, RUN_SCHEMA)]:
+            files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+            if len(files) < 2:
+                continue
+            table = pa.concat_tables([pq.read_table(path, schema=schema, memory_map=True) for path in files])
+            self._write(table, os.path.join(directory, os.path.basename(files[-1]).replace('part-', 'compact-', 1)))
+            for path in files:
+                os.remove(path)
+
+    def import_pickles(self, directory='Results'):
+        # Add the solutions pickled by the old UAVStrikeModel.save in directory, named after their files
+        run_ids = []
+        for path in sorted(glob.glob(os.path.join(directory, '*'))):
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    solution = pickle.load(f)
+            except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                continue
+            if isinstance(solution, dict) and 'Model' in solution:
+                run_ids += self.append(solution, name=os.path.basename(path))
+        return run_ids
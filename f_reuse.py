@@ -0,0 +1,108 @@
+import numpy as np
+from gurobipy import GRB
+from f_cache import model_fingerprint, model_result, CACHED_GAP
+from f_verify import verify_solution
+
+def solution_columns(model, solution):
+    # Values of a solution dictionary of the model's instance as one vector in the column order of the Gurobi model
+    x = np.zeros(model.m.NumVars)
+    values = [solution[name][key] for name in ['x1', 'x2', 't1', 't2'] for key in getattr(model, name)] + [solution['Model']['finaltime']]
+    x[model.columns()] = values
+    return x
+
+def endurance_usage(model, solution):
+    # Flight time of every UAV in a solution dictionary, the left-hand sides of the model's endurance rows
+    keys = np.array(list(solution['x1']), dtype=int).reshape(-1, 4)
+    values = np.fromiter(solution['x1'].values(), dtype=float, count=len(keys))
+    travel = keys[:, 0] != keys[:, 1]  # The endurance rows count the arcs between nodes, not the attack self-loops
+    weights = model.time_array(map(tuple, keys[travel].tolist())) * values[travel]
+    return np.bincount(keys[travel, 2] - 1, weights=weights, minlength=model.w)
+
+class SolutionReuse:
+    """
+    Outcomes of earlier solves of the same instances at other endurances, to answer a sweep point without a solve.
+
+    Less endurance only tightens the model (the endurance rows and the big-M of w * T in the timing rows), so the
+    best bound of a solve at an endurance at least as large (for every UAV) still bounds the new optimum, and an
+    instance without a solution at a larger endurance has none at a smaller one either. A recorded plan is not
+    necessarily feasible at a smaller endurance, even when its flight times fit: the smaller big-M can cut it off.
+    So the plans whose flight times fit and whose objective reaches the best valid bound within rtol (by default
+    the Gurobi MIPGap) are checked against all rows and bounds of the model at the new endurance (one sparse
+    product, see f_verify.verify_solution); the first that passes is optimal and solve() returns it instead of
+    optimizing. A plan with slack on its endurance rows alone does not prove optimality for a MILP: the bound has
+    to come from an endurance at least as large, so sweeps profit most when the larger endurances are solved first.
+    `reused` counts the solves avoided, `solves` the solves done.
+    """
+    def __init__(self, rtol=CACHED_GAP):
+        self.rtol = rtol
+        self.records = {}  # Per instance (fingerprint without endurance): endurance, usage, objective, bound, infeasible, solution
+        self.reused = 0
+        self.solves = 0
+        self._last = None  # Instance data and key of the last fingerprint, see key
+
+    def key(self, model):
+        # Fingerprint of the model's instance without endurance. Sweeps keep the same time data object for many points,
+        # so the fingerprint is only computed again when the data changed.
+        data = (model.n, model.w, model.delay, model.obj, tuple(sorted(model.active)), model.frozen)
+        if self._last is None or self._last[0] is not model.time or self._last[1] != data:
+            self._last = (model.time, data, model_fingerprint(model, endurance=False))
+        return self._last[2]
+
+    def add(self, model, result):
+        # Record the result (see f_cache.model_result) of the model's current instance
+        records = self.records.setdefault(self.key(model), {
+            'endurance': [], 'usage': [], 'objective': [], 'bound': [], 'infeasible': [], 'solution': []})
+        solution = result['solution']
+        records['endurance'].append([model.T_v[v] for v in model.lst_v])
+        records['usage'].append(endurance_usage(model, solution) if solution is not None else np.full(model.w, np.inf))
+        records['objective'].append(np.nan if result['objective_value'] is None else result['objective_value'])
+        records['bound'].append(np.nan if result['best_bound'] is None else result['best_bound'])
+        records['infeasible'].append(result['status'] == GRB.INFEASIBLE)
+        records['solution'].append(solution)
+
+    def lookup(self, model):
+        # Result for the model's current instance proven by the recorded outcomes, None if they do not prove it
+        records = self.records.get(self.key(model))
+        if records is None:
+            return None
+        limits = np.array([model.T_v[v] for v in model.lst_v], dtype=float)
+        looser = (np.array(records['endurance'], dtype=float) >= limits).all(axis=1)
+        if (looser & np.array(records['infeasible'])).any():
+            return {'status': GRB.INFEASIBLE, 'objective_value': None, 'best_bound': None, 'gap': None, 'elapsed_time': 0.0,
+                    'solution': None, 'cached': False, 'reused': True}
+        sense = -1 if model.obj == 3 else 1  # Objective 3 is maximized
+        objective = sense * np.array(records['objective'], dtype=float)
+        bound = sense * np.array(records['bound'], dtype=float)
+        feasible = (np.array(records['usage']) <= limits + 1e-6).all(axis=1) & ~np.isnan(objective)
+        looser &= ~np.isnan(bound)
+        if not feasible.any() or not looser.any():
+            return None
+        lower = bound[looser].max()
+        candidates = np.flatnonzero(feasible & (objective - lower <= self.rtol * np.maximum(np.abs(objective), 1e-10)))
+        for best in candidates[np.argsort(objective[candidates], kind='stable')]:
+            if verify_solution(model.m, solution_columns(model, records['solution'][best]))['feasible']:
+                break
+        else:
+            return None
+        solution = dict(records['solution'][best])
+        solution['Model'] = dict(solution['Model'], T=model.T)
+        value = float(sense * objective[best])
+        return {'status': GRB.OPTIMAL, 'objective_value': value, 'best_bound': float(sense * lower),
+                'gap': max(0.0, objective[best] - lower) / max(abs(value), 1e-10), 'elapsed_time': 0.0, 'solution': solution,
+                'cached': False, 'reused': True}
+
+    def solve(self, model, cache=None):
+        # Result of the model's current instance: reused when the recorded outcomes prove it, otherwise solved and recorded
+        result = self.lookup(model)
+        if result is not None:
+            self.reused += 1
+            return result
+        if cache is not None:
+            result = cache.solve(model)
+        else:
+            model.optimize()
+            result = model_result(model)
+        if not result['cached']:
+            self.solves += 1
+        self.add(model, result)
+        return result
@@ -3,10 +3,19 @@ import matplotlib.pyplot as plt
 from UAVModelClass import UAVStrikeModel  # Assuming your class is in uav_model.py
 from gurobipy import *
 from matplotlib.colors import LogNorm
-from f_helper import create_time_dictionary
+from f_helper import create_time_tensor, TimeTensor
+from f_instances import generate_instance, generate_instances
+from f_sweep import run_sweep, apply_params, limit_params, split_threads
+from f_cache import model_result
+from f_profile import SolveProfiler, load_profile, profile_frame
+from f_lns import lns_solve
+from f_adaptive import bisect_grid, refine_grid
+from f_reuse import SolutionReuse
 import pandas as pd
 import random as rd
 import seaborn as sns
+import time as tm
+import os
 
 def plot_heatmap(weighted_array, title):
     """
@@ -50,107 +59,377 @@ def plot_heatmap(weighted_array, title):
     plt.show()
 
 
-def generate_heatmap_data(min_targets, max_targets, min_uavs, max_uavs, endurance, delay=1):
+def solve_size_point(n_targets, n_uavs, endurance, delay=1, formulation='standard', cache=None, profile=False, params=None, solver='gurobi'):
+    """
+    Solve one (targets, UAVs) grid point with random time data, as run_sweep point function.
+    With profile the solve is profiled and the path of the saved profile is returned (None for cached points).
+    solver picks the backend ('gurobi' or 'highs', see f_solver).
+    """
+    print('NOW:', ' uav:', n_uavs, ' targets:', n_targets)
+    model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_uavs, endurance=endurance, delay=delay, formulation=formulation, solver=solver)
+    apply_params(model, params)
+    if profile:
+        model.profiler = SolveProfiler()
+    result = solve_warm(model, cache=cache)
+    return {'n_targets': n_targets, 'n_drones': n_uavs, 'status': result['status'], 'objective_value': result['objective_value'],
+            'best_bound': result.get('best_bound'), 'gap': result.get('gap'), 'elapsed_time': result['elapsed_time'], 'cached': result['cached'], 'node_count': model.result.nodes if not result['cached'] else None,
+            'build_time': model.timings.get('build'), 'profile': model.save_profile() if profile and not result['cached'] else None}
+
+def solve_config_point(config, cache=None, params=None):
+    """
+    Solve the instance of a ModelConfig, as run_sweep point function: configs are cheap to send to the workers,
+    which build the models themselves, e.g. run_sweep(solve_config_point, [{'config': config} for config in configs]).
+    Cached points are not built at all.
+    """
+    model = config.model()
+    apply_params(model, params)
+    result = solve_warm(model, cache=cache)
+    return {'n_targets': model.n, 'n_drones': model.w, 'status': result['status'], 'objective_value': result['objective_value'],
+            'best_bound': result.get('best_bound'), 'gap': result.get('gap'), 'elapsed_time': result['elapsed_time'],
+            'cached': result['cached'], 'build_time': model.timings.get('build')}
+
+def load_sweep_profiles(results):
+    """
+    Load the profiles saved by a profiled sweep (results as returned by the sweep, with a 'profile' column) into one
+    DataFrame of time series, with the grid point and its n_targets/n_drones columns in front of every row.
+    """
+    frames = []
+    for row in pd.DataFrame(results).to_dict('records'):
+        if row.get('profile') is None:
+            continue
+        frame = profile_frame(load_profile(row['profile']))
+        for key in ['n_drones', 'n_targets', 'point']:
+            if key in row:
+                frame.insert(0, key, row[key])
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def size_grid(min_targets, max_targets, min_uavs, max_uavs, **point):
+    # run_sweep points of the (targets, UAVs) grid of the heatmaps, skipping equal numbers of targets and UAVs
+    return [dict(point, n_targets=n_targets, n_uavs=n_uavs)
+            for n_targets in range(min_targets, max_targets + 1)
+            for n_uavs in range(min_uavs, max_uavs + 1) if n_targets != n_uavs]
+
+def generate_heatmap_data(min_targets, max_targets, min_uavs, max_uavs, endurance, delay=1, workers=1, threads=None, seed=0, cache=None,
+                          formulation='standard', time_limit=None, mip_gap=None, budget=None, return_results=False):
     """
     Generate heatmap data by varying the number of targets and UAVs.
+    The grid points are independent and are solved by `workers` processes sharing `threads` cores.
+    Points found in the ResultCache `cache` are not solved again, their stored solve time is used.
+    Every point stops at time_limit seconds or at the relative gap mip_gap, and the whole grid at the wall-clock
+    budget (seconds, see run_sweep). Points stopped early keep their solve time as long as they found a solution;
+    with return_results the sweep results (status, objective, best bound and gap of every point) are returned too.
     """
     heatmap_data = np.zeros((max_targets - min_targets + 1, max_uavs - min_uavs + 1))
 
-    for i, n_targets in enumerate(range(min_targets, max_targets + 1)):
-        for j, n_uavs in enumerate(range(min_uavs, max_uavs + 1)):
-            print('NOW:', ' uav:', n_uavs, ' targets:', n_targets)
-            if n_targets != n_uavs:
-                model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_uavs, endurance=endurance, delay=delay)
-                model.optimize()
-                if model.m.status == GRB.OPTIMAL:
-                    heatmap_data[i, j] = model.elapsed_time
-                else:
-                    heatmap_data[i, j] = np.nan  # Assign NaN if no optimal solution found
+    points = size_grid(min_targets, max_targets, min_uavs, max_uavs, endurance=endurance, delay=delay, formulation=formulation, cache=cache)
+    df = run_sweep(solve_size_point, points, workers, threads, seed, limit_params(time_limit, mip_gap), budget)
+    for row in df.itertuples():
+        if pd.notna(row.objective_value):
+            heatmap_data[row.n_targets - min_targets, row.n_drones - min_uavs] = row.elapsed_time
+        else:
+            heatmap_data[row.n_targets - min_targets, row.n_drones - min_uavs] = np.nan  # Assign NaN if no solution found
+    print_limit_report(df)
 
+    if return_results:
+        return heatmap_data, df
     return heatmap_data
 
-def create_random_time_matrix(n_targets, n_drones, max_time=30):
-    time_matrix = {}
-    lst_i = range(1, n_targets + n_drones + 1)
-    lst_j = range(1, n_targets + 1)
-    lst_v = range(1, n_drones + 1)
-    lst_k = range(1, 4)
-    for i in lst_i:
-        for j in lst_j:
-            for v in lst_v:
-                for k in lst_k:
-                    time_matrix[i, j, v, k] = rd.randint(1, max_time)
-    return time_matrix
-
-def sensitivity_analysis_targets_drones(max_targets, max_drones, endurance, delay=1):
-    results = []
-    for n_targets in range(1, max_targets + 1):
-        for n_drones in range(1, max_drones + 1):
-            model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay)
-            model.optimize()
-            if model.m.status == GRB.OPTIMAL:
-                obj_val = model.m.objVal
-            else:
-                obj_val = None
-            results.append({
-                'n_targets': n_targets,
-                'n_drones': n_drones,
-                'objective_value': obj_val,
-                'elapsed_time': model.elapsed_time
-            })
-            print(f"Targets: {n_targets}, Drones: {n_drones}, Objective: {obj_val}, Time: {model.elapsed_time}s")
+def print_limit_report(df):
+    # Summary of the points of a sweep that were not solved to optimality
+    stopped = df[df['status'] != GRB.OPTIMAL]
+    if len(stopped) == 0:
+        return
+    found = stopped['objective_value'].notna()
+    print(f"{len(stopped)} of {len(df)} points not solved to optimality: {found.sum()} with a solution "
+          f"(largest gap {stopped['gap'].max():.2%}), {(~found).sum()} without")
+
+def compare_formulations(min_targets, max_targets, min_uavs, max_uavs, endurance, delay=1, workers=1, threads=None, seed=0, time_limit=None):
+    """
+    Benchmark the tight formulation against the standard one on the heatmap grid. Both solve the same random
+    instances (same seeds); the returned DataFrame has the status, objective, solve time and node count of both.
+    """
+    params = limit_params(time_limit)
+    results = {}
+    for formulation in ['standard', 'tight']:
+        points = size_grid(min_targets, max_targets, min_uavs, max_uavs, endurance=endurance, delay=delay, formulation=formulation)
+        results[formulation] = run_sweep(solve_size_point, points, workers, threads, seed, params).set_index(['n_targets', 'n_drones'])
+    columns = ['status', 'objective_value', 'elapsed_time', 'node_count']
+    df = results['standard'][columns].join(results['tight'][columns], lsuffix='_standard', rsuffix='_tight').reset_index()
+
+    solved = (df['status_standard'] == GRB.OPTIMAL) & (df['status_tight'] == GRB.OPTIMAL)
+    print(f"Both optimal on {solved.sum()} of {len(df)} points, tight only on "
+          f"{((df['status_tight'] == GRB.OPTIMAL) & ~solved).sum()}, standard only on {((df['status_standard'] == GRB.OPTIMAL) & ~solved).sum()}")
+    print(f"Solve time standard {df['elapsed_time_standard'].sum():.2f}s, tight {df['elapsed_time_tight'].sum():.2f}s; "
+          f"nodes standard {df['node_count_standard'].sum():.0f}, tight {df['node_count_tight'].sum():.0f}")
+    return df
+
+def solve_solver_point(n_targets, n_uavs, endurance, delay=1, solver='gurobi', params=None):
+    # solve_size_point for compare_solvers; points a size-limited Gurobi license cannot solve get the status None
+    try:
+        return dict(solve_size_point(n_targets, n_uavs, endurance, delay, params=params, solver=solver), error=None)
+    except GurobiError as error:
+        return {'n_targets': n_targets, 'n_drones': n_uavs, 'status': None, 'objective_value': None,
+                'elapsed_time': None, 'error': str(error)}
+
+def compare_solvers(min_targets, max_targets, min_uavs, max_uavs, endurance, delay=1, workers=1, threads=None, seed=0, time_limit=None):
+    """
+    Benchmark the HiGHS backend against Gurobi on the heatmap grid: both solve the same random instances (same
+    seeds). Throughput is measured per core, as solved points per second of solve time on the cores a point
+    used (the Threads share of Gurobi, all cores when Gurobi decides; HiGHS runs on one). Returns a DataFrame
+    with the status, objective and solve time of both solvers for every point.
+    """
+    params = limit_params(time_limit)
+    cores = {'gurobi': split_threads(workers, threads) or os.cpu_count(), 'highs': 1}
+    results = {}
+    for solver in ['gurobi', 'highs']:
+        points = size_grid(min_targets, max_targets, min_uavs, max_uavs, endurance=endurance, delay=delay, solver=solver)
+        results[solver] = run_sweep(solve_solver_point, points, workers, threads, seed, params).set_index(['n_targets', 'n_drones'])
+    columns = ['status', 'objective_value', 'elapsed_time']
+    df = results['gurobi'][columns].join(results['highs'][columns], lsuffix='_gurobi', rsuffix='_highs').reset_index()
+
+    for solver in ['gurobi', 'highs']:
+        solved = df[f'status_{solver}'] == GRB.OPTIMAL
+        seconds = df.loc[solved, f'elapsed_time_{solver}'].sum()
+        print(f"{solver}: {solved.sum()} of {len(df)} points optimal in {seconds:.2f}s, "
+              f"{solved.sum() / max(seconds * cores[solver], 1e-9):.2f} points per core-second")
+    both = (df['status_gurobi'] == GRB.OPTIMAL) & (df['status_highs'] == GRB.OPTIMAL)
+    differ = (df.loc[both, 'objective_value_gurobi'] - df.loc[both, 'objective_value_highs']).abs() > 1e-6
+    print(f"Both optimal on {both.sum()} points, different objectives on {differ.sum()}; solve time on these points "
+          f"gurobi {df.loc[both, 'elapsed_time_gurobi'].sum():.2f}s, highs {df.loc[both, 'elapsed_time_highs'].sum():.2f}s")
+    return df
+
+def solve_lns_point(n_targets, n_uavs, endurance, delay=1, time_limit=60, sub_time_limit=5, params=None):
+    """
+    Solve one (targets, UAVs) grid point with random time data both by LNS and by the full MILP, each within
+    time_limit seconds, as run_sweep point function.
+    """
+    print('NOW:', ' uav:', n_uavs, ' targets:', n_targets)
+    model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_uavs, endurance=endurance, delay=delay)
+    apply_params(model, params)
+    lns = lns_solve(model, time_limit, sub_time_limit, seed=(params or {}).get('Seed', 0))
+    full = UAVStrikeModel(n_targets, n_uavs, endurance, delay, model.time)
+    apply_params(full, dict(params or {}, TimeLimit=time_limit))
+    full.optimize()
+    result = model_result(full)
+    trace = lns['trace']
+    reached = trace[trace['objective'] <= (result['objective_value'] if result['objective_value'] is not None else -np.inf) + 1e-6]
+    return {'n_targets': n_targets, 'n_drones': n_uavs, 'objective_lns': lns['objective'], 'iterations_lns': lns['iterations'],
+            'time_to_best_lns': trace.loc[trace['improved'], 'time'].max() if len(trace) else None,
+            'time_to_full_lns': reached['time'].min() if len(reached) else None,
+            'status_full': result['status'], 'objective_full': result['objective_value'], 'gap_full': result['gap'],
+            'elapsed_time_full': result['elapsed_time']}
+
+def compare_lns(min_targets, max_targets, min_uavs, max_uavs, endurance, delay=1, time_limit=60, sub_time_limit=5, workers=1, threads=None, seed=0):
+    """
+    Benchmark lns_solve (f_lns) against the full MILP on the heatmap grid, with the same time limit per point.
+    The returned DataFrame has the objective of both, the time the LNS took to its best solution and to reach the
+    MILP's solution (time_to_full_lns), and the status, gap and solve time of the MILP.
+    """
+    points = size_grid(min_targets, max_targets, min_uavs, max_uavs, endurance=endurance, delay=delay, time_limit=time_limit,
+                       sub_time_limit=sub_time_limit)
+    df = run_sweep(solve_lns_point, points, workers, threads, seed)
+    both = df['objective_lns'].notna() & df['objective_full'].notna()
+    print(f"LNS better on {(df['objective_lns'] < df['objective_full'] - 1e-6)[both].sum()}, equal on "
+          f"{((df['objective_lns'] - df['objective_full']).abs() <= 1e-6)[both].sum()}, worse on "
+          f"{(df['objective_lns'] > df['objective_full'] + 1e-6)[both].sum()} of {both.sum()} points with both solutions; "
+          f"LNS only on {(df['objective_lns'].notna() & df['objective_full'].isna()).sum()}")
+    return df
+
+def benchmark_replanning(n_targets, n_new, n_uavs, endurance, delay=1, elapsed=0.5, repeats=5, builder='matrix', seed=0):
+    """
+    Replanning latency when n_new targets appear after `elapsed` (a fraction of the planned mission time) of a mission
+    over n_targets targets, on random instances. Every repeat solves the initial plan on a model with spare target
+    slots and then replans it in place (UAVStrikeModel.replan), and, for comparison, builds a fresh model with all
+    targets, freezes the same part of the mission and solves it. Returns a DataFrame with the latency (seconds from
+    the new targets to the new plan) and the mission time of both.
+    """
+    rows = []
+    for repeat in range(repeats):
+        model = UAVStrikeModel(n_targets + n_new, n_uavs, endurance, delay, builder=builder, seed=seed + repeat)
+        model.m.setParam('OutputFlag', 0)
+        model.set_active_targets(range(1, n_targets + 1))
+        model.optimize()
+        if model.result.sol_count == 0:
+            continue
+        plan = model.solution()
+        now = elapsed * plan['Model']['finaltime']
+
+        start_time = tm.time()
+        model.replan(now, targets=range(1, n_targets + n_new + 1), solution=plan)
+        incremental = tm.time() - start_time
+
+        start_time = tm.time()
+        fresh = UAVStrikeModel(n_targets + n_new, n_uavs, endurance, delay, model.time, builder=builder)
+        fresh.m.setParam('OutputFlag', 0)
+        fresh.freeze(now, plan)
+        fresh.optimize()
+        rebuild = tm.time() - start_time
+        rows.append({'repeat': repeat, 'elapsed': now, 'frozen_arcs': len(model.frozen['x1']) + len(model.frozen['x2']),
+                     'latency_incremental': incremental, 'latency_rebuild': rebuild,
+                     'objective_incremental': model.result.objective, 'objective_rebuild': fresh.result.objective})
+    df = pd.DataFrame(rows)
+    if len(df):
+        print(f"Replanning latency over {len(df)} instances: incremental {df['latency_incremental'].mean() * 1000:.1f} ms, "
+              f"rebuild {df['latency_rebuild'].mean() * 1000:.1f} ms on average")
+    return df
+
+def create_random_time_matrix(n_targets, n_drones, max_time=30, seed=None, index=0):
+    # Random integer times in [1, max_time]: scenario index of the seed (see f_instances), or of a seed drawn from the random module
+    seed = seed if seed is not None else rd.getrandbits(64)
+    return generate_instance(n_targets, n_drones, seed, index, high=max_time)
+
+def warm_start_stats():
+    # Counters filled by solve_warm and printed by print_warm_start_report
+    return {'points': 0, 'cache_hits': 0, 'reused': 0, 'warm_starts': 0, 'solve_time': 0.0, 'compared': 0, 'warm_time': 0.0, 'cold_time': 0.0}
+
+def solve_warm(model, start=None, stats=None, compare_cold=False, params=None, cache=None, reuse=None):
+    """
+    Optimize one sweep point, using the solution of the previous point (if any) as MIP start,
+    and return its result (see f_cache.model_result). Points found in the ResultCache `cache` are not solved,
+    nor are points whose optimum the SolutionReuse `reuse` proves from the outcomes at other endurances (see f_reuse).
+    With compare_cold the point is also solved from scratch (with the same params) to measure the solve time saved.
+    """
+    result = reuse.lookup(model) if reuse is not None else None
+    if result is not None:
+        reuse.reused += 1
+        if stats is not None:
+            stats['points'] += 1
+            stats['reused'] += 1
+        return result
+    if cache is not None:
+        result = cache.solve(model, start)  # The start is only set (and the model built) when the point is not cached
+    else:
+        if start is not None:
+            model.set_start(start)
+        model.optimize()
+        result = model_result(model)
+    if reuse is not None:
+        reuse.solves += not result['cached']
+        reuse.add(model, result)
+    if stats is None:
+        return result
+    stats['points'] += 1
+    if result['cached']:
+        stats['cache_hits'] += 1
+        return result
+    stats['solve_time'] += model.elapsed_time
+    if start is not None:
+        stats['warm_starts'] += 1
+        if compare_cold:
+            cold = UAVStrikeModel(model.n, model.w, model.T, model.delay, model.time, obj=model.obj, builder=model.builder)
+            apply_params(cold, params)
+            cold.optimize()
+            stats['compared'] += 1
+            stats['warm_time'] += model.elapsed_time
+            stats['cold_time'] += cold.elapsed_time
+    return result
+
+def add_warm_start_stats(total, stats):
+    # Add the counters of one sweep point (e.g. returned by a worker) to the sweep totals
+    for key in total:
+        total[key] += stats[key]
+
+def print_warm_start_report(stats):
+    if stats['cache_hits']:
+        print(f"Took {stats['cache_hits']} of {stats['points']} points from the result cache")
+    if stats['reused']:
+        print(f"Solves avoided by reusing earlier solutions: {stats['reused']} of {stats['points']} points")
+    print(f"Warm started {stats['warm_starts']} of {stats['points']} points, total solve time {stats['solve_time']:.2f}s")
+    if stats['compared']:
+        saved = stats['cold_time'] - stats['warm_time']
+        print(f"Solve time saved on {stats['compared']} compared points: {saved:.2f}s "
+              f"({stats['warm_time']:.2f}s warm vs {stats['cold_time']:.2f}s cold)")
+
+def sensitivity_analysis_targets_drones(max_targets, max_drones, endurance, delay=1, workers=1, threads=None, seed=0, cache=None, profile=False,
+                                        time_limit=None, mip_gap=None, budget=None):
+    points = [{'n_targets': n_targets, 'n_uavs': n_drones, 'endurance': endurance, 'delay': delay, 'cache': cache, 'profile': profile}
+              for n_targets in range(1, max_targets + 1) for n_drones in range(1, max_drones + 1)]
+    df = run_sweep(solve_size_point, points, workers, threads, seed, limit_params(time_limit, mip_gap), budget)
+    results = df.to_dict('records')
+    for result in results:
+        print(f"Targets: {result['n_targets']}, Drones: {result['n_drones']}, Objective: {result['objective_value']}, "
+              f"Gap: {result['gap']}, Time: {result['elapsed_time']}s")
+    print_limit_report(df)
     return results
 
-def sensitivity_analysis_time_matrix(n_targets, n_drones, endurance, delay=1, num_matrices=5, max_time=30):
+def sensitivity_analysis_time_matrix(n_targets, n_drones, endurance, delay=1, num_matrices=5, max_time=30, compare_cold=False, cache=None,
+                                     seed=None):
     results = []
-    for _ in range(num_matrices):
-        time_matrix = create_random_time_matrix(n_targets, n_drones, max_time)
-        model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay)
-        model.time = time_matrix
-        model.optimize()
-        if model.m.status == GRB.OPTIMAL:
-            obj_val = model.m.objVal
+    model = None
+    start = None
+    stats = warm_start_stats()
+    seed = seed if seed is not None else rd.getrandbits(64)
+    time_matrices = generate_instances(n_targets, n_drones, num_matrices, seed, high=max_time)  # All matrices in one draw
+    for index, time_matrix in enumerate(time_matrices):
+        if model is None:
+            model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay, timedict=time_matrix)
         else:
-            obj_val = None
+            model.set_time_matrix(time_matrix)  # Reuse the model, only the time coefficients change
+        result = solve_warm(model, start, stats, compare_cold, cache=cache)
+        start = result['solution']
+        obj_val = result['objective_value']
         results.append({
-            'time_matrix': time_matrix,
+            'time_matrix': dict(time_matrix),
+            'seed': seed,
+            'scenario': index,
             'objective_value': obj_val,
-            'elapsed_time': model.elapsed_time
+            'elapsed_time': result['elapsed_time']
         })
-        print(f"Time Matrix Objective: {obj_val}, Time: {model.elapsed_time}s")
+        print(f"Time Matrix Objective: {obj_val}, Time: {result['elapsed_time']}s")
+    print_warm_start_report(stats)
     return results
 
-def sensitivity_analysis_delay(n_targets, n_drones, endurance, max_delay):
+def sensitivity_analysis_delay(n_targets, n_drones, endurance, max_delay, compare_cold=False, cache=None):
     results = []
+    model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=1)
+    start = None
+    stats = warm_start_stats()
     for delay in range(1, max_delay + 1):
-        model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay)
-        model.optimize()
-        if model.m.status == GRB.OPTIMAL:
-            obj_val = model.m.objVal
-        else:
-            obj_val = None
+        model.set_delay(delay)  # Reuse the model, only the sequence rows change
+        result = solve_warm(model, start, stats, compare_cold, cache=cache)
+        start = result['solution']
+        obj_val = result['objective_value']
         results.append({
             'delay': delay,
             'objective_value': obj_val,
-            'elapsed_time': model.elapsed_time
+            'elapsed_time': result['elapsed_time']
         })
-        print(f"Delay: {delay}, Objective: {obj_val}, Time: {model.elapsed_time}s")
+        print(f"Delay: {delay}, Objective: {obj_val}, Time: {result['elapsed_time']}s")
+    print_warm_start_report(stats)
     return results
 
-def sensitivity_analysis_endurance(n_targets, max_drones, max_endurance, delay=1, num_matrices=5, max_time=30):
+def sensitivity_analysis_endurance(n_targets, max_drones, max_endurance, delay=1, num_matrices=5, max_time=30, compare_cold=False, cache=None,
+                                   seed=None, adaptive=False):
+    # adaptive bisects the endurance range instead of solving every endurance, see adaptive_endurance_rows
     results = []
+    stats = warm_start_stats()
+    seed = seed if seed is not None else rd.getrandbits(64)
     for n_drones in range(n_targets, max_drones + 1):
-        for endurance in range(10, max_endurance + 1, 1):
+        if adaptive:
+            results += adaptive_endurance_rows(n_targets, n_drones, range(10, max_endurance + 1), delay, num_matrices, max_time,
+                                               compare_cold, cache, seed, stats)
+            continue
+        model = None
+        start = None
+        endurances = range(10, max_endurance + 1, 1)
+        # Every endurance gets its own matrices: scenarios position * num_matrices, ... of the seed, drawn in one batch
+        batch = generate_instances(n_targets, n_drones, len(endurances) * num_matrices, seed, high=max_time)
+        for position, endurance in enumerate(endurances):
             obj_vals = []
             elapsed_times = []
-            for _ in range(num_matrices):
-                time_matrix = create_random_time_matrix(n_targets, n_drones, max_time)
-                model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay)
-                model.time = time_matrix
-                model.optimize()
-                if model.m.status == GRB.OPTIMAL:
-                    obj_vals.append(model.m.objVal)
-                    elapsed_times.append(model.elapsed_time)
+            for time_matrix in batch[position * num_matrices:(position + 1) * num_matrices]:
+                if model is None:
+                    model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay, timedict=time_matrix)
+                else:
+                    # Reuse the model for this fleet size, only endurance and time coefficients change
+                    model.set_endurance(endurance)
+                    model.set_time_matrix(time_matrix)
+                result = solve_warm(model, start, stats, compare_cold, cache=cache)
+                start = result['solution']
+                if result['objective_value'] is not None:
+                    obj_vals.append(result['objective_value'])
+                    elapsed_times.append(result['elapsed_time'])
                 else:
                     obj_vals.append(None)
                     elapsed_times.append(None)
@@ -163,31 +442,105 @@ def sensitivity_analysis_endurance(n_targets, max_drones, max_endurance, delay=1
                 'elapsed_time': avg_elapsed_time
             })
             print(f"Drones: {n_drones}, Endurance: {endurance}, Average Objective: {avg_obj_val}, Average Time: {avg_elapsed_time}s")
+    print_warm_start_report(stats)
     return results
 
-def combined_sensitivity_analysis(max_targets, max_drones, endurance, delay, num_matrices=5, max_time=30):
-    results = []
-    for n_targets in range(1, max_targets + 1):
-        for n_drones in range(n_targets + 1, max_drones + 1):
-            for _ in range(num_matrices):
-                time_matrix = create_random_time_matrix(n_targets, n_drones, max_time)
-                model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay)
-                model.time = time_matrix
-                model.optimize()
-                if model.m.status == GRB.OPTIMAL:
-                    obj_val = model.m.objVal
-                else:
-                    obj_val = None
-                results.append({
-                    'n_targets': n_targets,
-                    'n_drones': n_drones,
-                    'delay': delay,
-                    'time_matrix': time_matrix,
-                    'objective_value': obj_val,
-                    'elapsed_time': model.elapsed_time
-                })
-                print(f"Targets: {n_targets}, Drones: {n_drones}, Delay: {delay}, Objective: {obj_val}, Time: {model.elapsed_time}s")
-    return results
+def adaptive_endurance_rows(n_targets, n_drones, endurances, delay=1, num_matrices=5, max_time=30, compare_cold=False, cache=None, seed=0,
+                            stats=None):
+    """
+    Rows of sensitivity_analysis_endurance for one fleet size, found by bisection (see f_adaptive.bisect_grid): the
+    optimum never gets worse with more endurance, so every matrix is only solved around its feasibility threshold and
+    objective breakpoints, and the endurances in between get the value of their neighbours. Unlike the full sweep,
+    which draws new matrices for every endurance, all endurances share the matrices scenarios 0, ..., num_matrices - 1
+    of the seed, as the bisection needs one instance along the whole range. The values filled in are only exact for
+    solves that reach optimality (no time limit or gap target). Rows have the columns of the full sweep, plus
+    'solved', the number of matrices solved at that endurance.
+    """
+    endurances = list(endurances)
+    values = []
+    solved = []
+    elapsed_times = np.zeros(len(endurances))
+    model = None
+    for time_matrix in generate_instances(n_targets, n_drones, num_matrices, seed, high=max_time):
+        start = None
+
+        def evaluate(index):
+            nonlocal model, start
+            if model is None:
+                model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurances[index], delay=delay, timedict=time_matrix)
+            else:
+                model.set_endurance(endurances[index])
+                model.set_time_matrix(time_matrix)
+            result = solve_warm(model, start, stats, compare_cold, cache=cache)
+            start = result['solution']
+            elapsed_times[index] += result['elapsed_time'] or 0.0
+            return np.nan if result['objective_value'] is None else result['objective_value']
+
+        matrix_values, matrix_solved = bisect_grid(len(endurances), evaluate)
+        values.append(matrix_values)
+        solved.append(matrix_solved)
+    values, solved = np.array(values).reshape(-1, len(endurances)), np.array(solved).reshape(-1, len(endurances))
+    rows = []
+    for index, endurance in enumerate(endurances):
+        # Averaged like the full sweep: matrices without a solution count as 0
+        rows.append({
+            'n_drones': n_drones,
+            'endurance': endurance,
+            'objective_value': np.nan_to_num(values[:, index]).sum() / num_matrices if num_matrices else None,
+            'elapsed_time': elapsed_times[index] / num_matrices if num_matrices else None,
+            'solved': int(solved[:, index].sum())
+        })
+    print(f"Drones: {n_drones}, {int(solved.sum())} of {solved.size} endurance points solved")
+    return rows
+
+def solve_time_matrices_point(n_targets, n_drones, endurance, delay, num_matrices=5, max_time=30, compare_cold=False, cache=None, params=None):
+    """
+    Solve all random time matrices of one (targets, drones) point, as run_sweep point function.
+    The matrices reuse one model and each solve is warm started from the previous one. They are scenarios
+    0, ..., num_matrices - 1 of the point's seed (the Seed param, see f_instances), so every row can be
+    regenerated from its seed and scenario alone.
+    """
+    rows = []
+    model = None
+    start = None
+    seed = (params or {}).get('Seed', 0)
+    for index, time_matrix in enumerate(generate_instances(n_targets, n_drones, num_matrices, seed, high=max_time)):
+        if model is None:
+            model = UAVStrikeModel(n_targets=n_targets, n_uavs=n_drones, endurance=endurance, delay=delay, timedict=time_matrix)
+            apply_params(model, params)
+        else:
+            model.set_time_matrix(time_matrix)  # Reuse the model, only the time coefficients change
+        stats = warm_start_stats()
+        result = solve_warm(model, start, stats, compare_cold, params, cache=cache)
+        start = result['solution']
+        obj_val = result['objective_value']
+        rows.append({
+            'n_targets': n_targets,
+            'n_drones': n_drones,
+            'delay': delay,
+            'time_matrix': dict(time_matrix),
+            'scenario': index,
+            'status': result['status'],
+            'objective_value': obj_val,
+            'best_bound': result.get('best_bound'),
+            'gap': result.get('gap'),
+            'elapsed_time': result['elapsed_time'],
+            'warm_start_stats': stats
+        })
+        print(f"Targets: {n_targets}, Drones: {n_drones}, Delay: {delay}, Objective: {obj_val}, Time: {result['elapsed_time']}s")
+    return rows
+
+def combined_sensitivity_analysis(max_targets, max_drones, endurance, delay, num_matrices=5, max_time=30, compare_cold=False,
+                                  workers=1, threads=None, seed=0, cache=None, time_limit=None, mip_gap=None, budget=None):
+    points = [{'n_targets': n_targets, 'n_drones': n_drones, 'endurance': endurance, 'delay': delay,
+               'num_matrices': num_matrices, 'max_time': max_time, 'compare_cold': compare_cold, 'cache': cache}
+              for n_targets in range(1, max_targets + 1) for n_drones in range(n_targets + 1, max_drones + 1)]
+    df = run_sweep(solve_time_matrices_point, points, workers, threads, seed, limit_params(time_limit, mip_gap), budget)
+    stats = warm_start_stats()
+    for point_stats in df.pop('warm_start_stats') if len(df) else []:
+        add_warm_start_stats(stats, point_stats)
+    print_warm_start_report(stats)
+    return df.to_dict('records')
 
 def save_results_to_csv(results, filename='sensitivity_analysis_results.csv'):
     df = pd.DataFrame(results)
@@ -241,43 +594,69 @@ def plot_heatmap_endurance_drones(csv_file):
     plt.show()
 
 
-def sens_speed(drone_speed, obj, starting_locations, target_locations, n_targets=3, n_UAVS=6, endurance=240, delay=1):
-    time_dictionary = create_time_dictionary(starting_locations, target_locations, drone_speed)
-    model = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=obj)
-    model.optimize()
+def sens_speed(drone_speed, obj, starting_locations, target_locations, n_targets=3, n_UAVS=6, endurance=240, delay=1, model=None,
+               start=None, stats=None, compare_cold=False, cache=None):
+    # Pass a model built for the same instance to update it in place instead of building a new one,
+    # and the previous point's solution as start to warm-start the solve (see solve_warm).
+    # Returns the objective value (NaN if no solution was found) and the solution to start the next point from
+    time_dictionary = create_time_tensor(starting_locations, target_locations, drone_speed)
+    if model is None:
+        model = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=obj)
+    else:
+        model.set_time_matrix(time_dictionary)
+    result = solve_warm(model, start, stats, compare_cold, cache=cache)
 
-    if model.m.status == GRB.OPTIMAL:
-        obj_val = model.m.objVal
+    if result['objective_value'] is not None:
+        obj_val = result['objective_value']  # Best solution found, also when a time limit or gap target stopped the solve
     else:
-        return np.nan
+        return np.nan, result['solution']
     
-    return obj_val
-
-def sens_endurance(endurance, obj, starting_locations, target_locations, n_targets=3, n_UAVS=6, drone_speed=500, delay=1):
-    time_dictionary = create_time_dictionary(starting_locations, target_locations, drone_speed)
-    model = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=obj)
-    model.optimize()
-
-    if model.m.status == GRB.OPTIMAL:
-        obj_val = model.m.objVal
+    return obj_val, result['solution']
+
+def sens_endurance(endurance, obj, starting_locations, target_locations, n_targets=3, n_UAVS=6, drone_speed=500, delay=1, model=None,
+                   start=None, stats=None, compare_cold=False, params=None, cache=None, reuse=None):
+    # Pass a model built for the same instance to update it in place instead of building a new one,
+    # and the previous point's solution as start to warm-start the solve (see solve_warm).
+    # With a SolutionReuse the point is not solved when the outcomes at other endurances prove its optimum.
+    # Returns the objective value (NaN if no solution was found) and the solution to start the next point from
+    time_dictionary = create_time_tensor(starting_locations, target_locations, drone_speed)
+    if model is None:
+        model = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=obj)
+    elif not (isinstance(model.time, TimeTensor) and np.array_equal(model.time.array, time_dictionary.array, equal_nan=True)):
+        model.set_time_matrix(time_dictionary)  # Only when the speed changed, along an endurance row the times stay the same
+    model.set_endurance(endurance)
+    result = solve_warm(model, start, stats, compare_cold, params, cache, reuse)
+
+    if result['objective_value'] is not None:
+        obj_val = result['objective_value']  # Best solution found, also when a time limit or gap target stopped the solve
     else:
-        return np.nan
+        return np.nan, result['solution']
 
-    return obj_val
+    return obj_val, result['solution']
 
-def plot_speed(min_speed, max_speed, starting_locations, target_locations, n_targets=3, n_UAVS=6, endurance=240, delay=1):
+def plot_speed(min_speed, max_speed, starting_locations, target_locations, n_targets=3, n_UAVS=6, endurance=240, delay=1, compare_cold=False, cache=None):
     speed_range = range(min_speed, max_speed + 5, 5)
     # Lists to store results
     lst_sens_speed_1 = []
     lst_sens_speed_2 = []
 
-    # Speed sensitivity analysis
+    # One model per objective, updated in place for every speed
+    time_dictionary = create_time_tensor(starting_locations, target_locations, min_speed)
+    model_1 = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=1)
+    model_2 = UAVStrikeModel(n_targets, n_UAVS, endurance, delay, time_dictionary, obj=2)
+
+    # Speed sensitivity analysis, each point starting from the previous point's solution
+    stats = warm_start_stats()
+    start_1 = start_2 = None
     for speed in speed_range:
-        obj_val_1 = sens_speed(speed, 1, starting_locations, target_locations, n_targets, n_UAVS, endurance, delay)
-        obj_val_2 = sens_speed(speed, 2, starting_locations, target_locations, n_targets, n_UAVS, endurance, delay)
+        obj_val_1, start_1 = sens_speed(speed, 1, starting_locations, target_locations, n_targets, n_UAVS, endurance, delay, model=model_1,
+                                        start=start_1, stats=stats, compare_cold=compare_cold, cache=cache)
+        obj_val_2, start_2 = sens_speed(speed, 2, starting_locations, target_locations, n_targets, n_UAVS, endurance, delay, model=model_2,
+                                        start=start_2, stats=stats, compare_cold=compare_cold, cache=cache)
         
         lst_sens_speed_1.append(obj_val_1)
         lst_sens_speed_2.append(obj_val_2)
+    print_warm_start_report(stats)
 
     # Plotting speed sensitivity with secondary y-axis
     fig, ax1 = plt.subplots(figsize=(5, 4))
@@ -300,18 +679,35 @@ def plot_speed(min_speed, max_speed, starting_locations, target_locations, n_tar
     plt.xlim(speed_range.start, speed_range.stop - speed_range.step)
     plt.show()
 
-def plot_endurance(min_end, max_end, starting_locations, target_locations, n_targets=3, n_UAVS=6, drone_speed=100, delay=1):
+def plot_endurance(min_end, max_end, starting_locations, target_locations, n_targets=3, n_UAVS=6, drone_speed=100, delay=1, compare_cold=False, cache=None,
+                   reuse=False):
+    # reuse solves from the largest endurance down and skips the points whose optimum is proven by the
+    # solutions at larger endurances (see f_reuse)
     endurance_range = range(min_end, max_end + 5, 5)
 
     lst_endurance_1 = []
     lst_endurance_2 = []
-
-    # Endurance sensitivity analysis
-    for endurance in endurance_range:
-        obj_val_1 = sens_endurance(endurance, 1, starting_locations, target_locations, n_targets, n_UAVS, drone_speed, delay)
-        obj_val_2 = sens_endurance(endurance, 2, starting_locations, target_locations, n_targets, n_UAVS, drone_speed, delay)
+    solution_reuse = SolutionReuse() if reuse else None
+
+    # One model per objective, updated in place for every endurance
+    time_dictionary = create_time_tensor(starting_locations, target_locations, drone_speed)
+    model_1 = UAVStrikeModel(n_targets, n_UAVS, min_end, delay, time_dictionary, obj=1)
+    model_2 = UAVStrikeModel(n_targets, n_UAVS, min_end, delay, time_dictionary, obj=2)
+
+    # Endurance sensitivity analysis, each point starting from the previous point's solution
+    stats = warm_start_stats()
+    start_1 = start_2 = None
+    for endurance in (reversed(endurance_range) if reuse else endurance_range):
+        obj_val_1, start_1 = sens_endurance(endurance, 1, starting_locations, target_locations, n_targets, n_UAVS, drone_speed, delay, model=model_1,
+                                            start=start_1, stats=stats, compare_cold=compare_cold, cache=cache, reuse=solution_reuse)
+        obj_val_2, start_2 = sens_endurance(endurance, 2, starting_locations, target_locations, n_targets, n_UAVS, drone_speed, delay, model=model_2,
+                                            start=start_2, stats=stats, compare_cold=compare_cold, cache=cache, reuse=solution_reuse)
         lst_endurance_1.append(obj_val_1)
         lst_endurance_2.append(obj_val_2)
+    if reuse:
+        lst_endurance_1.reverse()
+        lst_endurance_2.reverse()
+    print_warm_start_report(stats)
 
     # Plotting endurance sensitivity with secondary y-axis
     fig, ax1 = plt.subplots(figsize=(5, 4))
@@ -335,7 +731,71 @@ def plot_endurance(min_end, max_end, starting_locations, target_locations, n_tar
     plt.xlim(endurance_range.start, endurance_range.stop - endurance_range.step)
     plt.show()
 
-def plot_heatmap_speed_endurance(min_speed, max_speed, min_endurance, max_endurance, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1):
+def solve_speed_row(speed, endurances, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1, compare_cold=False, cache=None,
+                    params=None, reuse=False):
+    """
+    Solve one speed row of the speed/endurance grid for objectives 1-3, as run_sweep point function.
+    Every objective reuses one model along the row, each endurance starting from the previous solution.
+    With reuse the row is solved from the largest endurance down, and endurances whose optimum is proven by
+    the solutions at larger ones are not solved (see f_reuse); the rows are returned in the given order.
+    """
+    time_dictionary = create_time_tensor(starting_locations, target_locations, speed)
+    models = {obj: UAVStrikeModel(n_targets, n_UAVS, endurances[0], delay, time_dictionary, obj=obj) for obj in [1, 2, 3]}
+    for model in models.values():
+        apply_params(model, params)
+
+    rows = []
+    starts = {obj: None for obj in models}
+    solution_reuse = SolutionReuse() if reuse else None
+    for endurance in (sorted(endurances, reverse=True) if reuse else endurances):
+        row = {'speed': speed, 'endurance': endurance, 'warm_start_stats': warm_start_stats()}
+        for obj, model in models.items():
+            row[f'objective_{obj}'], starts[obj] = sens_endurance(endurance, obj, starting_locations, target_locations, n_targets, n_UAVS, speed, delay,
+                                                                  model=model, start=starts[obj], stats=row['warm_start_stats'],
+                                                                  compare_cold=compare_cold, params=params, cache=cache, reuse=solution_reuse)
+        rows.append(row)
+    if reuse:
+        rows.sort(key=lambda row: list(endurances).index(row['endurance']))
+    return rows
+
+def adaptive_speed_endurance(speeds, endurances, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1, compare_cold=False,
+                             cache=None, params=None, reuse=False):
+    """
+    Rows of solve_speed_row for the whole speed/endurance grid, refined adaptively per objective (see
+    f_adaptive.refine_grid): no objective gets worse with more speed or more endurance, so cells are only solved
+    where neighbouring cells differ and the rest of the grid gets the value of the rectangle around it. Every
+    objective reuses one model for all cells. The values filled in are only exact for solves that reach optimality.
+    Every row also has 'solved', the number of objectives solved at that cell. With reuse, cells whose optimum is
+    proven by the solutions at larger endurances of the same speed are not solved either (see f_reuse).
+    """
+    stats = [[warm_start_stats() for _ in endurances] for _ in speeds]
+    solution_reuse = SolutionReuse() if reuse else None
+    objectives = {}
+    solved = np.zeros((len(speeds), len(endurances)), dtype=int)
+    for obj in [1, 2, 3]:
+        model = UAVStrikeModel(n_targets, n_UAVS, endurances[0], delay, create_time_tensor(starting_locations, target_locations, speeds[0]), obj=obj)
+        apply_params(model, params)
+        start = None
+
+        def evaluate(i, j):
+            nonlocal start
+            value, start = sens_endurance(endurances[j], obj, starting_locations, target_locations, n_targets, n_UAVS, speeds[i], delay,
+                                          model=model, start=start, stats=stats[i][j], compare_cold=compare_cold, params=params, cache=cache,
+                                          reuse=solution_reuse)
+            return value
+
+        objectives[obj], obj_solved = refine_grid((len(speeds), len(endurances)), evaluate)
+        solved += obj_solved
+    print(f"Adaptive grid: {int(solved.sum())} of {3 * solved.size} solves")
+    return pd.DataFrame([{'speed': speed, 'endurance': endurance, 'warm_start_stats': stats[i][j], 'objective_1': objectives[1][i, j],
+                          'objective_2': objectives[2][i, j], 'objective_3': objectives[3][i, j], 'solved': solved[i, j]}
+                         for i, speed in enumerate(speeds) for j, endurance in enumerate(endurances)])
+
+def plot_heatmap_speed_endurance(min_speed, max_speed, min_endurance, max_endurance, starting_locations, target_locations, n_targets=3, n_UAVS=6, delay=1, compare_cold=False,
+                                 workers=1, threads=None, seed=0, cache=None, time_limit=None, mip_gap=None, budget=None, adaptive=False, reuse=False):
+    # adaptive refines the grid where neighbouring cells differ instead of solving every cell, in one process
+    # (see adaptive_speed_endurance); workers and budget only apply to the full grid. reuse skips the cells whose
+    # optimum is proven by the solutions at larger endurances (see f_reuse)
     speed_range = range(min_speed, max_speed + 1, 10)
     endurance_range = range(min_endurance, max_endurance + 1, 10)
 
@@ -344,12 +804,22 @@ def plot_heatmap_speed_endurance(min_speed, max_speed, min_endurance, max_endura
     obj_values_2 = np.full((len(speed_range), len(endurance_range)), np.nan)
     obj_values_3 = np.full((len(speed_range), len(endurance_range)), np.nan)
 
-    # Perform the analysis
-    for i, speed in enumerate(speed_range):
-        for j, endurance in enumerate(endurance_range):
-            obj_values_1[i, j] = sens_endurance(endurance, 1, starting_locations, target_locations, n_targets, n_UAVS, speed, delay)
-            obj_values_2[i, j] = sens_endurance(endurance, 2, starting_locations, target_locations, n_targets, n_UAVS, speed, delay)
-            obj_values_3[i, j] = sens_endurance(endurance, 3, starting_locations, target_locations, n_targets, n_UAVS, speed, delay)
+    if adaptive:
+        params = dict(limit_params(time_limit, mip_gap), Threads=split_threads(1, threads), Seed=seed)
+        df = adaptive_speed_endurance(list(speed_range), list(endurance_range), starting_locations, target_locations, n_targets, n_UAVS, delay,
+                                      compare_cold, cache, params, reuse)
+    else:
+        # Perform the analysis, the speed rows are independent and solved by `workers` processes
+        points = [{'speed': speed, 'endurances': list(endurance_range), 'starting_locations': starting_locations, 'target_locations': target_locations,
+                   'n_targets': n_targets, 'n_UAVS': n_UAVS, 'delay': delay, 'compare_cold': compare_cold, 'cache': cache, 'reuse': reuse}
+                  for speed in speed_range]
+        df = run_sweep(solve_speed_row, points, workers, threads, seed, limit_params(time_limit, mip_gap), budget)
+    stats = warm_start_stats()
+    for row in df.itertuples():
+        i, j = speed_range.index(row.speed), endurance_range.index(row.endurance)
+        obj_values_1[i, j], obj_values_2[i, j], obj_values_3[i, j] = row.objective_1, row.objective_2, row.objective_3
+        add_warm_start_stats(stats, row.warm_start_stats)
+    print_warm_start_report(stats)
 
     # Create a colormap with NaN values as light red
     cmap = plt.cm.Blues
@@ -0,0 +1,40 @@
+import numpy as np
+
+FAMILIES = ('x1', 'x2', 't1', 't2')
+
+class SolutionSnapshot:
+    """
+    Values of all variables of a solved UAVStrikeModel, taken from the column values of its last solve (read with
+    one getAttr call instead of one .X access per variable, or returned by the HiGHS backend). For every variable
+    family (x1, x2, t1, t2) `keys` holds the keys in the order of the model's dictionary and `values` a NumPy
+    array aligned with them; `finaltime` is the makespan t. The snapshot does not change when the model is solved again.
+    """
+    def __init__(self, model):
+        self.keys = {name: list(getattr(model, name)) for name in FAMILIES}
+        values = model.result.x[model.columns()]
+        self.values = {}
+        start = 0
+        for name in FAMILIES:
+            self.values[name] = values[start:start + len(self.keys[name])]
+            start += len(self.keys[name])
+        self.finaltime = float(values[-1])
+        self.objective = model.result.objective
+        self.status = model.result.status
+        self._index = {}
+
+    def index(self, name):
+        # Position of every key of a family in its value array
+        if name not in self._index:
+            self._index[name] = {key: position for position, key in enumerate(self.keys[name])}
+        return self._index[name]
+
+    def value(self, name, key):
+        return float(self.values[name][self.index(name)[key]])
+
+    def active(self, name='x1', threshold=0.5):
+        # Keys of the arcs used in the solution (x1 or x2), in the order of the model's dictionary
+        return [self.keys[name][position] for position in np.flatnonzero(self.values[name] > threshold)]
+
+    def as_dict(self, name):
+        # Values of a family as a dictionary keyed like the model's variables
+        return dict(zip(self.keys[name], self.values[name].tolist()))
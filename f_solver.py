@@ -0,0 +1,73 @@
+import time as tm
+import numpy as np
+from scipy.optimize import milp, LinearConstraint, Bounds
+from gurobipy import GRB
+
+SOLVERS = ('gurobi', 'highs')
+
+# Exit status of scipy.optimize.milp as Gurobi status code, so the rest of the code handles both backends alike
+HIGHS_STATUS = {0: GRB.OPTIMAL, 1: GRB.TIME_LIMIT, 2: GRB.INFEASIBLE, 3: GRB.UNBOUNDED, 4: GRB.NUMERIC}
+
+class SolverResult:
+    """
+    Outcome of a solve, whichever backend ran it: Gurobi status code, number of solutions, objective value, best
+    bound, relative gap, explored nodes, solve seconds and the values of all columns of the model (None without a
+    solution), in the column order of the Gurobi model.
+    """
+    def __init__(self, status, sol_count, objective=None, bound=None, gap=None, nodes=0, runtime=0.0, x=None):
+        self.status = status
+        self.sol_count = sol_count
+        self.objective = objective
+        self.bound = bound
+        self.gap = gap
+        self.nodes = nodes
+        self.runtime = runtime
+        self.x = x
+
+def gurobi_result(m):
+    # Result of the last m.optimize()
+    if m.SolCount == 0:
+        return SolverResult(m.Status, 0, nodes=m.NodeCount, runtime=m.Runtime)
+    return SolverResult(m.Status, m.SolCount, m.ObjVal, m.ObjBound, m.MIPGap, m.NodeCount, m.Runtime,
+                        np.asarray(m.getAttr('X', m.getVars()), dtype=float))
+
+def model_arrays(m):
+    # Objective, constraint matrix with row bounds, column bounds and integrality of a Gurobi model, as NumPy/SciPy arrays
+    m.update()
+    variables, constrs = m.getVars(), m.getConstrs()
+    A = m.getA().tocsr()
+    rhs = np.asarray(m.getAttr('RHS', constrs), dtype=float)
+    sense = np.asarray(m.getAttr('Sense', constrs))
+    row_lb = np.where(sense == '<', -np.inf, rhs)
+    row_ub = np.where(sense == '>', np.inf, rhs)
+    lb = np.asarray(m.getAttr('LB', variables), dtype=float)
+    ub = np.asarray(m.getAttr('UB', variables), dtype=float)
+    lb[lb <= -GRB.INFINITY], ub[ub >= GRB.INFINITY] = -np.inf, np.inf
+    integrality = np.isin(np.asarray(m.getAttr('VType', variables)), ['B', 'I']).astype(int)
+    c = np.asarray(m.getAttr('Obj', variables), dtype=float)
+    return c, A, row_lb, row_ub, lb, ub, integrality
+
+def solve_highs(m):
+    """
+    Solve the MILP held by a Gurobi model with HiGHS (through scipy.optimize.milp), so models larger than a
+    size-limited Gurobi license allows can be solved: the same constraint matrix, with every family, is passed on
+    as it is. Of the model's Gurobi parameters TimeLimit, MIPGap and OutputFlag are used; HiGHS runs on one
+    thread and does not take MIP starts. Returns a SolverResult.
+    """
+    c, A, row_lb, row_ub, lb, ub, integrality = model_arrays(m)
+    sense = m.ModelSense  # 1 minimize, -1 maximize
+    options = {'disp': bool(m.Params.OutputFlag), 'mip_rel_gap': m.Params.MIPGap}
+    if m.Params.TimeLimit < GRB.INFINITY:
+        options['time_limit'] = m.Params.TimeLimit
+    start_time = tm.time()
+    res = milp(sense * c, constraints=LinearConstraint(A, row_lb, row_ub), integrality=integrality,
+               bounds=Bounds(lb, ub), options=options)
+    runtime = tm.time() - start_time
+    status = HIGHS_STATUS.get(res.status, GRB.NUMERIC)
+    nodes = getattr(res, 'mip_node_count', 0) or 0
+    if res.x is None:
+        return SolverResult(status, 0, nodes=nodes, runtime=runtime)
+    constant = m.ObjCon
+    bound = getattr(res, 'mip_dual_bound', None)
+    return SolverResult(status, 1, sense * res.fun + constant, None if bound is None else sense * bound + constant,
+                        getattr(res, 'mip_gap', None), nodes, runtime, np.asarray(res.x, dtype=float))
@@ -0,0 +1,72 @@
+import os
+import time as tm
+import random as rd
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+def split_threads(workers, threads=None):
+    """
+    Gurobi Threads for each worker, so that all workers together use at most `threads`
+    (by default the number of cores). 0 lets Gurobi decide when there is a single worker.
+    """
+    if workers == 1 and threads is None:
+        return 0
+    total = threads if threads is not None else os.cpu_count()
+    return max(1, total // workers)
+
+def apply_params(model, params):
+    # Set Gurobi parameters (Threads, Seed, TimeLimit, ...) on a UAVStrikeModel, without building it yet
+    for name, value in (params or {}).items():
+        model.set_param(name, value)
+
+def limit_params(time_limit=None, mip_gap=None):
+    # Gurobi parameters stopping every point of a sweep at a time limit (seconds) or relative gap target
+    params = {}
+    if time_limit is not None:
+        params['TimeLimit'] = time_limit
+    if mip_gap is not None:
+        params['MIPGap'] = mip_gap
+    return params
+
+def _run_point(solve_point, index, point, params, seed, deadline=None):
+    # Runs inside a worker: seed the random module so the point's random data only depends on its seed
+    rd.seed(seed)
+    params = dict(params, Seed=seed)
+    if deadline is not None:
+        # Points started late only get the time left of the sweep budget, after it they stop at once with their best solution
+        params['TimeLimit'] = max(0.0, min(params.get('TimeLimit', float('inf')), deadline - tm.time()))
+    rows = solve_point(params=params, **point)
+    if isinstance(rows, dict):
+        rows = [rows]
+    return [dict(row, point=index, seed=seed) for row in rows]
+
+def run_sweep(solve_point, points, workers=1, threads=None, seed=0, params=None, budget=None):
+    """
+    Solve independent grid points, spread over a process pool when workers > 1.
+
+    solve_point is a module level function called as solve_point(params=..., **point) for every point
+    (a dict of keyword arguments). It returns a dict, or a list of dicts, of results. params holds the
+    Gurobi parameters to apply to the point's model: the Threads share of the worker, a per-point Seed
+    (seed + position in the grid, also used for the random module) and any extra params given here, such as
+    the TimeLimit and MIPGap of limit_params. budget is a wall-clock limit in seconds for the whole sweep: every
+    point's TimeLimit is cut to the time left, so points reached after it return at once with whatever they found.
+    The results of all points are collected in one DataFrame, in grid order.
+    """
+    params = dict(params or {})
+    params.setdefault('Threads', split_threads(workers, threads))
+    if workers > 1:
+        params.setdefault('OutputFlag', 0)  # Keep the logs of parallel solves from interleaving
+    seeds = [seed + index for index in range(len(points))]
+    deadline = tm.time() + budget if budget is not None else None
+
+    if workers == 1:
+        results = [_run_point(solve_point, index, point, params, seeds[index], deadline) for index, point in enumerate(points)]
+    else:
+        # Spawn fresh processes so every worker creates its own Gurobi environment
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+            futures = [pool.submit(_run_point, solve_point, index, point, params, seeds[index], deadline)
+                       for index, point in enumerate(points)]
+            results = [future.result() for future in futures]
+
+    return pd.DataFrame([row for rows in results for row in rows])
@@ -0,0 +1,66 @@
+import numpy as np
+from gurobipy import GRB
+
+def constraint_rows(m, families=None):
+    """
+    Family of every row of the constraint matrix. families maps a family name to its constraints;
+    rows that belong to no family are reported as 'other'.
+    """
+    labels = np.full(m.NumConstrs, 'other', dtype=object)
+    for name, constrs in (families or {}).items():
+        labels[[constr.index for constr in constrs]] = name
+    return labels
+
+def verify_solution(m, x=None, families=None, tol=1e-6, rel_tol=1e-9):
+    """
+    Check a solution against all rows, bounds and integrality of a Gurobi model at once.
+
+    The constraint matrix, right-hand sides and senses are read once and the left-hand sides are computed
+    with one sparse matrix-vector product. x defaults to the model's current solution. Every row gets its
+    own tolerance tol + rel_tol * (|A| |x| + |rhs|), so rows with large big-M terms are not flagged for
+    round-off. Returns a report with the number of rows checked, the largest violation and the violated
+    rows grouped by family, as (row index, constraint name, violation) tuples.
+    """
+    variables = m.getVars()
+    constrs = m.getConstrs()
+    A = m.getA().tocsr()
+    x = np.asarray(m.getAttr('X', variables) if x is None else x, dtype=float)
+    rhs = np.array(m.getAttr('RHS', constrs))
+    sense = np.array(m.getAttr('Sense', constrs))
+
+    lhs = A @ x
+    violation = np.where(sense == GRB.LESS_EQUAL, lhs - rhs, np.where(sense == GRB.GREATER_EQUAL, rhs - lhs, np.abs(lhs - rhs)))
+    tolerance = tol + rel_tol * (abs(A) @ np.abs(x) + np.abs(rhs))
+    rows = np.flatnonzero(violation > tolerance)
+
+    report = {'rows': len(constrs), 'max_violation': float(max(violation.max(initial=0.0), 0.0)), 'violations': {}}
+    labels = constraint_rows(m, families)
+    names = m.getAttr('ConstrName', [constrs[row] for row in rows])
+    for row, name in zip(rows, names):
+        report['violations'].setdefault(labels[row], []).append((int(row), name, float(violation[row])))
+
+    # Variable bounds and integrality of the binary and integer variables
+    lb = np.array(m.getAttr('LB', variables))
+    ub = np.array(m.getAttr('UB', variables))
+    vtype = np.array(m.getAttr('VType', variables))
+    bound = np.maximum(lb - x, x - ub)
+    integral = np.isin(vtype, [GRB.BINARY, GRB.INTEGER])
+    fraction = np.where(integral, np.abs(x - np.round(x)), 0.0)
+    for family, values, limit in [('bounds', bound, tol), ('integrality', fraction, m.Params.IntFeasTol)]:
+        cols = np.flatnonzero(values > limit)
+        names = m.getAttr('VarName', [variables[col] for col in cols])
+        for col, name in zip(cols, names):
+            report['violations'].setdefault(family, []).append((int(col), name, float(values[col])))
+        report['max_violation'] = max(report['max_violation'], float(values.max(initial=0.0)))
+
+    report['feasible'] = not report['violations']
+    return report
+
+def print_verification_report(report):
+    if report['feasible']:
+        print(f"All {report['rows']} constraints satisfied (largest violation {report['max_violation']:.2e})")
+        return
+    print(f"Solution violates {sum(len(rows) for rows in report['violations'].values())} rows or variables:")
+    for family, rows in report['violations'].items():
+        worst = max(rows, key=lambda row: row[2])
+        print(f"  {family}: {len(rows)} violated, worst {worst[1]} by {worst[2]:.2e}")
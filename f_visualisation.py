@@ -4,8 +4,12 @@ import matplotlib.pyplot as plt
 from gurobipy import *
 import networkx as nx
 from matplotlib.patches import FancyArrowPatch
+from f_results import ResultStore
 
-def plot_time_space_network(results):
+def plot_time_space_network(results, run=None):
+    # results is a solution dictionary or a ResultStore; from a store the run with id or name `run` (default: the latest) is plotted
+    if isinstance(results, ResultStore):
+        results = results.load(results.latest(run) or run)
     model = results['Model']
     decision_variables = results
     x1 = decision_variables.get('x1', {})
@@ -84,12 +88,8 @@ def NetworkMap(model):
     time = model.time
     n = model.n
     w = model.w
-    lst_v = model.lst_v
     lst_i = model.lst_i
     lst_j = model.lst_j
-    lst_k = model.lst_k
-    x1 = model.x1
-    x2 = model.x2
 
     # Create a MultiDiGraph
     G = nx.MultiDiGraph()
@@ -106,26 +106,20 @@ def NetworkMap(model):
     cmap = plt.get_cmap('tab10')  # Use 'tab10' colormap which has 10 distinct colors
 
     # Only add edges that are active in the MILP solution and store their UAV index
-    edges = []
-    for i in lst_i:
-        for j in lst_j:
-            if i != j:
-                for v in lst_v:
-                    for k in lst_k:
-                        if (i, j, v, k) in x1 and x1[i, j, v, k].X > 0.5:
-                            G.add_edge(i, j, weight=time[i, j, v, k], UAV=v, task=k)
+    snapshot = model.snapshot()
+    active = snapshot.active('x1')
+    for i, j, v, k in active:
+        if i != j:
+            G.add_edge(i, j, weight=time[i, j, v, k], UAV=v, task=k)
 
     # Add edges from nodes to the sink node if active
-    for i in lst_i:
-        for v in lst_v:
-            if (i, sink_node, v) in x2 and x2[i, sink_node, v].X > 0.5:
-                G.add_edge(i, sink_node, weight=0, UAV=v)  # Using last task and target for weight
+    for i, sink, v in snapshot.active('x2'):
+        G.add_edge(i, sink_node, weight=0, UAV=v)  # Using last task and target for weight
 
     # Add self-loops for target nodes if active
-    for j in lst_j:
-        for v in lst_v:
-            if (j, j, v, 2) in x1 and x1[j, j, v, 2].X > 0.5:
-                G.add_edge(j, j, weight=time[j, j, v, 2], UAV=v)
+    for i, j, v, k in active:
+        if i == j:
+            G.add_edge(j, j, weight=time[j, j, v, 2], UAV=v)
 
     # Set positions manually
     pos = {}